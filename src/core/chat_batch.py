@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+JARVIS Batch Chat Inference
+Runs JSONL prompt files through the model without SSE framing, resumably
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import logging
+import argparse
+from pathlib import Path
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Where /api/chat/batch keeps result files so re-uploads resume
+BATCH_DIR = Path(os.environ.get("JARVIS_BATCH_DIR", Path(__file__).parent.parent.parent / "batches"))
+
+
+def read_batch(lines):
+    """Parse JSONL prompt lines into items with string ids
+
+    Each line is either a JSON object with ``message`` (plus optional ``id``,
+    ``system_prompt`` and ``max_tokens``, which can lower but never raise the
+    server's limit) or a bare JSON string. Items without an ``id`` are
+    numbered by line so resumes line up.
+    """
+    items = []
+    for index, line in enumerate(lines):
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        line = line.strip()
+        if not line:
+            continue
+        data = json.loads(line)
+        if isinstance(data, str):
+            data = {"message": data}
+        if not isinstance(data, dict):
+            raise ValueError(f"line {index + 1}: expected an object or a string")
+        if not data.get("message"):
+            raise ValueError(f"line {index + 1}: no message")
+        data["id"] = str(data.get("id", index))
+        items.append(data)
+    return items
+
+
+def batch_id_for(lines):
+    """Content-addressed id, so re-submitting the same file resumes it"""
+    digest = hashlib.sha256()
+    for line in lines:
+        digest.update(line if isinstance(line, bytes) else line.encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()[:16]
+
+
+def completed_results(output_path):
+    """Result lines (with their newline) already written successfully"""
+    path = Path(output_path)
+    if not path.exists():
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                return   # Torn final line from an interrupted write
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(result, dict) and "error" not in result:
+                yield line
+
+
+def completed_ids(output_path):
+    """Ids already written successfully; repairs a torn final line"""
+    done = set()
+    path = Path(output_path)
+    if not path.exists():
+        return done
+
+    with open(path, "rb+") as f:
+        data = f.read()
+        # An interrupted write can leave half a line; cut back to the last newline
+        if data and not data.endswith(b"\n"):
+            keep = data.rfind(b"\n") + 1
+            f.truncate(keep)
+            data = data[:keep]
+
+    for line in data.splitlines():
+        try:
+            result = json.loads(line)
+        except ValueError:
+            continue
+        if "error" not in result:
+            done.add(str(result.get("id")))
+    return done
+
+
+def order_by_prefix(items, build_prompt, hindi=False):
+    """Sort items so prompts sharing a prefix run back to back
+
+    llama.cpp keeps the previous prompt's KV cache and only evaluates the
+    tokens after the longest common prefix, so neighbours that share a system
+    prompt and opening words skip most of their prefill.
+    """
+    keyed = []
+    for item in items:
+        if item.get("system_prompt"):
+            prompt, stop = build_prompt(item["message"], item["system_prompt"], hindi=hindi)
+        else:
+            prompt, stop = build_prompt(item["message"], hindi=hindi)
+        keyed.append((prompt, item, stop))
+    keyed.sort(key=lambda entry: entry[0])
+    return keyed
+
+
+def run_batch(model, items, build_prompt, output_path, params, lock=None, hindi=False):
+    """Generate every pending item, appending one JSON line per result
+
+    Yields each result as it is written. Items already present in
+    ``output_path`` are skipped, so an interrupted batch resumes.
+    ``hindi`` is fixed for the whole batch when it is submitted.
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    done = completed_ids(output_path)
+    pending = [item for item in items if item["id"] not in done]
+    if done:
+        logger.info(f"⏯️ Resuming batch: {len(done)} done, {len(pending)} remaining")
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        for prompt, item, stop in order_by_prefix(pending, build_prompt, hindi):
+            item_params = dict(params)
+            if item.get("max_tokens"):
+                # Items may ask for shorter answers, never longer than the configured limit
+                item_params["max_tokens"] = max(1, min(int(item["max_tokens"]), params["max_tokens"]))
+
+            start = time.perf_counter()
+            try:
+                if lock is not None:
+                    with lock:
+                        completion = model(prompt, **item_params, stop=stop, echo=False, stream=False)
+                else:
+                    completion = model(prompt, **item_params, stop=stop, echo=False, stream=False)
+                seconds = time.perf_counter() - start
+                choice = completion["choices"][0]
+                usage = completion.get("usage", {})
+                completion_tokens = usage.get("completion_tokens", 0)
+                result = {
+                    "id": item["id"],
+                    "message": item["message"],
+                    "response": choice["text"].strip(),
+                    "finish_reason": choice.get("finish_reason"),
+                    "prompt_tokens": usage.get("prompt_tokens", 0),
+                    "completion_tokens": completion_tokens,
+                    "seconds": round(seconds, 3),
+                    "tokens_per_second": round(completion_tokens / seconds, 1) if seconds > 0 else 0.0,
+                }
+            except Exception as e:
+                logger.error(f"❌ Batch item {item['id']} failed: {e}")
+                result = {"id": item["id"], "message": item["message"], "error": str(e),
+                          "seconds": round(time.perf_counter() - start, 3)}
+
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+            yield result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a JSONL file of prompts through JARVIS")
+    parser.add_argument("input", help="JSONL file: one {\"id\", \"message\"} object per line")
+    parser.add_argument("-o", "--output", help="JSONL results file (default: <input>.results.jsonl)")
+    parser.add_argument("--max-tokens", type=int, default=None, help="Override max_tokens for every item")
+    parser.add_argument("--hindi", action="store_true", help="Ask for answers in Hindi")
+    args = parser.parse_args()
+
+    # The server module owns model discovery, loading and prompt formatting
+    import server
+
+    with open(args.input, "rb") as f:
+        items = read_batch(f)
+    output_path = args.output or f"{args.input}.results.jsonl"
+
+    if not server.initialize_model():
+        print("❌ Model failed to load")
+        sys.exit(1)
+
+    params = dict(server.GENERATION_PARAMS)
+    if args.max_tokens:
+        params["max_tokens"] = args.max_tokens
+
+    print(f"📦 Batch: {len(items)} prompts → {output_path}")
+    start = time.perf_counter()
+    count = 0
+    tokens = 0
+    for result in run_batch(server.MODEL_INSTANCE, items, server.build_prompt, output_path, params,
+                            hindi=args.hindi):
+        count += 1
+        tokens += result.get("completion_tokens", 0)
+        status = "❌" if "error" in result else "✅"
+        print(f"{status} [{result['id']}] {result['seconds']:.2f}s {result.get('completion_tokens', 0)} tokens")
+    elapsed = time.perf_counter() - start
+    if count:
+        print(f"🏁 {count} prompts in {elapsed:.1f}s ({tokens / elapsed:.1f} tokens/s overall)")
+    else:
+        print("✅ Nothing to do, batch already complete")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+JARVIS Request Coalescing
+Singleflight for streamed generations: identical concurrent requests share one
+running generation and each receive its full token stream
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+COALESCE_ENABLED = os.environ.get("JARVIS_COALESCE", "1") == "1"
+
+
+def coalesce_key(message, **params):
+    """Key identical requests by normalized prompt plus everything that shapes the output"""
+    normalized = " ".join(message.lower().split())
+    payload = json.dumps([normalized, params], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Flight:
+    """One in-progress generation and the events it has produced so far"""
+
+    def __init__(self, key):
+        self.key = key
+        self.events = []
+        self.done = False
+        self.cancelled = False
+        self.subscribers = 0
+        self._cond = threading.Condition()
+
+    def publish(self, event):
+        with self._cond:
+            self.events.append(event)
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self.done = True
+            self._cond.notify_all()
+
+    def subscribe(self, on_leave=None):
+        """Replay everything produced so far, then follow the live stream
+
+        Closing this generator (client disconnect) detaches this subscriber;
+        ``on_leave`` decides whether the generation is still wanted.
+        """
+        index = 0
+        try:
+            while True:
+                with self._cond:
+                    while index >= len(self.events) and not self.done:
+                        self._cond.wait()
+                    pending = self.events[index:]
+                    finished = self.done
+                index += len(pending)
+                yield from pending
+                if finished and index >= len(self.events):
+                    return
+        finally:
+            if on_leave is not None:
+                on_leave(self)
+
+
+class SingleFlight:
+    """Registry of in-flight generations keyed by request identity"""
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.started = 0
+        self.joined = 0
+        self.cancelled = 0
+
+    def join(self, key):
+        """Event iterator for the running generation for ``key``, or None if there is none"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                return None
+            self.joined += 1
+            flight.subscribers += 1
+        logger.info(f"🔗 Coalesced into in-flight generation {key[:8]} ({flight.subscribers} subscribers)")
+        return flight.subscribe(on_leave=self._leave)
+
+    def stream(self, key, producer):
+        """Return an event iterator for ``key``, starting ``producer()`` only if
+        no identical generation is already running
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = Flight(key)
+                self._flights[key] = flight
+                self.started += 1
+                leader = True
+            else:
+                self.joined += 1
+                leader = False
+            flight.subscribers += 1
+
+        if leader:
+            # Run detached from any one client; it stops only when every subscriber has left
+            thread = threading.Thread(target=self._run, args=(flight, producer), daemon=True,
+                                      name=f"flight-{key[:8]}")
+            thread.start()
+        else:
+            logger.info(f"🔗 Coalesced into in-flight generation {key[:8]} ({flight.subscribers} subscribers)")
+        return flight.subscribe(on_leave=self._leave)
+
+    def _leave(self, flight):
+        with self._lock:
+            flight.subscribers -= 1
+            abandoned = flight.subscribers == 0 and not flight.done
+            if abandoned:
+                # Later identical requests start a fresh generation
+                if self._flights.get(flight.key) is flight:
+                    del self._flights[flight.key]
+                flight.cancelled = True
+                self.cancelled += 1
+        if abandoned:
+            logger.info(f"✋ Every client left generation {flight.key[:8]}, stopping it")
+
+    def _run(self, flight, producer):
+        events = producer()
+        try:
+            for event in events:
+                if flight.cancelled:
+                    break
+                flight.publish(event)
+        except Exception as e:
+            logger.error(f"❌ Coalesced generation {flight.key[:8]} failed: {e}")
+        finally:
+            # Closing the producer releases the model lock as a direct client disconnect would
+            close = getattr(events, "close", None)
+            if close is not None:
+                close()
+            # Unregister first so new requests start fresh instead of replaying a finished flight
+            with self._lock:
+                if self._flights.get(flight.key) is flight:
+                    del self._flights[flight.key]
+            flight.close()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": COALESCE_ENABLED,
+                "in_flight": len(self._flights),
+                "generations_started": self.started,
+                "requests_coalesced": self.joined,
+                "generations_cancelled": self.cancelled,
+            }
+
+
+chat_flights = SingleFlight()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+JARVIS Load Degradation
+Steps chat through cheaper service levels as in-flight requests and recent
+time to first token climb, and back again with hysteresis once load eases
+"""
+
+import os
+import time
+import logging
+import threading
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Service levels, cheapest last
+NORMAL = 0
+SHORT_ANSWERS = 1     # Reduced max_tokens, no memory retrieval
+FALLBACK_MODEL = 2    # Smaller model (JARVIS_FALLBACK_MODEL) if one is loaded
+INSTANT_ONLY = 3      # Instant responses only; everything else is turned away
+REJECT = 4            # Every chat request is turned away
+
+LEVEL_NAMES = ["normal", "short_answers", "fallback_model", "instant_only", "reject"]
+
+
+def _thresholds(name, default):
+    """Comma-separated entry thresholds for levels 1..4"""
+    values = [float(v) for v in os.environ.get(name, default).split(",") if v.strip()]
+    if len(values) != REJECT or values != sorted(values):
+        raise ValueError(f"{name} needs {REJECT} ascending values, got {values}")
+    return values
+
+
+# Set JARVIS_DEGRADE=0 to always serve at the normal level
+DEGRADE_ENABLED = os.environ.get("JARVIS_DEGRADE", "1") == "1"
+# In-flight generations (including those queued at the model lock) that enter each level
+IN_FLIGHT_THRESHOLDS = _thresholds("JARVIS_DEGRADE_IN_FLIGHT", "4,8,16,32")
+# p95 time to first token (ms) that enters each level, over samples this recent;
+# only while generations are running, since an idle instance has no queue to wait in
+TTFT_THRESHOLDS_MS = _thresholds("JARVIS_DEGRADE_TTFT_MS", "2000,4000,8000,15000")
+TTFT_WINDOW_SECONDS = float(os.environ.get("JARVIS_DEGRADE_TTFT_WINDOW_S", "20"))
+# A level is left only once load is below this fraction of its entry thresholds...
+RECOVERY_RATIO = float(os.environ.get("JARVIS_DEGRADE_RECOVERY_RATIO", "0.5"))
+# ...and has stayed there this long; each step down waits again
+RECOVERY_SECONDS = float(os.environ.get("JARVIS_DEGRADE_RECOVERY_S", "10"))
+# max_tokens from the short_answers level on
+DEGRADED_MAX_TOKENS = int(os.environ.get("JARVIS_DEGRADE_MAX_TOKENS", "60"))
+
+BUSY_MESSAGE = "I'm handling a lot of requests right now, sir. Please try again in a moment."
+
+
+def _level_for(value, thresholds, scale):
+    """Highest level whose (scaled) threshold ``value`` reaches"""
+    if value is None:
+        return NORMAL
+    return sum(1 for threshold in thresholds if value >= threshold * scale)
+
+
+class DegradationPolicy:
+    """Chooses the service level from a LoadTracker's in-flight count and TTFT"""
+
+    def __init__(self, load, enabled=DEGRADE_ENABLED, in_flight_thresholds=IN_FLIGHT_THRESHOLDS,
+                 ttft_thresholds_ms=TTFT_THRESHOLDS_MS, recovery_ratio=RECOVERY_RATIO,
+                 recovery_seconds=RECOVERY_SECONDS, ttft_window_seconds=TTFT_WINDOW_SECONDS):
+        self.load = load
+        self.enabled = enabled
+        self.in_flight_thresholds = in_flight_thresholds
+        self.ttft_thresholds_ms = ttft_thresholds_ms
+        self.recovery_ratio = recovery_ratio
+        self.recovery_seconds = recovery_seconds
+        self.ttft_window_seconds = ttft_window_seconds
+        self._lock = threading.Lock()
+        self.level = NORMAL
+        self.changed_at = time.monotonic()
+        self._calm_since = None
+        self.transitions = 0
+        self.rejected = 0
+
+    def _signals(self):
+        in_flight = self.load.in_flight
+        if in_flight + self.load.queued == 0:
+            # Slow samples from a burst that has passed must not hold the level up
+            return in_flight, None
+        return in_flight, self.load.ttft_percentile(0.95, max_age=self.ttft_window_seconds)
+
+    def _target(self, in_flight, ttft_ms, scale=1.0):
+        return max(_level_for(in_flight, self.in_flight_thresholds, scale),
+                   _level_for(ttft_ms, self.ttft_thresholds_ms, scale))
+
+    def _set(self, level, now, in_flight, ttft_ms):
+        log = logger.warning if level > self.level else logger.info
+        log(f"🚦 Degradation {LEVEL_NAMES[self.level]} -> {LEVEL_NAMES[level]} "
+            f"(in flight {in_flight}, TTFT p95 {'-' if ttft_ms is None else f'{ttft_ms:.0f}ms'})")
+        self.level = level
+        self.changed_at = now
+        self.transitions += 1
+
+    def update(self):
+        """Re-evaluate load and return the level to serve the next request at"""
+        if not self.enabled:
+            return NORMAL
+        in_flight, ttft_ms = self._signals()
+        now = time.monotonic()
+        with self._lock:
+            target = self._target(in_flight, ttft_ms)
+            if target > self.level:
+                # Escalate straight to the level the load calls for
+                self._set(target, now, in_flight, ttft_ms)
+                self._calm_since = None
+            elif self.level > NORMAL and self._target(in_flight, ttft_ms, self.recovery_ratio) < self.level:
+                # Recover one level at a time, each after a calm period
+                if self._calm_since is None:
+                    self._calm_since = now
+                elif now - self._calm_since >= self.recovery_seconds:
+                    self._set(self.level - 1, now, in_flight, ttft_ms)
+                    self._calm_since = now
+            else:
+                self._calm_since = None
+            return self.level
+
+    def record_rejection(self):
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self):
+        level = self.update()
+        in_flight, ttft_ms = self._signals()
+        return {
+            "enabled": self.enabled,
+            "level": level,
+            "name": LEVEL_NAMES[level],
+            "for_s": round(time.monotonic() - self.changed_at, 1),
+            "transitions": self.transitions,
+            "rejected": self.rejected,
+            "in_flight": in_flight,
+            "ttft_ms_p95": None if ttft_ms is None else round(ttft_ms, 1),
+            "in_flight_thresholds": self.in_flight_thresholds,
+            "ttft_thresholds_ms": self.ttft_thresholds_ms,
+        }
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+JARVIS Device Probe
+Torch-free CUDA detection through the NVIDIA driver library, so deciding
+where to load the model doesn't cost a multi-second torch import
+"""
+
+import os
+import ctypes
+import logging
+from functools import lru_cache
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Force CPU mode (skips the probe entirely)
+FORCE_CPU = os.environ.get("JARVIS_FORCE_CPU", "0") == "1"
+
+CUDA_SUCCESS = 0
+
+
+def _load_driver():
+    names = ["nvcuda.dll"] if os.name == "nt" else ["libcuda.so.1", "libcuda.so", "libcuda.dylib"]
+    for name in names:
+        try:
+            return ctypes.CDLL(name)
+        except OSError:
+            continue
+    return None
+
+
+@lru_cache(maxsize=1)
+def cuda_devices():
+    """List of {"index", "name", "memory_bytes"} for each visible CUDA device"""
+    if FORCE_CPU:
+        logger.info("ℹ️ JARVIS_FORCE_CPU set, skipping CUDA probe")
+        return []
+
+    driver = _load_driver()
+    if driver is None:
+        return []
+
+    try:
+        if driver.cuInit(0) != CUDA_SUCCESS:
+            return []
+        count = ctypes.c_int()
+        if driver.cuDeviceGetCount(ctypes.byref(count)) != CUDA_SUCCESS:
+            return []
+
+        devices = []
+        for index in range(count.value):
+            device = ctypes.c_int()
+            if driver.cuDeviceGet(ctypes.byref(device), index) != CUDA_SUCCESS:
+                continue
+            name = ctypes.create_string_buffer(256)
+            driver.cuDeviceGetName(name, len(name), device)
+            memory = ctypes.c_size_t()
+            total_mem = getattr(driver, "cuDeviceTotalMem_v2", None) or driver.cuDeviceTotalMem
+            total_mem(ctypes.byref(memory), device)
+            devices.append({
+                "index": index,
+                "name": name.value.decode(errors="replace"),
+                "memory_bytes": memory.value,
+            })
+        return devices
+    except Exception as e:
+        logger.warning(f"⚠️ CUDA probe failed: {e}")
+        return []
+
+
+def cuda_available():
+    return bool(cuda_devices())
+
+
+if __name__ == "__main__":
+    devices = cuda_devices()
+    if not devices:
+        print("💻 No CUDA devices found")
+    for device in devices:
+        print(f"🎮 GPU {device['index']}: {device['name']} ({device['memory_bytes'] / 1e9:.1f}GB)")
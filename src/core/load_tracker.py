@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+JARVIS Load Tracking
+In-flight generations, queue depth at the model lock and recent time to
+first token, reported through /api/status for routers and load shedding
+"""
+
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+# Recent time-to-first-token samples kept for percentiles
+TTFT_WINDOW = 64
+
+
+# Samples older than this no longer describe current load
+TTFT_MAX_AGE = 60.0
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class LoadTracker:
+    """Thread-safe counters describing how busy this instance is"""
+
+    def __init__(self, ttft_window=TTFT_WINDOW):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.queued = 0
+        self.served = 0
+        self._ttft_ms = deque(maxlen=ttft_window)
+
+    def track(self, events):
+        """Count a generation as in flight until it finishes or nobody is left to read it"""
+        with self._lock:
+            self.in_flight += 1
+        try:
+            yield from events
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.served += 1
+
+    @contextmanager
+    def waiting(self):
+        """Count a generation as queued while it waits for the model"""
+        with self._lock:
+            self.queued += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.queued -= 1
+
+    def record_ttft(self, started_at):
+        """Record time to first token for a generation that began at ``started_at`` (perf_counter)"""
+        with self._lock:
+            self._ttft_ms.append((time.monotonic(), (time.perf_counter() - started_at) * 1000))
+
+    def ttft_percentile(self, fraction, max_age=TTFT_MAX_AGE):
+        """TTFT percentile (ms) over recent samples, or None if there are none"""
+        cutoff = time.monotonic() - max_age
+        with self._lock:
+            samples = [ms for at, ms in self._ttft_ms if at >= cutoff]
+        return _percentile(samples, fraction)
+
+    def snapshot(self):
+        with self._lock:
+            in_flight, queued, served = self.in_flight, self.queued, self.served
+        p50 = self.ttft_percentile(0.5)
+        p95 = self.ttft_percentile(0.95)
+        return {
+            "in_flight": in_flight,
+            "queued": queued,
+            "requests_served": served,
+            "ttft_ms_p50": None if p50 is None else round(p50, 1),
+            "ttft_ms_p95": None if p95 is None else round(p95, 1),
+        }
+
+
+request_load = LoadTracker()
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+JARVIS Long-Term Memory
+Past exchanges embedded into a float16 memory-mapped ring, retrieved by cosine
+similarity and injected into the prompt under a strict token budget
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import logging
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MEMORY_DIR = Path(os.environ.get("JARVIS_MEMORY_DIR", Path(__file__).parent.parent.parent / "memory"))
+# Maximum memories kept; the oldest are overwritten once full
+MEMORY_CAPACITY = int(os.environ.get("JARVIS_MEMORY_CAPACITY", "100000"))
+# Prompt tokens allowed for injected memories
+MEMORY_TOKEN_BUDGET = int(os.environ.get("JARVIS_MEMORY_TOKENS", "120"))
+MEMORY_TOP_K = int(os.environ.get("JARVIS_MEMORY_TOP_K", "3"))
+# Cosine similarity below which a memory is not relevant (tuned for the hashing embedder)
+MEMORY_MIN_SCORE = float(os.environ.get("JARVIS_MEMORY_MIN_SCORE", "0.25"))
+# Optional GGUF embedding model; the hashing embedder is used otherwise
+MEMORY_EMBED_MODEL = os.environ.get("JARVIS_MEMORY_EMBED_MODEL", "")
+
+TEXT_BYTES = 512              # Fixed-width UTF-8 slot per memory
+SEARCH_CHUNK = 65536          # Rows converted to float32 at a time during search
+SKETCH_CANDIDATES = int(os.environ.get("JARVIS_MEMORY_CANDIDATES", "1024"))
+# From this size, candidates come from the sign-bit sketch instead of a full
+# scan; below it the sketch would convert half the rows anyway
+SKETCH_MIN_SIZE = 2 * SKETCH_CANDIDATES
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _hamming(rows, query):
+    """Bit differences between each packed-bit row and the packed query"""
+    if hasattr(np, "bitwise_count"):
+        if rows.shape[1] % 8 == 0:   # Eight bytes at a time when the width allows
+            rows, query = rows.view(np.uint64), query.view(np.uint64)
+        return np.bitwise_count(rows ^ query).sum(axis=1, dtype=np.uint32)
+    return _POPCOUNT[rows ^ query].sum(axis=1, dtype=np.uint32)
+
+
+STOPWORDS = {
+    "an", "the", "is", "are", "was", "were", "be", "been", "to", "of", "and", "or", "in", "on",
+    "at", "for", "with", "it", "its", "this", "that", "what", "which", "who", "where", "when",
+    "how", "why", "do", "does", "did", "you", "me", "my", "your", "we", "our", "can", "could",
+    "would", "will", "should", "have", "has", "had", "there", "then", "just", "like", "some",
+    "any", "please", "sir", "jarvis", "tell", "about", "noted", "okay", "yes", "not",
+}
+
+
+class HashingEmbedder:
+    """Feature-hashed words, word pairs and character n-grams; no model required"""
+
+    def __init__(self, dim=256):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text):
+        words = [w for w in re.findall(r"\w+", text.lower()) if len(w) > 1 and w not in STOPWORDS]
+        for word in words:
+            yield word, 1.0
+            padded = f"<{word}>"
+            for i in range(len(padded) - 3):
+                yield "#" + padded[i:i + 4], 0.3   # Tolerates plurals and typos
+        for first, second in zip(words, words[1:]):
+            yield first + " " + second, 0.5
+
+    def embed(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, weight in self._features(text):
+            h = zlib.crc32(feature.encode("utf-8"))
+            vector[h % self.dim] += weight if h & 0x80000000 else -weight
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class LlamaEmbedder:
+    """Embeddings from a GGUF embedding model through llama-cpp-python"""
+
+    def __init__(self, model_path):
+        from llama_cpp import Llama
+
+        self.model = Llama(model_path=model_path, embedding=True, n_ctx=512, verbose=False)
+        self.name = f"llama-{Path(model_path).stem}"
+        self.dim = len(self.model.embed("dimension probe"))
+
+    def embed(self, text):
+        vector = np.asarray(self.model.embed(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+class MemoryStore:
+    """Bounded, append-only ring of (vector, text) pairs on disk"""
+
+    def __init__(self, directory=MEMORY_DIR, embedder=None, capacity=MEMORY_CAPACITY):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.embedder = embedder or HashingEmbedder()
+        self._lock = threading.Lock()
+        self._meta_path = self.directory / "meta.json"
+
+        meta = {}
+        if self._meta_path.exists():
+            meta = json.loads(self._meta_path.read_text(encoding="utf-8"))
+            if meta.get("embedder") != self.embedder.name or meta.get("dim") != self.embedder.dim:
+                raise ValueError(f"Memory in {self.directory} was built with {meta.get('embedder')}, "
+                                 f"not {self.embedder.name}; use another JARVIS_MEMORY_DIR")
+            capacity = meta["capacity"]   # The files were sized for this
+        self.capacity = capacity
+        self.dim = self.embedder.dim
+        # Total memories ever written; slot = index % capacity
+        self.count = meta.get("count", 0)
+
+        mode = "r+" if meta else "w+"
+        self.vectors = np.memmap(self.directory / "vectors.f16", dtype=np.float16, mode=mode,
+                                 shape=(self.capacity, self.dim))
+        self.texts = np.memmap(self.directory / "texts.bin", dtype=f"S{TEXT_BYTES}", mode=mode,
+                               shape=(self.capacity,))
+        # One sign bit per dimension: a 16x smaller copy for candidate generation
+        self.signs = np.memmap(self.directory / "signs.bin", dtype=np.uint8, mode=mode,
+                               shape=(self.capacity, (self.dim + 7) // 8))
+        if not meta:
+            self._write_meta()
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def _write_meta(self):
+        meta = {"embedder": self.embedder.name, "dim": self.dim, "capacity": self.capacity,
+                "count": self.count, "updated": time.time()}
+        tmp = self._meta_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp, self._meta_path)
+
+    @staticmethod
+    def _encode_text(text):
+        data = text.encode("utf-8")[:TEXT_BYTES]
+        return data.decode("utf-8", errors="ignore").encode("utf-8")   # Don't split a character
+
+    def append_many(self, vectors, texts):
+        """Write normalized vectors and their texts, evicting the oldest when full"""
+        with self._lock:
+            for offset in range(0, len(texts), self.capacity):
+                batch_vectors = vectors[offset:offset + self.capacity]
+                batch_texts = texts[offset:offset + self.capacity]
+                slots = (self.count + np.arange(len(batch_texts))) % self.capacity
+                self.vectors[slots] = batch_vectors.astype(np.float16)
+                self.signs[slots] = np.packbits(batch_vectors > 0, axis=1)
+                self.texts[slots] = [self._encode_text(t) for t in batch_texts]
+                self.count += len(batch_texts)
+            # Data first, then the count: while the ring is filling, a crash loses the
+            # new entries but never exposes them. Once it has wrapped, the slots being
+            # overwritten are already visible, so a crash mid-write can leave one
+            # pairing a new vector with old text until it is overwritten again.
+            self.vectors.flush()
+            self.signs.flush()
+            self.texts.flush()
+            self._write_meta()
+
+    def remember(self, message, response):
+        """Store one exchange"""
+        message, response = " ".join(message.split()), " ".join(response.split())
+        # Embed the content only; the speaker labels would match every memory
+        vector = self.embedder.embed(f"{message} {response}")
+        self.append_many(vector[None, :], [f"User: {message}\nJARVIS: {response}"])
+
+    def _scan(self, q, size, k):
+        """Exact top-k over every stored vector"""
+        scores_parts, index_parts = [], []
+        for start in range(0, size, SEARCH_CHUNK):
+            block = np.asarray(self.vectors[start:start + SEARCH_CHUNK], dtype=np.float32)
+            scores = block @ q
+            top = np.argpartition(scores, -k)[-k:] if len(scores) > k else np.arange(len(scores))
+            scores_parts.append(scores[top])
+            index_parts.append(top + start)
+        return np.concatenate(scores_parts), np.concatenate(index_parts)
+
+    def _sketch(self, q, size, candidates):
+        """Rerank the vectors whose sign bits best match the query's
+
+        float16 rows must be converted before numpy can multiply them, which
+        dominates a full scan; the packed signs are compared with XOR and
+        popcount instead, and only the closest candidates are converted.
+        """
+        query_bits = np.packbits(q > 0)
+        distance_parts, index_parts = [], []
+        for start in range(0, size, SEARCH_CHUNK * 4):
+            distances = _hamming(self.signs[start:start + SEARCH_CHUNK * 4], query_bits)
+            n = min(candidates, len(distances))
+            top = np.argpartition(distances, n - 1)[:n] if len(distances) > n else np.arange(len(distances))
+            distance_parts.append(distances[top])
+            index_parts.append(top + start)
+        distances = np.concatenate(distance_parts)
+        indices = np.concatenate(index_parts)
+        if len(indices) > candidates:
+            indices = indices[np.argpartition(distances, candidates - 1)[:candidates]]
+        indices.sort()   # Sequential reads from the memory map
+        scores = np.asarray(self.vectors[indices], dtype=np.float32) @ q
+        return scores, indices
+
+    def search(self, query, k=MEMORY_TOP_K, min_score=MEMORY_MIN_SCORE, exact=None):
+        """[(score, text)] of the ``k`` most similar memories, best first"""
+        q = self.embedder.embed(query) if isinstance(query, str) else query
+        # append_many rewrites slots in place; don't read one half-updated
+        with self._lock:
+            size = len(self)
+            if size == 0:
+                return []
+            if exact is None:
+                exact = size < SKETCH_MIN_SIZE
+            scores, indices = self._scan(q, size, k) if exact else self._sketch(q, size, max(k, SKETCH_CANDIDATES))
+            order = np.argsort(-scores)[:k]
+            return [(float(scores[i]), self.texts[indices[i]].decode("utf-8", errors="ignore"))
+                    for i in order if scores[i] >= min_score]
+
+    def context_for(self, message, count_tokens, token_budget=MEMORY_TOKEN_BUDGET, k=MEMORY_TOP_K):
+        """Prompt block of the most relevant memories that fits in ``token_budget`` tokens"""
+        header = "Things you remember from earlier conversations:"
+        used = count_tokens(header)
+        lines = []
+        for _, text in self.search(message, k):
+            line = "- " + text.replace("\n", " | ")
+            cost = count_tokens(line)
+            if used + cost > token_budget:
+                continue   # A shorter, less relevant memory may still fit
+            lines.append(line)
+            used += cost
+        return "\n".join([header] + lines) if lines else ""
+
+    def stats(self):
+        return {
+            "memories": len(self),
+            "capacity": self.capacity,
+            "evicted": max(0, self.count - self.capacity),
+            "embedder": self.embedder.name,
+            "disk_bytes": self.capacity * (self.dim * 2 + (self.dim + 7) // 8 + TEXT_BYTES),
+        }
+
+
+# Global memory store
+memory_store = None
+
+def initialize_memory():
+    """Open (or create) the memory store"""
+    global memory_store
+
+    try:
+        embedder = LlamaEmbedder(MEMORY_EMBED_MODEL) if MEMORY_EMBED_MODEL else HashingEmbedder()
+        memory_store = MemoryStore(MEMORY_DIR, embedder)
+        logger.info(f"🧠 Memory ready: {len(memory_store)} memories in {MEMORY_DIR}")
+        return memory_store
+    except Exception as e:
+        logger.error(f"❌ Failed to open memory store: {e}")
+        return None
+
+
+def benchmark(sizes, queries=200, dim=256, k=MEMORY_TOP_K):
+    """Retrieval latency at each store size
+
+    Stores hold random unit vectors; each query is a noisy copy of one of
+    them (cosine ~0.8), and recall is how often that memory comes back.
+    """
+    rng = np.random.default_rng(0)
+    for size in sizes:
+        with tempfile.TemporaryDirectory(prefix="jarvis_memory_bench_") as directory:
+            store = MemoryStore(directory, HashingEmbedder(dim), capacity=size)
+            start = time.perf_counter()
+            for offset in range(0, size, 100000):
+                rows = min(100000, size - offset)
+                vectors = rng.standard_normal((rows, dim)).astype(np.float32)
+                vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+                store.append_many(vectors, [f"memory {offset + i}" for i in range(rows)])
+            fill_seconds = time.perf_counter() - start
+
+            targets = rng.integers(0, size, queries)
+            probes = np.asarray(store.vectors[np.sort(targets)], dtype=np.float32)
+            targets = np.sort(targets)
+            probes += rng.standard_normal(probes.shape).astype(np.float32) * 0.75 / np.sqrt(dim)
+            probes /= np.linalg.norm(probes, axis=1, keepdims=True)
+
+            print(f"📊 {size:>9,} memories | {store.stats()['disk_bytes'] / 1e6:7.1f} MB | "
+                  f"fill {size / fill_seconds:>9,.0f}/s")
+            for label, exact in (("exact scan", True), ("sign sketch", False)):
+                store.search(probes[0], k, min_score=-1.0, exact=exact)   # Warm the page cache
+                latencies, hits = [], 0
+                for probe, target in zip(probes, targets):
+                    start = time.perf_counter()
+                    results = store.search(probe, k, min_score=-1.0, exact=exact)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    hits += any(text == f"memory {target}" for _, text in results)
+                latencies.sort()
+                used = " (used at this size)" if exact == (size < SKETCH_MIN_SIZE) else ""
+                print(f"   {label:<12} p50 {latencies[len(latencies) // 2]:8.2f} ms  "
+                      f"p99 {latencies[int(len(latencies) * 0.99)]:8.2f} ms  recall@{k} {hits / len(probes):.3f}{used}")
+            del store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JARVIS long-term memory tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    search = sub.add_parser("search", help="Show the memories retrieved for a message")
+    search.add_argument("query")
+    search.add_argument("-k", type=int, default=MEMORY_TOP_K)
+    sub.add_parser("stats", help="Show store size and capacity")
+    bench = sub.add_parser("bench", help="Benchmark retrieval latency")
+    bench.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    bench.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        benchmark(args.sizes, args.queries)
+        return
+
+    store = initialize_memory()
+    if store is None:
+        sys.exit(1)
+    if args.command == "stats":
+        print(json.dumps(store.stats(), indent=2))
+    else:
+        for score, text in store.search(args.query, args.k, min_score=-1.0):
+            print(f"{score:6.3f}  {text}")
+
+
+if __name__ == "__main__":
+    main()
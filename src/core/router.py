@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+JARVIS Router
+Health-aware load balancer in front of several server.py instances: polls
+each backend's /api/status, proxies requests with streaming passthrough,
+and ejects and retries around failing nodes
+"""
+
+import os
+import sys
+import time
+import uuid
+import random
+import hashlib
+import logging
+import argparse
+import threading
+import subprocess
+from http.cookiejar import DefaultCookiePolicy
+from pathlib import Path
+import requests
+from requests.adapters import HTTPAdapter
+from flask import Flask, request, jsonify, Response
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Comma-separated backend base URLs
+ROUTER_BACKENDS = os.environ.get("JARVIS_BACKENDS", "http://localhost:5001,http://localhost:5002")
+# "least_loaded" or "affinity" (sticky per session)
+ROUTER_POLICY = os.environ.get("JARVIS_ROUTER_POLICY", "least_loaded")
+POLL_INTERVAL = float(os.environ.get("JARVIS_ROUTER_POLL", "1.0"))
+# Consecutive failures before a backend is ejected, and the base ejection time
+EJECT_AFTER_FAILURES = 3
+EJECT_SECONDS = 5.0
+MAX_EJECT_SECONDS = 60.0
+
+CONNECT_TIMEOUT = 2.0
+READ_TIMEOUT = 300.0
+# A busy backend answers /api/status late, but it should still answer
+POLL_READ_TIMEOUT = 5.0
+# Upstream keep-alive connections kept per backend
+POOL_CONNECTIONS = 64
+# Bodies up to this size are buffered so they can be replayed on another
+# backend; larger ones (audio uploads) stream straight through
+BUFFER_BODY_LIMIT = 1024 * 1024
+SESSION_COOKIE = "jarvis_session"
+
+# Worth retrying on another backend; nothing has reached the client yet
+RETRYABLE_STATUS = {502, 503, 504}
+
+HOP_BY_HOP = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailers", "transfer-encoding", "upgrade", "host", "content-length", "server", "date",
+}
+
+
+class Backend:
+    """One JARVIS instance and what the router knows about it"""
+
+    def __init__(self, url):
+        self.url = url.rstrip("/")
+        self.healthy = False
+        self.ready = False
+        self.remote_in_flight = 0
+        self.remote_queued = 0
+        self.local_in_flight = 0
+        self.failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+        self.poll_ms = None
+        self.proxied = 0
+        self.last_error = None
+
+    def load(self):
+        # The polled figure is up to POLL_INTERVAL stale; our own open streams are not
+        return max(self.remote_in_flight, self.local_in_flight) + self.remote_queued
+
+    def available(self, now=None):
+        return self.healthy and self.ready and (now or time.time()) >= self.ejected_until
+
+    def describe(self):
+        return {
+            "url": self.url,
+            "available": self.available(),
+            "healthy": self.healthy,
+            "ready": self.ready,
+            "load": self.load(),
+            "remote_in_flight": self.remote_in_flight,
+            "remote_queued": self.remote_queued,
+            "local_in_flight": self.local_in_flight,
+            "failures": self.failures,
+            "ejections": self.ejections,
+            "ejected_for_s": round(max(0.0, self.ejected_until - time.time()), 1),
+            "poll_ms": self.poll_ms,
+            "proxied": self.proxied,
+            "last_error": self.last_error,
+        }
+
+
+class BackendPool:
+    """Health polling, backend selection and ejection"""
+
+    def __init__(self, urls, policy=ROUTER_POLICY, poll_interval=POLL_INTERVAL):
+        self.backends = [Backend(url) for url in urls]
+        self.policy = policy
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._session = requests.Session()
+        self._session.mount("http://", HTTPAdapter(pool_maxsize=POOL_CONNECTIONS))
+        self._session.mount("https://", HTTPAdapter(pool_maxsize=POOL_CONNECTIONS))
+        # One session serves every client; never replay one client's cookies for another
+        self._session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+    def start(self):
+        self.poll_once()
+        self._thread = threading.Thread(target=self._poll_loop, daemon=True, name="router-poll")
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _poll_loop(self):
+        while not self._stop.wait(self.poll_interval):
+            self.poll_once()
+
+    def poll_once(self):
+        for backend in self.backends:
+            started = time.perf_counter()
+            try:
+                response = self._session.get(f"{backend.url}/api/status",
+                                             timeout=(CONNECT_TIMEOUT, POLL_READ_TIMEOUT))
+                response.raise_for_status()
+                status = response.json()
+            except Exception as e:
+                self.mark_failure(backend, f"status poll: {e}")
+                continue
+            load = status.get("load", {})
+            with self._lock:
+                backend.poll_ms = round((time.perf_counter() - started) * 1000, 1)
+                backend.ready = bool(status.get("ready", status.get("model_status") == "loaded"))
+                backend.remote_in_flight = load.get("in_flight", 0)
+                backend.remote_queued = load.get("queued", 0)
+                if not backend.healthy:
+                    logger.info(f"✅ Backend {backend.url} is up (ready: {backend.ready})")
+                backend.healthy = True
+                # A successful poll does not lift an ejection early; it only resets the count
+                backend.failures = 0
+
+    def mark_failure(self, backend, error):
+        with self._lock:
+            backend.failures += 1
+            backend.last_error = str(error)[:200]
+            logger.warning(f"⚠️ Backend {backend.url} failed ({backend.failures}x): {backend.last_error}")
+            # One slow poll or dropped connection is not an outage
+            if backend.failures < EJECT_AFTER_FAILURES:
+                return
+            backend.healthy = False
+            if time.time() >= backend.ejected_until:
+                backend.ejections += 1
+                # Exponential backoff for backends that keep failing after readmission
+                seconds = min(MAX_EJECT_SECONDS, EJECT_SECONDS * 2 ** (backend.ejections - 1))
+                backend.ejected_until = time.time() + seconds
+                logger.warning(f"🚫 Ejected {backend.url} for {seconds:.0f}s")
+
+    def choose(self, session_key=None, exclude=()):
+        """Pick a backend, or None if no instance can take the request"""
+        now = time.time()
+        with self._lock:
+            candidates = [b for b in self.backends if b.available(now) and b not in exclude]
+            if not candidates:
+                return None
+            if session_key is not None:
+                # Rendezvous hashing: a session stays on its backend, and only the
+                # sessions of an ejected backend move elsewhere
+                return max(candidates, key=lambda b: hashlib.sha256(f"{session_key}|{b.url}".encode()).digest())
+            lowest = min(b.load() for b in candidates)
+            return random.choice([b for b in candidates if b.load() == lowest])
+
+    def send(self, backend, method, path, **kwargs):
+        """Open a streaming request to ``backend`` over the pooled keep-alive connections"""
+        return self._session.request(method, f"{backend.url}/{path}", stream=True, allow_redirects=False,
+                                     timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), **kwargs)
+
+    def acquire(self, backend):
+        with self._lock:
+            backend.local_in_flight += 1
+            backend.proxied += 1
+
+    def release(self, backend):
+        with self._lock:
+            backend.local_in_flight -= 1
+
+    def stats(self):
+        with self._lock:
+            backends = [b.describe() for b in self.backends]
+        return {
+            "policy": self.policy,
+            "available": sum(1 for b in backends if b["available"]),
+            "backends": backends,
+        }
+
+
+app = Flask(__name__)
+pool = None
+
+
+def session_key():
+    """Client identity for affinity: explicit header, then the router's cookie"""
+    return request.headers.get("X-Session-Id") or request.cookies.get(SESSION_COOKIE)
+
+
+class _BodyStream:
+    """The client's request body, read as it is sent upstream
+
+    ``len`` lets requests send a Content-Length instead of chunking.
+    """
+
+    def __init__(self, stream, length):
+        self._stream = stream
+        self.len = length
+
+    def read(self, size=-1):
+        return self._stream.read(size)
+
+
+def _forward_headers():
+    return {k: v for k, v in request.headers.items() if k.lower() not in HOP_BY_HOP}
+
+
+def _relay(upstream, backend):
+    """Pass upstream bytes through unchanged (no re-compression) as they arrive"""
+    try:
+        for chunk in upstream.raw.stream(65536, decode_content=False):
+            yield chunk
+    except Exception as e:
+        pool.mark_failure(backend, f"stream broke: {e}")
+        logger.error(f"❌ Stream from {backend.url} broke mid-response: {e}")
+    finally:
+        upstream.close()
+        pool.release(backend)
+
+
+def proxy(path, sticky, key=None):
+    """Forward the current request, retrying on other backends until one answers"""
+    headers = _forward_headers()
+    length = request.content_length
+    replayable = length is None or length <= BUFFER_BODY_LIMIT
+    body = request.get_data() if replayable else _BodyStream(request.stream, length)
+    key = key if sticky or pool.policy == "affinity" else None
+    tried = []
+    busy = False
+
+    while True:
+        backend = pool.choose(key, exclude=tried)
+        if backend is None:
+            return jsonify({
+                "success": False,
+                "error": "All JARVIS instances are busy" if busy else "No healthy JARVIS instances available",
+                "tried": [b.url for b in tried]
+            }), 503
+        tried.append(backend)
+
+        try:
+            upstream = pool.send(backend, request.method, path, params=request.args, data=body, headers=headers)
+        except requests.RequestException as e:
+            pool.mark_failure(backend, e)
+            # Sticky state (a Whisper recording) lives on one backend, and a
+            # streamed body is already partly consumed; don't replay either elsewhere
+            if sticky or not replayable:
+                return jsonify({"success": False, "error": f"Backend unavailable: {e}"}), 502
+            continue
+
+        if upstream.status_code in RETRYABLE_STATUS and not sticky and replayable:
+            logger.warning(f"⚠️ {backend.url} answered {upstream.status_code}, retrying elsewhere")
+            upstream.close()
+            busy = True
+            continue
+
+        pool.acquire(backend)
+        response_headers = [(k, v) for k, v in upstream.headers.items() if k.lower() not in HOP_BY_HOP]
+        response_headers.append(("X-Jarvis-Backend", backend.url))
+        return Response(_relay(upstream, backend), status=upstream.status_code, headers=response_headers)
+
+
+@app.route('/api/router/status')
+def api_router_status():
+    """Backend health, load and ejection state"""
+    return jsonify(pool.stats())
+
+
+@app.route('/', defaults={'path': ''}, methods=['GET', 'POST', 'PUT', 'DELETE'])
+@app.route('/<path:path>', methods=['GET', 'POST', 'PUT', 'DELETE'])
+def api_proxy(path):
+    """Route everything else; Whisper calls stay on the backend holding the recording"""
+    # A new client's session is minted before routing, so the request that sets
+    # the cookie lands where the requests carrying it will
+    key = session_key()
+    new_session = None if key else uuid.uuid4().hex
+    response = proxy(path, sticky=path.startswith("api/whisper/"), key=key or new_session)
+    if new_session and isinstance(response, Response):
+        response.set_cookie(SESSION_COOKIE, new_session, httponly=True, samesite="Lax")
+    return response
+
+
+def spawn_stub_instances(count, base_port):
+    """Launch ``count`` local server.py instances serving the stub model"""
+    server_path = Path(__file__).parent / "server.py"
+    processes, urls = [], []
+    for index in range(count):
+        port = base_port + index
+        env = dict(os.environ, JARVIS_STUB_MODEL="1", JARVIS_PORT=str(port), JARVIS_HOST="127.0.0.1")
+        processes.append(subprocess.Popen([sys.executable, str(server_path)], env=env,
+                                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+        urls.append(f"http://127.0.0.1:{port}")
+        print(f"🧪 Stub instance on port {port} (pid {processes[-1].pid})")
+    return processes, urls
+
+
+def main():
+    global pool
+
+    parser = argparse.ArgumentParser(description="Load-balance requests across JARVIS instances")
+    parser.add_argument("--backends", default=ROUTER_BACKENDS, help="Comma-separated backend URLs (JARVIS_BACKENDS)")
+    parser.add_argument("--policy", choices=["least_loaded", "affinity"], default=ROUTER_POLICY)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("JARVIS_ROUTER_PORT", "8000")))
+    parser.add_argument("--spawn-stubs", type=int, default=0, metavar="N",
+                        help="Start N local stub-model instances and route to them")
+    parser.add_argument("--stub-base-port", type=int, default=5001)
+    args = parser.parse_args()
+
+    processes = []
+    urls = [url.strip() for url in args.backends.split(",") if url.strip()]
+    if args.spawn_stubs:
+        processes, urls = spawn_stub_instances(args.spawn_stubs, args.stub_base_port)
+        time.sleep(2.0)  # Let them bind before the first poll
+
+    pool = BackendPool(urls, policy=args.policy)
+    pool.start()
+
+    print("\n" + "=" * 60)
+    print("🔀 JARVIS ROUTER")
+    print("=" * 60)
+    print(f"   Policy:         {args.policy}")
+    for backend in pool.backends:
+        state = "✅ ready" if backend.available() else "⏳ waiting"
+        print(f"   Backend:        {backend.url} ({state})")
+    print(f"   Listening:      http://localhost:{args.port}/")
+    print(f"   Status:         http://localhost:{args.port}/api/router/status")
+    print("=" * 60)
+
+    from starlette.applications import Starlette
+    from starlette.middleware.wsgi import WSGIMiddleware
+    import uvicorn
+
+    asgi_app = Starlette()
+    asgi_app.mount("/", WSGIMiddleware(app))
+    try:
+        uvicorn.run(asgi_app, host=args.host, port=args.port, log_level="info")
+    finally:
+        pool.stop()
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+JARVIS Sentence Budget
+Sentence boundary detection for streamed text and early stopping once a
+response has said enough
+"""
+
+import os
+import threading
+
+# Sentences allowed per response before generation is cut (0 disables)
+SENTENCE_BUDGET = int(os.environ.get("JARVIS_SENTENCE_BUDGET", "3"))
+
+# Latin terminators plus the Devanagari danda and double danda used in Hindi
+SENTENCE_ENDINGS = ".!?।॥"
+# Unambiguous: Hindi text often runs straight on after a danda without a space
+DANDAS = "।॥"
+CLOSING_MARKS = "\"'”’)]»"
+
+# Words whose trailing period does not end a sentence
+ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "vs",
+    "approx", "dept", "fig", "inc", "ltd", "co", "corp", "jan", "feb", "mar",
+    "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec",
+    "e.g", "i.e", "u.s", "u.k", "a.m", "p.m", "ph.d",
+}
+
+
+def _word_before(text, i):
+    start = i
+    while start > 0 and not text[start - 1].isspace():
+        start -= 1
+    return text[start:i].lstrip("\"'“‘([")
+
+
+def _next_visible(text, j):
+    """Index of the first non-space character at or after ``j``, or None if not streamed yet"""
+    while j < len(text) and text[j].isspace():
+        j += 1
+    return j if j < len(text) else None
+
+
+def is_sentence_end(text, i, sentence_start=0):
+    """Decide whether the terminator at ``text[i]`` ends a sentence
+
+    Returns True or False, or None when the answer depends on text that has
+    not streamed in yet.
+    """
+    ch = text[i]
+    if ch not in SENTENCE_ENDINGS:
+        return False
+
+    # Skip over repeated terminators ("?!", "...") and closing quotes/brackets
+    j = i + 1
+    while j < len(text) and (text[j] in SENTENCE_ENDINGS or text[j] in CLOSING_MARKS):
+        if text[j] in SENTENCE_ENDINGS:
+            return False  # Decide at the last terminator of the run
+        j += 1
+    if j >= len(text):
+        return None
+    if ch in DANDAS:
+        return True
+    if not text[j].isspace():
+        return False  # "3.14", "v2.0", "example.com"
+
+    if ch == ".":
+        word = _word_before(text, i)
+        lowered = word.lower()
+        if lowered in ABBREVIATIONS:
+            return False
+        # "No. 5" abbreviates "number"; "The answer is no. Really." ends a sentence
+        if lowered == "no":
+            k = _next_visible(text, j)
+            return None if k is None else not text[k].isdigit()
+        # Initials such as "J. R. R. Tolkien"
+        if len(word) == 1 and word.isalpha() and word.isupper():
+            return False
+        # List numbering at the start of a sentence: "1. First step"
+        if word.isdigit() and not text[sentence_start:i - len(word)].strip():
+            return False
+        # Ellipsis only ends a sentence if the next word is capitalised
+        if i >= 2 and text[i - 2:i] == "..":
+            k = j
+            while k < len(text) and text[k].isspace():
+                k += 1
+            if k >= len(text):
+                return None
+            return text[k].isupper()
+    return True
+
+
+class SentenceCounter:
+    """Count completed sentences in a token stream"""
+
+    def __init__(self, budget=SENTENCE_BUDGET):
+        self.budget = budget
+        self.text = ""
+        self.count = 0
+        self._scan_from = 0
+        self._sentence_start = 0
+
+    def _advance(self):
+        """Yield the end offset (exclusive) of each newly completed sentence"""
+        i = self._scan_from
+        while i < len(self.text):
+            decision = is_sentence_end(self.text, i, self._sentence_start)
+            if decision is None:
+                break  # Need more text to decide
+            if decision:
+                end = i + 1
+                while end < len(self.text) and self.text[end] in CLOSING_MARKS:
+                    end += 1
+                self.count += 1
+                self._sentence_start = end
+                yield end
+            i += 1
+        self._scan_from = i
+
+    def sentence_ends(self, text):
+        """Add streamed text; return end offsets (into ``self.text``) of newly completed sentences"""
+        self.text += text
+        return list(self._advance())
+
+    def feed(self, text):
+        """Add streamed text; return the offset into ``text`` where the budget
+        was reached, or None if generation should continue
+        """
+        offset = len(self.text)
+        self.text += text
+        for end in self._advance():
+            if self.budget and self.count >= self.budget:
+                return max(0, end - offset)
+        return None
+
+
+class GenerationMetrics:
+    """Counters for generated tokens and tokens saved by early stopping"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.responses = 0
+        self.early_stops = 0
+        self.tokens_generated = 0
+        self.tokens_saved = 0
+
+    def record(self, tokens_generated, max_tokens, early_stopped):
+        with self._lock:
+            self.responses += 1
+            self.tokens_generated += tokens_generated
+            if early_stopped:
+                self.early_stops += 1
+                # Upper bound: the model could have run on to max_tokens
+                self.tokens_saved += max(0, max_tokens - tokens_generated)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "sentence_budget": SENTENCE_BUDGET,
+                "responses": self.responses,
+                "early_stops": self.early_stops,
+                "tokens_generated": self.tokens_generated,
+                "tokens_saved": self.tokens_saved,
+            }
+
+
+generation_metrics = GenerationMetrics()
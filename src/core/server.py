@@ -9,11 +9,12 @@ import sys
 import logging
 import time
 import json
+import shutil
+import tempfile
+import threading
+import importlib.util
 from pathlib import Path
 from flask import Flask, request, jsonify, render_template_string, send_from_directory, Response
-from flask_cors import CORS
-from starlette.applications import Starlette
-from starlette.middleware.wsgi import WSGIMiddleware
 
 # Add the project root to Python path
 project_root = Path(__file__).parent
@@ -28,11 +29,30 @@ logger = logging.getLogger(__name__)
 
 # Initialize Flask app
 app = Flask(__name__)
-CORS(app)
 
-# Wrap our Flask WSGI app into a Starlette ASGI app
-asgi_app = Starlette()
-asgi_app.mount("/", WSGIMiddleware(app))
+_asgi_app = None
+
+def create_asgi_app():
+    """Wrap our Flask WSGI app into a Starlette ASGI app (imported only when serving)"""
+    global _asgi_app
+    if _asgi_app is None:
+        from flask_cors import CORS
+        from starlette.applications import Starlette
+        from starlette.middleware.wsgi import WSGIMiddleware
+        CORS(app)
+        _asgi_app = Starlette()
+        _asgi_app.mount("/", WSGIMiddleware(app))
+    return _asgi_app
+
+def __getattr__(name):
+    # Keeps `uvicorn server:asgi_app` working without building the ASGI stack on import
+    if name == "asgi_app":
+        return create_asgi_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def _module_available(*names):
+    """Check installed packages without importing them"""
+    return all(importlib.util.find_spec(name) is not None for name in names)
 
 # Model configuration
 MODEL_PATH = None              # Will be set dynamically
@@ -49,26 +69,111 @@ speak_hindi = False
 GPU_AVAILABLE = False          # torch.cuda.is_available()
 LOADED_ON_GPU = False          # whether model loaded on GPU
 
-# Try to import llama-cpp-python
-try:
-    from llama_cpp import Llama
-    LLAMACPP_AVAILABLE = True
+# Heavy dependencies are only checked here; each is imported on first use.
+# llama_cpp loads its shared library, and whisper_stream pulls in openai-whisper and torch.
+LLAMACPP_AVAILABLE = _module_available("llama_cpp")
+if LLAMACPP_AVAILABLE:
     logger.info("✅ llama-cpp-python available")
-except ImportError:
-    LLAMACPP_AVAILABLE = False
+else:
     logger.error("❌ llama-cpp-python not available")
 
-# Try to import Whisper
-try:
-    from whisper_stream import initialize_whisper, start_whisper_recording, stop_whisper_recording, record_whisper_chunk
-    WHISPER_AVAILABLE = True
+WHISPER_AVAILABLE = _module_available("whisper", "pyaudio")
+if WHISPER_AVAILABLE:
     logger.info("✅ Whisper streaming available")
-except ImportError:
-    WHISPER_AVAILABLE = False
+else:
     logger.error("❌ Whisper streaming not available")
 
+from static_assets import static_assets, AUDIO_MAX_AGE
+from tracing import NULL_TRACE, start_trace, traced_stream, trace_recorder, sampling_profiler
+from sentence_budget import SENTENCE_BUDGET, SentenceCounter, generation_metrics
+from coalesce import COALESCE_ENABLED, coalesce_key, chat_flights
+from device_probe import cuda_devices
+from load_tracker import request_load
+from stub_model import STUB_MODEL, STUB_PREFILL_MS, STUB_TOKEN_MS, StubLlama
+from traffic_capture import traffic_recorder, describe_message
+from degradation import (DegradationPolicy, DEGRADED_MAX_TOKENS, BUSY_MESSAGE,
+                         SHORT_ANSWERS, FALLBACK_MODEL, INSTANT_ONLY)
+
+# Offline transcription uses the same Whisper package
+TRANSCRIBE_AVAILABLE = _module_available("whisper")
+if TRANSCRIBE_AVAILABLE:
+    logger.info("✅ Offline transcription available")
+else:
+    logger.error("❌ Offline transcription not available")
+
+# Directory /api/transcribe may read server-side files from; unset allows uploads only
+TRANSCRIBE_ROOT = os.environ.get("JARVIS_TRANSCRIBE_ROOT", "")
+
+from chat_batch import BATCH_DIR, batch_id_for, completed_results, read_batch, run_batch
+
+TTS_MODULE_AVAILABLE = _module_available("pyttsx3")
+if TTS_MODULE_AVAILABLE:
+    logger.info("✅ Server-side TTS streaming available")
+else:
+    logger.error("❌ Server-side TTS streaming not available")
+
+# Listening address; run several instances side by side with different JARVIS_PORT values
+HOST = os.environ.get("JARVIS_HOST", "0.0.0.0")
+PORT = int(os.environ.get("JARVIS_PORT", "5000"))
+
+# Trace export and the sampling profiler are unauthenticated; set JARVIS_DEBUG=1 to expose them
+DEBUG_ENDPOINTS = os.environ.get("JARVIS_DEBUG", "0") == "1"
+
+# Server-side TTS is opt-in: set JARVIS_TTS=1 to start the synthesis pool
+TTS_ENABLED = os.environ.get("JARVIS_TTS", "0") == "1"
+TTS_READY = False
+
+# Smaller GGUF model served instead of the main one under heavy load (optional)
+FALLBACK_MODEL_PATH = os.environ.get("JARVIS_FALLBACK_MODEL", "")
+FALLBACK_MODEL_INSTANCE = None
+
+# Long-term memory is opt-in: set JARVIS_MEMORY=1 to remember past exchanges
+MEMORY_ENABLED = os.environ.get("JARVIS_MEMORY", "0") == "1"
+MEMORY_STORE = None
+
+# Instant responses (ultra-fast, skip the model entirely)
+INSTANT_RESPONSES = {
+    "hello": "Hello, sir.",
+    "hi": "Greetings, sir.",
+    "hey": "Yes, sir?",
+    "how are you": "Systems operational, sir.",
+    "status": "All systems online.",
+    "what's up": "Standing by, sir.",
+    "who are you": "I am JARVIS, your AI assistant, sir.",
+    "who are u": "I am JARVIS, sir.",
+    "what are you": "I am JARVIS, Tony Stark's AI assistant.",
+    "your name": "I am JARVIS, sir.",
+    "introduce yourself": "I am JARVIS, your personal AI assistant.",
+    "good morning": "Good morning, sir.",
+    "good evening": "Good evening, sir.",
+    "thanks": "You're welcome, sir.",
+    "thank you": "My pleasure, sir.",
+    "what is ai": "AI is Artificial Intelligence, sir.",
+    "what is artificial intelligence": "AI is machine intelligence, sir.",
+    "help": "How may I assist you, sir?",
+    "test": "Systems operational, sir."
+}
+
+HINDI_MODE_RESPONSE = 'ठीक है सर, अब से मैं हिंदी में बात करूँगा।'
+
+def find_selected_model(base_path):
+    """Return the model the downloader last selected in ``base_path`` if it is on disk"""
+    newest = None
+    for record_path in Path(base_path).expanduser().glob("*.selection.json"):
+        try:
+            with open(record_path, encoding="utf-8") as f:
+                record = json.load(f)
+            model_file = record_path.with_name(record["file"])
+            timestamp = float(record.get("timestamp", 0))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.debug(f"Ignoring selection record {record_path}: {e}")
+            continue
+        if model_file.is_file() and (newest is None or timestamp > newest[0]):
+            newest = (timestamp, model_file)
+    return newest[1] if newest else None
+
 def find_model_file():
-    """Find available GGUF model files"""
+    """Find available GGUF model files, preferring the one the downloader selected"""
     common_paths = [
         "models/",
         "../models/",
@@ -79,6 +184,13 @@ def find_model_file():
     model_extensions = [".gguf", ".ggml"]
     model_names = ["qwen2.5", "qwen", "phi-3", "phi3", "llama", "mistral", "tinyllama"]
     
+    # models/<file>.selection.json names the model picked for this machine
+    for base_path in common_paths:
+        selected = find_selected_model(base_path)
+        if selected:
+            logger.info(f"🎯 Found selected model: {selected}")
+            return str(selected)
+    
     for base_path in common_paths:
         try:
             path = Path(base_path).expanduser()
@@ -86,7 +198,8 @@ def find_model_file():
                 for model_file in path.rglob("*"):
                     if model_file.is_file():
                         filename_lower = model_file.name.lower()
-                        if any(ext in filename_lower for ext in model_extensions):
+                        # Match the real extension so in-progress "*.gguf.part" downloads are ignored
+                        if model_file.suffix.lower() in model_extensions:
                             if any(name in filename_lower for name in model_names):
                                 logger.info(f"🎯 Found model: {model_file}")
                                 return str(model_file)
@@ -97,7 +210,13 @@ def find_model_file():
 
 def initialize_model():
     """Initialize the llama-cpp model"""
-    global MODEL_INSTANCE, MODEL_PATH
+    global MODEL_INSTANCE, MODEL_PATH, GPU_AVAILABLE, LOADED_ON_GPU
+    
+    if STUB_MODEL:
+        MODEL_INSTANCE = StubLlama()
+        MODEL_PATH = "stub"
+        logger.info("🧪 Serving the stub model (JARVIS_STUB_MODEL=1)")
+        return True
     
     if not LLAMACPP_AVAILABLE:
         logger.error("❌ Cannot initialize: llama-cpp-python not available")
@@ -112,14 +231,18 @@ def initialize_model():
         logger.info("   - https://huggingface.co/bartowski/Phi-3-mini-4k-instruct-GGUF")
         return False
     
-    # Check for CUDA (GPU) availability
-    try:
-        import torch
-        use_cuda = torch.cuda.is_available()
-        logger.info(f"ℹ️ CUDA available: {use_cuda}")
-    except ImportError:
-        use_cuda = False
-        logger.info("ℹ️ torch not installed, defaulting to CPU load")
+    import llama_cpp
+    from llama_cpp import Llama
+
+    # Check for CUDA (GPU) availability through the driver, without torch
+    devices = cuda_devices()
+    GPU_AVAILABLE = bool(devices)
+    for device in devices:
+        logger.info(f"🎮 GPU {device['index']}: {device['name']} ({device['memory_bytes'] / 1e9:.1f}GB)")
+    # A CPU-only llama.cpp build would silently ignore n_gpu_layers
+    supports_offload = getattr(llama_cpp, "llama_supports_gpu_offload", lambda: True)()
+    use_cuda = GPU_AVAILABLE and supports_offload
+    logger.info(f"ℹ️ CUDA available: {GPU_AVAILABLE}, llama.cpp GPU offload: {supports_offload}")
 
     if use_cuda:
         try:
@@ -136,6 +259,7 @@ def initialize_model():
                 f16_kv=True,            # Use fp16 for key/value cache
             )
             logger.info("✅ Model loaded successfully with GPU acceleration!")
+            LOADED_ON_GPU = True
             return True
         except Exception as gpu_e:
             logger.warning(f"⚠️ GPU load failed: {gpu_e}. Falling back to CPU...")
@@ -155,87 +279,185 @@ def initialize_model():
             f16_kv=False,           # Use fp32 for CPU compatibility
         )
         logger.info("✅ Model loaded successfully on CPU!")
+        LOADED_ON_GPU = False
         return True
     except Exception as cpu_e:
         logger.error(f"❌ CPU load failed: {cpu_e}")
         return False
 
-def chat_with_llamacpp_stream(message, system_prompt="You are JARVIS, AI assistant. Be concise, informative and witty according to question. Respond in 2-3 sentences."):
+def initialize_fallback_model():
+    """Load the smaller model used at the fallback_model degradation level"""
+    global FALLBACK_MODEL_INSTANCE
+    
+    if STUB_MODEL:
+        FALLBACK_MODEL_INSTANCE = StubLlama(name=f"{PORT}-fallback", prefill_ms=STUB_PREFILL_MS / 3,
+                                            token_ms=STUB_TOKEN_MS / 2)
+        return True
+    if not FALLBACK_MODEL_PATH:
+        return False
+    if not os.path.exists(FALLBACK_MODEL_PATH):
+        logger.error(f"❌ Fallback model not found: {FALLBACK_MODEL_PATH}")
+        return False
+    
+    from llama_cpp import Llama
+    try:
+        logger.info(f"🔥 Loading fallback model: {FALLBACK_MODEL_PATH}")
+        FALLBACK_MODEL_INSTANCE = Llama(
+            model_path=FALLBACK_MODEL_PATH,
+            n_ctx=1024,
+            n_batch=512,
+            n_threads=None,
+            n_gpu_layers=-1 if LOADED_ON_GPU else 0,   # Follow the main model's device
+            verbose=False,
+            use_mmap=True,
+            use_mlock=False,
+            f16_kv=LOADED_ON_GPU,
+        )
+        logger.info("✅ Fallback model loaded")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Fallback model load failed: {e}")
+        return False
+
+DEFAULT_SYSTEM_PROMPT = "You are JARVIS, AI assistant. Be concise, informative and witty according to question. Respond in 2-3 sentences."
+
+# Sampling parameters shared by streaming and batch generation (optimized for speed)
+GENERATION_PARAMS = {
+    "max_tokens": 150,        # Slightly longer for richer responses
+    "temperature": 0.25,      # Modest randomness for more natural output
+    "top_p": 0.92,            # Wider nucleus sampling for quality
+    "top_k": 50,              # Larger top-k for diverse yet coherent output
+    "repeat_penalty": 1.1,    # Prevent repetition
+}
+
+# Sampling parameters under load: the same sampling, shorter answers
+DEGRADED_GENERATION_PARAMS = dict(GENERATION_PARAMS, max_tokens=DEGRADED_MAX_TOKENS)
+
+# llama.cpp contexts are not thread-safe; one generation runs at a time per model
+MODEL_LOCK = threading.Lock()
+FALLBACK_MODEL_LOCK = threading.Lock()
+
+# Chat service level, stepped down as in-flight requests and TTFT climb
+degradation = DegradationPolicy(request_load)
+
+def count_tokens(text):
+    """Prompt tokens for ``text`` with the loaded model's tokenizer (estimated without one)"""
+    tokenize = getattr(MODEL_INSTANCE, "tokenize", None)
+    if tokenize is None:
+        return len(text) // 3 + 1   # Conservative for English; Hindi runs higher per char
+    return len(tokenize(text.encode("utf-8"), add_bos=False))
+
+def build_prompt(message, system_prompt=DEFAULT_SYSTEM_PROMPT, model_path=None, hindi=None):
+    """Format a chat prompt for the loaded model family, returning (prompt, stop_tokens)"""
+    # Prepare system prompt for Hindi if enabled (``hindi`` pins the mode, e.g. for a batch)
+    if speak_hindi if hindi is None else hindi:
+        system_prompt += " कृपया केवल हिंदी में उत्तर दें।"
+    
+    # Detect model type and format prompt accordingly
+    model_path = model_path or MODEL_PATH
+    model_name_lower = model_path.lower() if model_path else ""
+    
+    if "qwen" in model_name_lower:
+        # Qwen2.5 format
+        prompt = f"<|im_start|>system\n{system_prompt}<|im_end|>\n<|im_start|>user\n{message}<|im_end|>\n<|im_start|>assistant\n"
+        stop_tokens = ["<|im_end|>", "<|endoftext|>"]
+    elif "phi" in model_name_lower:
+        # Phi-3 format
+        prompt = f"<|system|>{system_prompt}<|end|><|user|>{message}<|end|><|assistant|>"
+        stop_tokens = ["<|end|>", "<|user|>", "<|system|>"]
+    else:
+        # Generic format
+        prompt = f"System: {system_prompt}\n\nUser: {message}\n\nAssistant:"
+        stop_tokens = ["\nUser:", "\nSystem:", "\n\n"]
+    
+    return prompt, stop_tokens
+
+def instant_response(message):
+    """Canned reply for a message that matches an instant-response key, else None"""
+    msg_lower = message.lower().strip()
+    return next((response for key, response in INSTANT_RESPONSES.items() if key in msg_lower), None)
+
+def chat_with_llamacpp_stream(message, system_prompt=DEFAULT_SYSTEM_PROMPT, trace=NULL_TRACE, sentence_budget=SENTENCE_BUDGET,
+                              params=GENERATION_PARAMS, use_fallback_model=False, use_memory=True, hindi=None):
     """Stream chat responses from llama-cpp-python - OPTIMIZED FOR SPEED"""
-    global MODEL_INSTANCE, speak_hindi
+    if use_fallback_model:
+        model, model_lock, model_path = FALLBACK_MODEL_INSTANCE, FALLBACK_MODEL_LOCK, FALLBACK_MODEL_PATH
+    else:
+        model, model_lock, model_path = MODEL_INSTANCE, MODEL_LOCK, MODEL_PATH
     
-    if not MODEL_INSTANCE:
+    if not model:
         yield f"data: {json.dumps({'content': 'Model not loaded, sir.', 'done': True})}\n\n"
         return
     
+    started_at = time.perf_counter()
     try:
         # Check for instant responses first (ultra-fast)
-        instant_responses = {
-            "hello": "Hello, sir.",
-            "hi": "Greetings, sir.",
-            "hey": "Yes, sir?",
-            "how are you": "Systems operational, sir.",
-            "status": "All systems online.",
-            "what's up": "Standing by, sir.",
-            "who are you": "I am JARVIS, your AI assistant, sir.",
-            "who are u": "I am JARVIS, sir.",
-            "what are you": "I am JARVIS, Tony Stark's AI assistant.",
-            "your name": "I am JARVIS, sir.",
-            "introduce yourself": "I am JARVIS, your personal AI assistant.",
-            "good morning": "Good morning, sir.",
-            "good evening": "Good evening, sir.",
-            "thanks": "You're welcome, sir.",
-            "thank you": "My pleasure, sir.",
-            "what is ai": "AI is Artificial Intelligence, sir.",
-            "what is artificial intelligence": "AI is machine intelligence, sir.",
-            "help": "How may I assist you, sir?",
-            "test": "Systems operational, sir."
-        }
+        with trace.span("instant_responses") as span_args:
+            instant = instant_response(message)
+            span_args["hit"] = instant is not None
+        if instant is not None:
+            yield f"data: {json.dumps({'content': instant, 'done': True})}\n\n"
+            return
         
-        msg_lower = message.lower().strip()
-        for key, response in instant_responses.items():
-            if key in msg_lower:
-                yield f"data: {json.dumps({'content': response, 'done': True})}\n\n"
-                return
-        
-        # Prepare system prompt for Hindi if enabled
-        if speak_hindi:
-            system_prompt += " कृपया केवल हिंदी में उत्तर दें।"
+        if MEMORY_STORE is not None and use_memory:
+            # Only the few most relevant memories, under a fixed token budget, to keep prefill cheap
+            with trace.span("memory_retrieval") as span_args:
+                memories = MEMORY_STORE.context_for(message, count_tokens)
+                span_args["tokens"] = count_tokens(memories) if memories else 0
+            if memories:
+                system_prompt = f"{system_prompt}\n\n{memories}"
         
-        # Detect model type and format prompt accordingly
-        model_name_lower = MODEL_PATH.lower() if MODEL_PATH else ""
-        
-        if "qwen" in model_name_lower:
-            # Qwen2.5 format
-            prompt = f"<|im_start|>system\n{system_prompt}<|im_end|>\n<|im_start|>user\n{message}<|im_end|>\n<|im_start|>assistant\n"
-            stop_tokens = ["<|im_end|>", "<|endoftext|>"]
-        elif "phi" in model_name_lower:
-            # Phi-3 format
-            prompt = f"<|system|>{system_prompt}<|end|><|user|>{message}<|end|><|assistant|>"
-            stop_tokens = ["<|end|>", "<|user|>", "<|system|>"]
-        else:
-            # Generic format
-            prompt = f"System: {system_prompt}\n\nUser: {message}\n\nAssistant:"
-            stop_tokens = ["\nUser:", "\nSystem:", "\n\n"]
+        with trace.span("build_prompt"):
+            prompt, stop_tokens = build_prompt(message, system_prompt, model_path, hindi=hindi)
         
         # Generate streaming response (optimized parameters)
-        for token in MODEL_INSTANCE(
-            prompt,
-            max_tokens=150,       # Slightly longer for richer responses
-            temperature=0.25,     # Modest randomness for more natural output
-            top_p=0.92,           # Wider nucleus sampling for quality
-            top_k=50,             # Larger top-k for diverse yet coherent output
-            repeat_penalty=1.1,   # Prevent repetition
-            stop=stop_tokens,
-            echo=False,
-            stream=True           # Enable streaming for real-time response
-        ):
-            content = token['choices'][0]['text']
-            if content:
-                done = token['choices'][0].get('finish_reason') is not None
-                yield f"data: {json.dumps({'content': content, 'done': done})}\n\n"
-                if done:
-                    break
+        with trace.span("model_lock_wait"), request_load.waiting():
+            model_lock.acquire()
+        try:
+            generation_start = time.perf_counter_ns() // 1000
+            first_token_at = None
+            tokens = 0
+            framing_ns = 0
+            # Stop once the response has said enough; the prompt asks for 2-3 sentences
+            sentence_counter = SentenceCounter(sentence_budget)
+            early_stopped = False
+            response_parts = []
+            for token in model(
+                prompt,
+                **params,
+                stop=stop_tokens,
+                echo=False,
+                stream=True           # Enable streaming for real-time response
+            ):
+                if first_token_at is None:
+                    first_token_at = time.perf_counter_ns() // 1000
+                    trace.add_span("prefill", generation_start, first_token_at, prompt_chars=len(prompt))
+                    request_load.record_ttft(started_at)
+                tokens += 1
+                content = token['choices'][0]['text']
+                if content:
+                    done = token['choices'][0].get('finish_reason') is not None
+                    cut = sentence_counter.feed(content)
+                    if cut is not None and not done:
+                        content = content[:cut]
+                        done = early_stopped = True
+                    response_parts.append(content)
+                    framing_start = time.perf_counter_ns()
+                    event = f"data: {json.dumps({'content': content, 'done': done})}\n\n"
+                    framing_ns += time.perf_counter_ns() - framing_start
+                    yield event
+                    if done:
+                        break
+            if first_token_at is not None:
+                trace.add_span("decode", first_token_at, time.perf_counter_ns() // 1000,
+                               tokens=tokens, json_framing_ms=round(framing_ns / 1e6, 3),
+                               early_stopped=early_stopped)
+            generation_metrics.record(tokens, params["max_tokens"], early_stopped)
+        finally:
+            model_lock.release()
+        
+        if MEMORY_STORE is not None and use_memory and response_parts:
+            MEMORY_STORE.remember(message, "".join(response_parts))
         
     except Exception as e:
         logger.error(f"Error in streaming generation: {e}")
@@ -248,16 +470,24 @@ FALLBACK_RESPONSES = {
     "unknown": "I'm in basic mode. Please ensure the AI model is loaded for full functionality."
 }
 
+def with_tts(events, use_tts):
+    """Interleave server-synthesized sentence audio into a chat stream when requested"""
+    if use_tts:
+        from tts_stream import tts_stream
+        return tts_stream(events)
+    return events
+
+# Frontend is minified and precompressed once at startup, then served from memory
+FRONTEND_PATH = Path(__file__).parent.parent / "frontend" / "index.html"
+static_assets.register("index.html", FRONTEND_PATH)
+
 @app.route('/')
 def main_frontend():
     """Serve the main frontend"""
     try:
-        # Look for frontend in the organized structure
-        frontend_path = Path(__file__).parent.parent / "frontend" / "index.html"
-        if frontend_path.exists():
-            logger.info("📱 Serving main frontend (src/frontend/index.html)")
-            with open(frontend_path, 'r', encoding='utf-8') as f:
-                return f.read()
+        response = static_assets.serve("index.html")
+        if response is not None:
+            return response
         
         # No frontend found
         return render_template_string("""
@@ -283,12 +513,10 @@ def main_frontend():
 def new_frontend():
     """Serve the new frontend"""
     try:
-        frontend_path = Path(__file__).parent.parent / "frontend" / "index.html"
-        if frontend_path.exists():
-            with open(frontend_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        else:
-            return "New frontend not found", 404
+        response = static_assets.serve("index.html")
+        if response is not None:
+            return response
+        return "New frontend not found", 404
     except Exception as e:
         return f"Error: {e}", 500
 
@@ -296,22 +524,21 @@ def new_frontend():
 def old_frontend():
     """Serve the classic frontend"""
     try:
-        frontend_path = Path(__file__).parent.parent / "frontend" / "index.html"
-        if frontend_path.exists():
-            with open(frontend_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        else:
-            return "Classic frontend not found", 404
+        response = static_assets.serve("index.html")
+        if response is not None:
+            return response
+        return "Classic frontend not found", 404
     except Exception as e:
         return f"Error: {e}", 500
 
 @app.route('/audio/<path:filename>')
 def serve_audio(filename):
-    """Serve audio files"""
+    """Serve audio files (conditional GETs and byte ranges for seeking)"""
     try:
         audio_dir = Path(__file__).parent.parent.parent / "audio"
         if audio_dir.exists():
-            return send_from_directory(str(audio_dir), filename)
+            return send_from_directory(str(audio_dir), filename, conditional=True, etag=True,
+                                       max_age=AUDIO_MAX_AGE)
         else:
             return "Audio directory not found", 404
     except Exception as e:
@@ -331,6 +558,14 @@ def api_status():
         "loaded_on_gpu": LOADED_ON_GPU,
         "load_device": "gpu" if LOADED_ON_GPU else "cpu",
         "mode": "llamacpp_direct" if model_loaded else "fallback",
+        "tts_ready": TTS_READY,
+        "generation": generation_metrics.snapshot(),
+        "coalescing": chat_flights.stats(),
+        "ready": model_loaded,
+        "load": request_load.snapshot(),
+        "capture": traffic_recorder.stats(),
+        "memory": MEMORY_STORE.stats() if MEMORY_STORE is not None else {"enabled": MEMORY_ENABLED},
+        "degradation": dict(degradation.snapshot(), fallback_model_loaded=FALLBACK_MODEL_INSTANCE is not None),
         "version": "3.0.0 - LlamaCPP Direct",
         "timestamp": time.time()
     }
@@ -357,13 +592,24 @@ def api_whisper_start():
             "error": "Whisper not available"
         }), 400
     
+    from whisper_stream import start_whisper_recording
+
+    trace = start_trace("whisper_start")
+    capture = traffic_recorder.start("whisper_start")
     try:
-        success = start_whisper_recording()
-        return jsonify({
-            "success": success,
-            "message": "Recording started" if success else "Failed to start recording"
-        })
+        with trace.span("start_recording"):
+            success = start_whisper_recording()
+        capture.finish(success=success)
+        with trace.span("json_response"):
+            response = jsonify({
+                "success": success,
+                "message": "Recording started" if success else "Failed to start recording"
+            })
+        trace.finish(success=success)
+        return response
     except Exception as e:
+        trace.finish(error=str(e))
+        capture.finish(success=False, error=type(e).__name__)
         logger.error(f"Whisper start error: {e}")
         return jsonify({
             "success": False,
@@ -379,20 +625,81 @@ def api_whisper_stop():
             "error": "Whisper not available"
         }), 400
     
+    from whisper_stream import stop_whisper_recording, whisper_stop_timings
+
+    trace = start_trace("whisper_stop")
+    capture = traffic_recorder.start("whisper_stop")
     try:
-        text = stop_whisper_recording()
-        return jsonify({
-            "success": True,
-            "transcription": text,
-            "message": f"Transcribed: {text[:50]}{'...' if len(text) > 50 else ''}"
-        })
+        with trace.span("stop_recording"):
+            text = stop_whisper_recording()
+        capture.finish(success=True, transcription_chars=len(text))
+        # Finer-grained phases recorded by the recognizer itself
+        for name, start_us, end_us in whisper_stop_timings():
+            trace.add_span(name, start_us, end_us)
+        with trace.span("json_response"):
+            response = jsonify({
+                "success": True,
+                "transcription": text,
+                "message": f"Transcribed: {text[:50]}{'...' if len(text) > 50 else ''}"
+            })
+        trace.finish(transcription_chars=len(text))
+        return response
     except Exception as e:
+        trace.finish(error=str(e))
+        capture.finish(success=False, error=type(e).__name__)
         logger.error(f"Whisper stop error: {e}")
         return jsonify({
             "success": False,
             "error": str(e)
         }), 500
 
+# Latest reply to a wake word command, polled by the frontend to speak it
+WAKE_REPLY = {"reply_seq": 0, "command": "", "reply": ""}
+WAKE_REPLY_LOCK = threading.Lock()
+
+def answer_wake_command(text):
+    """Run a command heard after "Jarvis" through the chat pipeline, off the listener thread"""
+    def answer():
+        trace = start_trace("wake_command", message_chars=len(text))
+        parts = []
+        try:
+            for event in request_load.track(chat_with_llamacpp_stream(text, trace=trace)):
+                parts.append(json.loads(event[len("data: "):])["content"])
+        finally:
+            trace.finish()
+        reply = "".join(parts).strip()
+        with WAKE_REPLY_LOCK:
+            WAKE_REPLY.update(reply_seq=WAKE_REPLY["reply_seq"] + 1, command=text, reply=reply)
+        logger.info(f"🗣️ Wake command answered: {reply[:80]}")
+
+    threading.Thread(target=answer, daemon=True, name="wake-command").start()
+
+@app.route('/api/whisper/wake', methods=['GET', 'POST'])
+def api_whisper_wake():
+    """Get or toggle always-on wake word mode ({"enabled": true|false})"""
+    if not WHISPER_AVAILABLE:
+        return jsonify({
+            "success": False,
+            "error": "Whisper not available"
+        }), 400
+
+    from whisper_stream import start_wake_word, stop_wake_word, wake_word_status
+
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        if data.get('enabled', True):
+            if not start_wake_word(on_transcription=answer_wake_command):
+                return jsonify({
+                    "success": False,
+                    "error": "Failed to start wake word mode (Whisper not initialized or no templates)"
+                }), 500
+        else:
+            stop_wake_word()
+
+    with WAKE_REPLY_LOCK:
+        reply = dict(WAKE_REPLY)
+    return jsonify({"success": True, **wake_word_status(), **reply})
+
 @app.route('/api/whisper/status')
 def api_whisper_status():
     """Get Whisper status"""
@@ -417,12 +724,200 @@ def api_whisper_status():
         "whisper_module_available": WHISPER_AVAILABLE,
         "fallback_mode": "web_speech_api" if not whisper_working else "whisper"
     })
+@app.route('/api/transcribe', methods=['POST'])
+def api_transcribe():
+    """Transcribe uploaded WAV files or local WAV files/directories, streamed as JSONL"""
+    if not TRANSCRIBE_AVAILABLE:
+        return jsonify({
+            "success": False,
+            "error": "Offline transcription not available"
+        }), 400
+    
+    from whisper_batch import get_batch_transcriber, iter_wav_inputs
+
+    try:
+        upload_dir = None
+        uploads = request.files.getlist('file')
+        if uploads:
+            # Stream uploads to disk so long recordings never sit in RAM
+            upload_dir = Path(tempfile.mkdtemp(prefix="jarvis_transcribe_"))
+            inputs = []
+            for index, upload in enumerate(uploads):
+                name = Path(upload.filename or f"upload_{index}.wav").name
+                destination = upload_dir / f"{index:04d}_{name}"
+                upload.save(str(destination))
+                inputs.append(destination)
+        else:
+            data = request.get_json(silent=True) or {}
+            paths = data.get('paths') or ([data['path']] if data.get('path') else [])
+            if not paths:
+                return jsonify({
+                    "success": False,
+                    "error": "Upload WAV files as 'file' or provide 'paths'"
+                }), 400
+            # Server-side paths only inside an explicitly shared directory
+            if not TRANSCRIBE_ROOT:
+                return jsonify({
+                    "success": False,
+                    "error": "Path inputs are disabled; upload files or set JARVIS_TRANSCRIBE_ROOT"
+                }), 403
+            inputs = list(iter_wav_inputs(paths, root=TRANSCRIBE_ROOT))
+        
+        transcriber = get_batch_transcriber()
+        
+        def generate():
+            try:
+                yield from transcriber.transcribe_jsonl(inputs)
+            finally:
+                if upload_dir:
+                    shutil.rmtree(upload_dir, ignore_errors=True)
+        
+        return Response(
+            generate(),
+            mimetype='application/x-ndjson',
+            headers={
+                'Cache-Control': 'no-cache',
+                'Access-Control-Allow-Origin': '*'
+            }
+        )
+    except Exception as e:
+        logger.error(f"Transcription error: {e}")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+def api_debug_trace():
+    """Download sampled request spans as Chrome trace / Perfetto JSON"""
+    payload = trace_recorder.export()
+    if request.args.get('clear') == '1':
+        trace_recorder.clear()
+    return Response(
+        json.dumps(payload),
+        mimetype='application/json',
+        headers={'Content-Disposition': 'attachment; filename="jarvis-trace.json"'}
+    )
+
+def api_debug_profile():
+    """Sample all server threads for a while and return folded stacks for a flame graph"""
+    try:
+        seconds = min(float(request.args.get('seconds', 10)), 60.0)
+        interval = max(float(request.args.get('interval', 0.005)), 0.001)
+    except ValueError:
+        return jsonify({
+            "success": False,
+            "error": "seconds and interval must be numbers"
+        }), 400
+    
+    try:
+        folded = sampling_profiler.profile(seconds, interval)
+    except RuntimeError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 409
+    
+    return Response(
+        folded,
+        mimetype='text/plain',
+        headers={'Content-Disposition': 'attachment; filename="jarvis-profile.folded"'}
+    )
+
+if DEBUG_ENDPOINTS:
+    app.add_url_rule('/api/debug/trace', view_func=api_debug_trace)
+    app.add_url_rule('/api/debug/profile', view_func=api_debug_profile)
+
+ACTIVE_BATCHES = set()
+ACTIVE_BATCHES_LOCK = threading.Lock()
+
+@app.route('/api/chat/batch', methods=['POST'])
+def api_chat_batch():
+    """Run an uploaded JSONL prompt file and stream JSONL results (resumable by batch_id)"""
+    if not MODEL_INSTANCE:
+        return jsonify({
+            "success": False,
+            "error": "Model not loaded"
+        }), 503
+    
+    try:
+        upload = request.files.get('file')
+        raw = upload.read() if upload else request.get_data()
+        lines = raw.splitlines()
+        items = read_batch(lines)
+        if not items:
+            return jsonify({
+                "success": False,
+                "error": "No prompts provided"
+            }), 400
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": f"Invalid JSONL: {e}"
+        }), 400
+    
+    batch_id = request.args.get('batch_id') or request.form.get('batch_id') or batch_id_for(lines)
+    if not all(c.isalnum() or c in "-_" for c in batch_id):
+        return jsonify({
+            "success": False,
+            "error": "batch_id may only contain letters, digits, '-' and '_'"
+        }), 400
+    
+    with ACTIVE_BATCHES_LOCK:
+        if batch_id in ACTIVE_BATCHES:
+            return jsonify({
+                "success": False,
+                "error": f"Batch {batch_id} is already running"
+            }), 409
+        ACTIVE_BATCHES.add(batch_id)
+    
+    output_path = BATCH_DIR / f"{batch_id}.jsonl"
+    # The language is fixed at submission; toggling Hindi mid-batch doesn't change it
+    hindi = speak_hindi
+    logger.info(f"📦 Batch {batch_id}: {len(items)} prompts")
+    
+    def generate():
+        # Results from earlier runs first, so the client always receives the full set
+        yield from completed_results(output_path)
+        for result in run_batch(MODEL_INSTANCE, items, build_prompt, output_path,
+                                GENERATION_PARAMS, lock=MODEL_LOCK, hindi=hindi):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+    
+    def release():
+        with ACTIVE_BATCHES_LOCK:
+            ACTIVE_BATCHES.discard(batch_id)
+    
+    response = Response(
+        generate(),
+        mimetype='application/x-ndjson',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Batch-Id': batch_id,
+            'Access-Control-Allow-Origin': '*'
+        }
+    )
+    # Runs when the server closes the response, even if the client left before
+    # the generator was first advanced (its finally would never run)
+    response.call_on_close(release)
+    return response
+
+@app.route('/api/chat/batch/<batch_id>')
+def api_chat_batch_results(batch_id):
+    """Download the results file of a batch"""
+    if not all(c.isalnum() or c in "-_" for c in batch_id):
+        return "Invalid batch id", 400
+    if not (BATCH_DIR / f"{batch_id}.jsonl").exists():
+        return "Batch not found", 404
+    return send_from_directory(str(BATCH_DIR), f"{batch_id}.jsonl", mimetype='application/x-ndjson')
+
 @app.route('/api/chat/stream', methods=['POST'])
 def api_chat_stream():
     """Process chat messages with streaming responses"""
+    trace = start_trace("api_chat_stream")
     try:
-        data = request.get_json()
+        with trace.span("parse_request"):
+            data = request.get_json()
         if not data or 'message' not in data:
+            trace.finish(status=400)
             return jsonify({
                 "success": False,
                 "error": "No message provided"
@@ -430,23 +925,36 @@ def api_chat_stream():
         
         message = data['message'].strip()
         if not message:
+            trace.finish(status=400)
             return jsonify({
                 "success": False,
                 "error": "Empty message"
             }), 400
         
+        trace.annotate(message_chars=len(message))
         logger.info(f"🔄 Streaming: {message[:50]}{'...' if len(message) > 50 else ''}")
         
-        # Toggle Hindi mode if requested
+        # Clients opt in to server-side audio with {"tts": true}
+        use_tts = TTS_READY and bool(data.get('tts', False))
+        
+        # {"hindi": true|false} pins the language for this request only (traffic replay
+        # uses it to reproduce the captured mode without changing the server's)
         global speak_hindi
+        pinned = isinstance(data.get('hindi'), bool)
+        hindi = data['hindi'] if pinned else speak_hindi
+        capture = traffic_recorder.start("chat", **describe_message(message, INSTANT_RESPONSES),
+                                         hindi_mode=hindi, tts=use_tts)
+        # Toggle Hindi mode if requested
         if 'talk in hindi' in message.lower():
-            speak_hindi = True
+            if not pinned:
+                speak_hindi = True
+            capture.annotate(path="hindi_toggle")
             
             def hindi_response():
-                yield f"data: {json.dumps({'content': 'ठीक है सर, अब से मैं हिंदी में बात करूँगा।', 'done': True})}\n\n"
+                yield f"data: {json.dumps({'content': HINDI_MODE_RESPONSE, 'done': True})}\n\n"
             
             return Response(
-                hindi_response(),
+                traced_stream(trace, capture.stream(with_tts(hindi_response(), use_tts))),
                 mimetype='text/plain',
                 headers={
                     'Cache-Control': 'no-cache',
@@ -458,9 +966,76 @@ def api_chat_stream():
         # Check if model is loaded
         if MODEL_INSTANCE:
             system_prompt = "You are JARVIS, Tony Stark's AI assistant. Be helpful and informative. Respond in 2-3 sentences with useful detail."
+            key = events = None
+            if COALESCE_ENABLED:
+                # Keyed before the service level is chosen, so identical requests join the
+                # running generation instead of starting another at a different level
+                key = coalesce_key(message, system_prompt=system_prompt, hindi=hindi,
+                                   sentence_budget=SENTENCE_BUDGET)
+                trace.annotate(flight=key[:8])
+                events = chat_flights.join(key)
+            if events is not None:
+                # Joining costs no model time, so it is never degraded or turned away.
+                # The generation's spans are in the trace of the request that started it
+                trace.annotate(coalesced=True)
+                capture.annotate(path="model", coalesced=True)
+            else:
+                level = degradation.update()
+                trace.annotate(degradation_level=level)
+                capture.annotate(degradation_level=level)
+                instant = instant_response(message) if level == INSTANT_ONLY else None
+                if instant is not None:
+                    capture.annotate(path="instant_only")
+                
+                    def instant_only_response():
+                        yield f"data: {json.dumps({'content': instant, 'done': True})}\n\n"
+                
+                    return Response(
+                        traced_stream(trace, capture.stream(with_tts(instant_only_response(), use_tts))),
+                        mimetype='text/plain',
+                        headers={
+                            'Cache-Control': 'no-cache',
+                            'Connection': 'keep-alive',
+                            'Access-Control-Allow-Origin': '*'
+                        }
+                    )
+                if level >= INSTANT_ONLY:
+                    # Shed load before touching the model; a router retries 503s on another instance
+                    capture.annotate(path="rejected")
+                    capture.finish(status=503)
+                    trace.finish(status=503)
+                    degradation.record_rejection()
+                    return Response(
+                        f"data: {json.dumps({'content': BUSY_MESSAGE, 'done': True})}\n\n",
+                        status=503,
+                        mimetype='text/plain',
+                        headers={
+                            'Cache-Control': 'no-cache',
+                            'Retry-After': '2',
+                            'Access-Control-Allow-Origin': '*'
+                        }
+                    )
+            
+                capture.annotate(path="model")
+                params = DEGRADED_GENERATION_PARAMS if level >= SHORT_ANSWERS else GENERATION_PARAMS
+                use_fallback_model = level >= FALLBACK_MODEL and FALLBACK_MODEL_INSTANCE is not None
+                generation = dict(params=params, use_fallback_model=use_fallback_model,
+                                  use_memory=level < SHORT_ANSWERS, hindi=hindi)
+                
+                # Load counts generations, not the clients sharing one
+                if key is not None:
+                    def start_generation():
+                        # Traced by the request that starts it, so a sampled request keeps
+                        # its prefill and decode spans whether or not others join
+                        trace.annotate(flight_leader=True)
+                        return request_load.track(chat_with_llamacpp_stream(message, system_prompt, trace, **generation))
+                    
+                    events = chat_flights.stream(key, start_generation)
+                else:
+                    events = request_load.track(chat_with_llamacpp_stream(message, system_prompt, trace, **generation))
             
             return Response(
-                chat_with_llamacpp_stream(message, system_prompt),
+                traced_stream(trace, capture.stream(with_tts(events, use_tts))),
                 mimetype='text/plain',
                 headers={
                     'Cache-Control': 'no-cache',
@@ -469,6 +1044,7 @@ def api_chat_stream():
                 }
             )
         else:
+            capture.annotate(path="fallback")
             # Fallback streaming response
             def fallback_response():
                 if any(word in message.lower() for word in ["hello", "hi", "hey", "jarvis"]):
@@ -481,7 +1057,7 @@ def api_chat_stream():
                 yield f"data: {json.dumps({'content': response, 'done': True})}\n\n"
             
             return Response(
-                fallback_response(),
+                traced_stream(trace, capture.stream(with_tts(fallback_response(), use_tts))),
                 mimetype='text/plain',
                 headers={
                     'Cache-Control': 'no-cache',
@@ -492,6 +1068,7 @@ def api_chat_stream():
         
     except Exception as e:
         logger.error(f"Streaming API error: {e}")
+        trace.finish(error=str(e))
         
         def error_response():
             yield f"data: {json.dumps({'content': 'I apologize, sir. An error occurred.', 'done': True})}\n\n"
@@ -506,24 +1083,42 @@ def api_chat_stream():
             }
         )
 
+def load_whisper_models():
+    """Initialize Whisper, falling back from base to tiny"""
+    from whisper_stream import initialize_whisper
+
+    try:
+        if initialize_whisper("base"):
+            logger.info("✅ Whisper base model loaded - real-time streaming recognition ready")
+        elif initialize_whisper("tiny"):
+            logger.info("✅ Whisper tiny model loaded - real-time streaming recognition ready")
+        else:
+            logger.error("❌ All Whisper model initialization failed, clients will use Web Speech API")
+    except Exception:
+        import traceback
+        logger.error(f"Whisper initialization failed: {traceback.format_exc()}")
+
 if __name__ == '__main__':
     print("\n" + "="*60)
     print("🤖 JARVIS WEB INTERFACE - LLAMACPP DIRECT")
     print("="*60)
     print()
     print("🌐 Frontend URLs:")
-    print("   Main:           http://localhost:5000/")
-    print("   New Interface:  http://localhost:5000/new")
-    print("   Classic:        http://localhost:5000/old")
+    print(f"   Main:           http://localhost:{PORT}/")
+    print(f"   New Interface:  http://localhost:{PORT}/new")
+    print(f"   Classic:        http://localhost:{PORT}/old")
     print()
     print("📡 API Endpoints:")
-    print("   Status:         http://localhost:5000/api/status")
-    print("   Chat:           http://localhost:5000/api/chat (POST)")
-    print("   Stream:         http://localhost:5000/api/chat/stream (POST)")
+    print(f"   Status:         http://localhost:{PORT}/api/status")
+    print(f"   Chat:           http://localhost:{PORT}/api/chat (POST)")
+    print(f"   Stream:         http://localhost:{PORT}/api/chat/stream (POST)")
+    print(f"   Batch:          http://localhost:{PORT}/api/chat/batch (POST)")
+    print(f"   Transcribe:     http://localhost:{PORT}/api/transcribe (POST)")
+    print(f"   Wake Word:      http://localhost:{PORT}/api/whisper/wake (GET/POST)")
     print()
     print("🤖 AI Configuration:")
     
-    if not LLAMACPP_AVAILABLE:
+    if not LLAMACPP_AVAILABLE and not STUB_MODEL:
         print("   LlamaCPP:       ❌ llama-cpp-python not available")
         print("   💡 Install:     pip install llama-cpp-python")
     elif initialize_model():
@@ -531,34 +1126,43 @@ if __name__ == '__main__':
         print(f"   Path:           {MODEL_PATH}")
         print("   LlamaCPP:       ✅ Model loaded and ready")
         print("   Mode:           🚀 Direct in-process inference")
+        if (FALLBACK_MODEL_PATH or STUB_MODEL) and initialize_fallback_model():
+            print(f"   Fallback:       🪶 {Path(FALLBACK_MODEL_PATH).name if FALLBACK_MODEL_PATH else 'stub'} (used under heavy load)")
     else:
         print("   LlamaCPP:       ⚠️ Model not found or failed to load")
         print("   💡 Download:    Download a GGUF model file")
     
-    # Initialize Whisper with error handling
+    # Long-term memory (imports NumPy, so only when enabled)
+    if MEMORY_ENABLED:
+        from memory_store import initialize_memory
+        MEMORY_STORE = initialize_memory()
+        if MEMORY_STORE is not None:
+            print(f"   Memory:         🧠 {len(MEMORY_STORE)} memories (capacity {MEMORY_STORE.capacity:,})")
+        else:
+            print("   Memory:         ⚠️ Failed to open, continuing without long-term memory")
+    
+    # Whisper (and torch) load in the background so chat is served immediately
     if WHISPER_AVAILABLE:
-        print("   Whisper:        🔄 Initializing base model...")
-        try:
-            if initialize_whisper("base"):
-                print("   Whisper:        ✅ Base model loaded and ready")
-                print("   Speech Mode:    🎤 Real-time streaming recognition")
-            else:
-                print("   Whisper:        ⚠️ Failed to initialize base model, trying tiny...")
-                if initialize_whisper("tiny"):
-                    print("   Whisper:        ✅ Tiny model loaded and ready")
-                    print("   Speech Mode:    🎤 Real-time streaming recognition")
-                else:
-                    print("   Whisper:        ❌ All model initialization failed")
-                    print("   💡 Note:        Server will continue without Whisper (Web Speech API fallback)")
-        except Exception as whisper_error:
-            print(f"   Whisper:        ❌ Initialization error: {whisper_error}")
-            print("   💡 Fallback:    Server will use Web Speech API instead")
-            import traceback
-            logger.error(f"Whisper initialization failed: {traceback.format_exc()}")
+        print("   Whisper:        🔄 Loading in background (Web Speech API until ready)...")
+        threading.Thread(target=load_whisper_models, daemon=True, name="whisper-loader").start()
     else:
         print("   Whisper:        ❌ Not available")
         print("   💡 Install:     pip install openai-whisper pyaudio")
     
+    # Initialize server-side TTS and pre-synthesize every canned phrase
+    if TTS_ENABLED and TTS_MODULE_AVAILABLE:
+        print("   TTS:            🔄 Pre-synthesizing instant responses...")
+        warm_phrases = list(INSTANT_RESPONSES.values()) + list(FALLBACK_RESPONSES.values()) + [HINDI_MODE_RESPONSE]
+        from tts_stream import initialize_tts
+        TTS_READY = initialize_tts(warm_phrases)
+        if TTS_READY:
+            print("   TTS:            ✅ Sentence-streamed server audio ready")
+        else:
+            print("   TTS:            ⚠️ Failed to start, clients will use browser speech")
+    elif TTS_ENABLED:
+        print("   TTS:            ❌ Not available")
+        print("   💡 Install:     pip install pyttsx3")
+    
     print()
     print("🎯 Starting ASGI server with Uvicorn...")
     print("="*60)
@@ -566,7 +1170,7 @@ if __name__ == '__main__':
     # Use Uvicorn for ASGI hosting
     import uvicorn
     try:
-        uvicorn.run(asgi_app, host='0.0.0.0', port=5000, log_level="info")
+        uvicorn.run(create_asgi_app(), host=HOST, port=PORT, log_level="info")
     except Exception as e:
         logger.error(f"🚨 Server startup failed: {e}", exc_info=True)
         # Re-raise to trigger full traceback
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+JARVIS Startup Benchmark
+Measures the cold import of server.py in fresh interpreters, reports import
+time per module and fails when the startup budget is exceeded
+"""
+
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+CORE_DIR = Path(__file__).parent
+
+# Milliseconds allowed for `import server` in a fresh interpreter
+STARTUP_BUDGET_MS = float(os.environ.get("JARVIS_STARTUP_BUDGET_MS", "1500"))
+
+# Heavy packages that must only load on first use, never at import time
+DEFERRED_MODULES = ("torch", "whisper", "llama_cpp", "starlette", "flask_cors", "pyttsx3", "numpy")
+
+
+def parse_importtime(stderr):
+    """(depth, name, self_us, cumulative_us) for each line of -X importtime output"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            self_us, cumulative_us = int(self_us), int(cumulative_us)
+        except ValueError:
+            continue  # Header line
+        stripped = name.lstrip(" ")
+        depth = (len(name) - len(stripped) - 1) // 2
+        entries.append((depth, stripped, self_us, cumulative_us))
+    return entries
+
+
+def measure_import(module="server"):
+    """Import ``module`` once in a fresh interpreter; return its importtime entries"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(CORE_DIR), capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def summarize(runs, module="server"):
+    """Median total, median per direct import of ``module``, and modules loaded"""
+    totals = []
+    per_import = {}
+    loaded = set()
+    for entries in runs:
+        # The target module is the last top-level entry; its direct imports
+        # are the depth-1 entries recorded just before it
+        target = max(i for i, (depth, name, _, _) in enumerate(entries) if depth == 0 and name == module)
+        totals.append(entries[target][3] / 1000)
+        start = target
+        while start > 0 and entries[start - 1][0] > 0:
+            start -= 1
+        for depth, name, _, cumulative_us in entries[start:target]:
+            if depth == 1:
+                per_import.setdefault(name, []).append(cumulative_us / 1000)
+        loaded.update(name for _, name, _, _ in entries)
+    medians = {name: statistics.median(times) for name, times in per_import.items()}
+    return statistics.median(totals), medians, loaded
+
+
+def check_startup(total_ms, loaded, budget_ms=STARTUP_BUDGET_MS):
+    """(over_budget, eager) where ``eager`` lists deferred modules that were imported"""
+    eager = sorted(m for m in DEFERRED_MODULES if m in loaded)
+    return total_ms > budget_ms, eager
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure server.py import time against a budget")
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS,
+                        help="Fail if the median import exceeds this (JARVIS_STARTUP_BUDGET_MS)")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to measure")
+    parser.add_argument("--top", type=int, default=15, help="Direct imports to list")
+    parser.add_argument("--module", default="server", help="Module to import")
+    args = parser.parse_args()
+
+    print(f"⏱️ Importing {args.module} in {args.runs} fresh interpreters...")
+    runs = [measure_import(args.module) for _ in range(args.runs)]
+    total_ms, per_import, loaded = summarize(runs, args.module)
+
+    print(f"\n📊 Direct imports of {args.module} (median cumulative ms):")
+    for name, ms in sorted(per_import.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"   {ms:8.1f}  {name}")
+
+    over_budget, eager = check_startup(total_ms, loaded, args.budget_ms)
+    if eager:
+        print(f"\n❌ Deferred modules imported at startup: {', '.join(eager)}")
+
+    status = "❌" if over_budget else "✅"
+    print(f"\n{status} import {args.module}: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    sys.exit(1 if over_budget or eager else 0)
+
+
+if __name__ == "__main__":
+    main()
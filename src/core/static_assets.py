@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+JARVIS Static Asset Layer
+Frontend assets minified and precompressed once, served from memory with ETags
+"""
+
+import os
+import gzip
+import hashlib
+import logging
+import mimetypes
+import threading
+from pathlib import Path
+from flask import Response, request
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+    logger.info("ℹ️ brotli not installed, serving gzip only")
+
+# Reload assets when their file changes (development only: costs a stat per hit)
+DEV_MODE = os.environ.get("JARVIS_DEV", "0") == "1"
+
+# Audio files rarely change; let browsers keep them for a day
+AUDIO_MAX_AGE = int(os.environ.get("JARVIS_AUDIO_MAX_AGE", "86400"))
+
+
+def minify_html(text):
+    """Conservative HTML minification: drop indentation, blank lines and comments
+
+    Lines inside multi-line JavaScript template literals are left untouched so
+    string contents never change.
+    """
+    out = []
+    in_script = False
+    in_template = False
+
+    for line in text.splitlines():
+        if in_template:
+            out.append(line)
+        else:
+            stripped = line.strip()
+            if not stripped:
+                continue
+            if not in_script and stripped.startswith("<!--") and stripped.endswith("-->") \
+                    and not stripped.startswith("<!--["):
+                continue
+            out.append(stripped)
+
+        lower = line.lower()
+        if "<script" in lower and "</script>" not in lower:
+            in_script = True
+        elif "</script>" in lower:
+            in_script = False
+            in_template = False
+        if in_script and line.count("`") % 2 == 1:
+            in_template = not in_template
+
+    return "\n".join(out) + "\n"
+
+
+def parse_accept_encoding(header):
+    """{coding: q} from an Accept-Encoding header; a malformed q-value drops its coding"""
+    weights = {}
+    for part in header.split(","):
+        coding, *params = [piece.strip() for piece in part.split(";")]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = None
+        if q is not None and 0.0 <= q <= 1.0:
+            weights[coding.lower()] = q
+    return weights
+
+
+class StaticAsset:
+    """One asset with all of its precomputed representations"""
+
+    def __init__(self, path, minify=True):
+        self.path = Path(path)
+        self.content_type = mimetypes.guess_type(self.path.name)[0] or "application/octet-stream"
+        if self.content_type.startswith("text/"):
+            self.content_type += "; charset=utf-8"
+        self.minify = minify
+        self.load()
+
+    def load(self):
+        stat = self.path.stat()
+        raw = self.path.read_bytes()
+        if self.minify and self.path.suffix.lower() in (".html", ".htm"):
+            raw = minify_html(raw.decode("utf-8")).encode("utf-8")
+
+        digest = hashlib.sha256(raw).hexdigest()[:32]
+        # Strong ETags must differ per encoding, since the bytes differ
+        representations = {None: (raw, f'"{digest}"')}
+        representations["gzip"] = (gzip.compress(raw, compresslevel=9, mtime=0), f'"{digest}-gz"')
+        if BROTLI_AVAILABLE:
+            representations["br"] = (brotli.compress(raw, quality=11), f'"{digest}-br"')
+
+        self.representations = representations
+        self.etags = {etag for _, etag in representations.values()}
+        self.mtime = stat.st_mtime_ns
+        self.size = stat.st_size
+        logger.info(f"📦 Loaded {self.path.name}: {len(raw)} bytes minified, "
+                    + ", ".join(f"{enc} {len(body)}" for enc, (body, _) in representations.items() if enc))
+
+    def is_stale(self):
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return False
+        return stat.st_mtime_ns != self.mtime or stat.st_size != self.size
+
+    def pick(self, accept_encoding):
+        """Choose the representation the client prefers most, the smallest on a tie
+
+        Codings with q=0 are refused. ``*`` covers codings not listed, and
+        identity is acceptable unless refused outright or through ``*;q=0``.
+        """
+        weights = parse_accept_encoding(accept_encoding)
+        best_q, best = 0.0, None
+        for encoding in ("br", "gzip", None):   # Smallest first, so ties keep it
+            if encoding not in self.representations:
+                continue
+            q = weights.get(encoding or "identity", weights.get("*"))
+            if q is None:
+                q = 1.0 if encoding is None else 0.0
+            if q > best_q:
+                best_q, best = q, encoding
+        return best, self.representations[best]
+
+
+class StaticAssetStore:
+    """Named in-memory assets served with compression and conditional GETs"""
+
+    def __init__(self, dev_mode=DEV_MODE):
+        self.dev_mode = dev_mode
+        self._assets = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, path, minify=True):
+        """Load an asset at startup; returns False if the file is missing"""
+        try:
+            self._assets[name] = StaticAsset(path, minify)
+            return True
+        except OSError as e:
+            logger.warning(f"⚠️ Static asset {name} not loaded: {e}")
+            return False
+
+    def get(self, name):
+        asset = self._assets.get(name)
+        if asset is not None and self.dev_mode and asset.is_stale():
+            with self._lock:
+                if asset.is_stale():
+                    logger.info(f"🔄 Reloading changed asset {asset.path.name}")
+                    try:
+                        asset.load()
+                    except OSError as e:
+                        logger.warning(f"⚠️ Reload failed, serving previous version: {e}")
+        return asset
+
+    def serve(self, name):
+        """Build the response for the current request, or None if unknown"""
+        asset = self.get(name)
+        if asset is None:
+            return None
+
+        encoding, (body, etag) = asset.pick(request.headers.get("Accept-Encoding", ""))
+        headers = {
+            "ETag": etag,
+            "Vary": "Accept-Encoding",
+            # Always revalidate so a redeploy is picked up, but at the cost of a 304 only
+            "Cache-Control": "no-cache",
+        }
+
+        if_none_match = request.headers.get("If-None-Match", "")
+        if if_none_match:
+            candidates = {tag.strip()[2:] if tag.strip().startswith("W/") else tag.strip()
+                          for tag in if_none_match.split(",")}
+            matched = candidates & asset.etags
+            if "*" in candidates or matched:
+                if matched:
+                    headers["ETag"] = next(iter(matched))
+                return Response(status=304, headers=headers)
+
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(body, status=200, headers=headers, content_type=asset.content_type)
+
+
+# Global asset store used by the server
+static_assets = StaticAssetStore()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+JARVIS Stub Model
+A llama-cpp-python stand-in with realistic prefill and per-token delays, for
+running several local server instances without GGUF files or a GPU
+"""
+
+import os
+import time
+
+# Set JARVIS_STUB_MODEL=1 to serve the stub instead of a real model
+STUB_MODEL = os.environ.get("JARVIS_STUB_MODEL", "0") == "1"
+STUB_PREFILL_MS = float(os.environ.get("JARVIS_STUB_PREFILL_MS", "150"))
+STUB_TOKEN_MS = float(os.environ.get("JARVIS_STUB_TOKEN_MS", "20"))
+
+STUB_REPLY = ("Stub instance {name} at your service, sir. "
+              "This reply is generated without a model so routing and load can be tested. "
+              "Every token arrives after a fixed delay.")
+
+
+class StubLlama:
+    """Callable like ``llama_cpp.Llama`` for completion, streaming or not"""
+
+    def __init__(self, name=None, prefill_ms=STUB_PREFILL_MS, token_ms=STUB_TOKEN_MS):
+        self.name = name or os.environ.get("JARVIS_PORT", str(os.getpid()))
+        self.prefill_ms = prefill_ms
+        self.token_ms = token_ms
+
+    def _tokens(self, max_tokens):
+        words = STUB_REPLY.format(name=self.name).split(" ")
+        return [word + " " for word in words[:max_tokens]]
+
+    def _stream(self, tokens):
+        time.sleep(self.prefill_ms / 1000)
+        for index, token in enumerate(tokens):
+            time.sleep(self.token_ms / 1000)
+            finish = "stop" if index == len(tokens) - 1 else None
+            yield {"choices": [{"text": token, "finish_reason": finish}]}
+
+    def __call__(self, prompt, max_tokens=16, stream=False, **kwargs):
+        tokens = self._tokens(max_tokens)
+        if stream:
+            return self._stream(tokens)
+        for _ in self._stream(tokens):
+            pass
+        return {
+            "choices": [{"text": "".join(tokens), "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": len(tokens)},
+        }
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+JARVIS Request Tracing
+Sampled per-request spans kept in a bounded ring, exported as Chrome trace JSON,
+plus an on-demand sampling profiler producing folded stacks for flame graphs
+"""
+
+import os
+import sys
+import time
+import random
+import logging
+import threading
+from collections import deque, Counter
+from contextlib import contextmanager
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Fraction of requests traced (0 disables tracing, 1 traces everything)
+TRACE_SAMPLE_RATE = float(os.environ.get("JARVIS_TRACE_SAMPLE", "0.05"))
+# Number of finished traces kept in memory
+TRACE_RING_SIZE = int(os.environ.get("JARVIS_TRACE_RING", "256"))
+
+_PID = os.getpid()
+
+
+def _now_us():
+    return time.perf_counter_ns() // 1000
+
+
+class Trace:
+    """Spans for one request, each its own track in the trace viewer"""
+
+    sampled = True
+
+    def __init__(self, name, trace_id, **args):
+        self.name = name
+        self.trace_id = trace_id
+        self.events = []
+        self.start_us = _now_us()
+        self.args = args
+        self._finished = False
+
+    @contextmanager
+    def span(self, name, **args):
+        start = _now_us()
+        try:
+            yield args
+        finally:
+            self.add_span(name, start, _now_us(), **args)
+
+    def add_span(self, name, start_us, end_us, **args):
+        self.events.append({
+            "name": name,
+            "cat": self.name,
+            "ph": "X",
+            "ts": start_us,
+            "dur": max(0, end_us - start_us),
+            "pid": _PID,
+            "tid": self.trace_id,
+            "args": args,
+        })
+
+    def annotate(self, **args):
+        """Attach extra arguments to the root span"""
+        self.args.update(args)
+
+    def finish(self, **args):
+        """Close the root span and hand the trace to the ring buffer"""
+        if self._finished:
+            return
+        self._finished = True
+        self.args.update(args)
+        self.add_span(self.name, self.start_us, _now_us(), **self.args)
+        trace_recorder.record(self)
+
+
+class _NullTrace:
+    """Stand-in for unsampled requests; every operation is a no-op"""
+
+    sampled = False
+    trace_id = None
+
+    @contextmanager
+    def span(self, name, **args):
+        yield args
+
+    def add_span(self, name, start_us, end_us, **args):
+        pass
+
+    def annotate(self, **args):
+        pass
+
+    def finish(self, **args):
+        pass
+
+
+NULL_TRACE = _NullTrace()
+
+
+class TraceRecorder:
+    """Bounded ring of finished traces"""
+
+    def __init__(self, sample_rate=TRACE_SAMPLE_RATE, ring_size=TRACE_RING_SIZE):
+        self.sample_rate = sample_rate
+        self._ring = deque(maxlen=ring_size)
+        self._lock = threading.Lock()
+        self._next_id = 1
+
+    def start(self, name, **args):
+        """Return a live Trace if this request is sampled, else NULL_TRACE"""
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return NULL_TRACE
+        with self._lock:
+            trace_id = self._next_id
+            self._next_id += 1
+        return Trace(name, trace_id, **args)
+
+    def record(self, trace):
+        with self._lock:
+            self._ring.append(trace)
+
+    def export(self):
+        """Chrome trace / Perfetto JSON object for every trace in the ring"""
+        with self._lock:
+            traces = list(self._ring)
+        events = [{
+            "name": "process_name", "ph": "M", "pid": _PID, "tid": 0,
+            "args": {"name": "JARVIS server"},
+        }]
+        for trace in traces:
+            events.append({
+                "name": "thread_name", "ph": "M", "pid": _PID, "tid": trace.trace_id,
+                "args": {"name": f"{trace.name} #{trace.trace_id}"},
+            })
+            events.extend(trace.events)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def clear(self):
+        with self._lock:
+            self._ring.clear()
+
+
+trace_recorder = TraceRecorder()
+
+
+def start_trace(name, **args):
+    return trace_recorder.start(name, **args)
+
+
+def traced_stream(trace, iterable, name="stream"):
+    """Wrap a response iterable, attributing time spent outside it to the server bridge
+
+    Time between yielding a chunk and being asked for the next one is spent
+    in the WSGI/ASGI bridge writing to the socket.
+    """
+    if not trace.sampled:
+        yield from iterable
+        return
+
+    bridge_us = 0
+    chunks = 0
+    first_pull = _now_us()
+    trace.add_span("wsgi_dispatch", trace.start_us, first_pull)
+    try:
+        for chunk in iterable:
+            chunks += 1
+            handed_off = _now_us()
+            yield chunk
+            bridge_us += _now_us() - handed_off
+    finally:
+        trace.add_span(name, first_pull, _now_us(), chunks=chunks, wsgi_bridge_ms=round(bridge_us / 1000, 3))
+        trace.finish()
+
+
+class SamplingProfiler:
+    """Samples every thread's stack at a fixed interval into folded-stack counts"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def profile(self, seconds=10.0, interval=0.005):
+        """Block for ``seconds`` and return folded stacks ("a;b;c count" lines)"""
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A profile is already running")
+        try:
+            counts = Counter()
+            me = threading.get_ident()
+            names = {}
+            deadline = time.perf_counter() + seconds
+            samples = 0
+            while time.perf_counter() < deadline:
+                for thread in threading.enumerate():
+                    names[thread.ident] = thread.name
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == me:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        code = frame.f_code
+                        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                        frame = frame.f_back
+                    stack.append(names.get(thread_id, f"thread-{thread_id}"))
+                    counts[";".join(reversed(stack))] += 1
+                samples += 1
+                time.sleep(interval)
+            logger.info(f"🔥 Profile captured: {samples} samples over {seconds:.1f}s")
+            return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+        finally:
+            self._lock.release()
+
+
+sampling_profiler = SamplingProfiler()
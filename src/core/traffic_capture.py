@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+JARVIS Traffic Capture
+Opt-in, append-only JSONL log of anonymized request metadata and timing for
+chat streams and Whisper calls, replayed later by traffic_replay.py
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import secrets
+import threading
+from pathlib import Path
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Path of the capture log; unset disables capture
+CAPTURE_PATH = os.environ.get("JARVIS_CAPTURE", "")
+# Salt for message digests; set it to keep digests comparable across restarts
+CAPTURE_SALT = os.environ.get("JARVIS_CAPTURE_SALT") or secrets.token_hex(16)
+
+
+def describe_message(message, instant_keys=()):
+    """Shape of a message without its text: sizes, instant-response key, Hindi toggle"""
+    lowered = message.lower().strip()
+    return {
+        "message_chars": len(message),
+        "message_words": len(message.split()),
+        # Instant keys are fixed phrases from the server, not user text
+        "instant": next((key for key in instant_keys if key in lowered), None),
+        "hindi_toggle": "talk in hindi" in lowered,
+        # Repeats of the same message share a digest, so coalescing behaviour replays
+        "digest": hashlib.sha256((CAPTURE_SALT + " ".join(lowered.split())).encode("utf-8")).hexdigest()[:16],
+    }
+
+
+class Capture:
+    """One request being captured"""
+
+    enabled = True
+
+    def __init__(self, recorder, kind, fields):
+        self.recorder = recorder
+        self.fields = dict(kind=kind, ts=round(time.time(), 3), **fields)
+        self.start = time.perf_counter()
+        self._finished = False
+
+    def _elapsed_ms(self):
+        return round((time.perf_counter() - self.start) * 1000, 1)
+
+    def annotate(self, **fields):
+        self.fields.update(fields)
+
+    def finish(self, **fields):
+        if self._finished:
+            return
+        self._finished = True
+        self.fields.setdefault("total_ms", self._elapsed_ms())
+        self.fields.update(fields)
+        self.recorder.write(self.fields)
+
+    def stream(self, events):
+        """Wrap an SSE stream, recording time to first event and response size"""
+        count = 0
+        response_chars = 0
+        completed = False
+        try:
+            for event in events:
+                if count == 0:
+                    self.fields["ttft_ms"] = self._elapsed_ms()
+                count += 1
+                if isinstance(event, str) and event.startswith("data: "):
+                    try:
+                        payload = json.loads(event[6:])
+                        response_chars += len(payload.get("content", ""))
+                        completed = completed or bool(payload.get("done"))
+                    except ValueError:
+                        pass
+                yield event
+        finally:
+            # A client that leaves early closes the generator before "done"
+            self.finish(events=count, response_chars=response_chars, completed=completed)
+
+
+class _NullCapture:
+    """Stand-in when capture is off; every operation is a no-op"""
+
+    enabled = False
+
+    def annotate(self, **fields):
+        pass
+
+    def finish(self, **fields):
+        pass
+
+    def stream(self, events):
+        return events
+
+
+NULL_CAPTURE = _NullCapture()
+
+
+class TrafficRecorder:
+    """Appends one JSON line per finished request"""
+
+    def __init__(self, path=CAPTURE_PATH):
+        self.path = Path(path) if path else None
+        self._lock = threading.Lock()
+        self._file = None
+        self.recorded = 0
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    def start(self, kind, **fields):
+        if self.path is None:
+            return NULL_CAPTURE
+        return Capture(self, kind, fields)
+
+    def write(self, fields):
+        line = json.dumps(fields, ensure_ascii=False) + "\n"
+        with self._lock:
+            try:
+                if self._file is None:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    self._file = open(self.path, "a", encoding="utf-8")
+                    logger.info(f"📼 Capturing traffic to {self.path}")
+                self._file.write(line)
+                self._file.flush()
+                self.recorded += 1
+            except OSError as e:
+                logger.error(f"❌ Traffic capture write failed: {e}")
+
+    def stats(self):
+        return {"enabled": self.enabled, "path": str(self.path) if self.path else None, "recorded": self.recorded}
+
+
+traffic_recorder = TrafficRecorder()
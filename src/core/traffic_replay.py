@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+JARVIS Traffic Replay
+Re-issues captured traffic against a server at the original or a scaled rate
+and compares latency distributions between two builds
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import requests
+
+# Filler vocabulary for synthesized messages. No word contains an instant-response
+# key ("hi", "hey", "help", "test", ...) so model-bound traffic stays model-bound.
+VOCABULARY = [
+    "explain", "how", "does", "a", "jet", "engine", "work", "and", "compare", "solar",
+    "power", "to", "wind", "energy", "summarize", "my", "plan", "for", "tomorrow",
+    "quantum", "computing", "basics", "in", "simple", "words", "black", "holes",
+    "form", "from", "dying", "stars", "recommend", "good", "books", "about", "space",
+    "travel", "describe", "neural", "networks", "calculate", "area", "circle", "radius",
+    "seven", "meters", "translate", "news", "brief", "suit", "armor",
+    "repair", "diagnostics", "weather", "forecast", "city", "train", "route",
+]
+
+PERCENTILES = (50, 90, 99)
+
+
+def read_jsonl(path):
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue  # Torn last line from a live capture
+    return entries
+
+
+def synthesize_message(entry):
+    """A message with the captured shape: same instant key, Hindi toggle and length"""
+    if entry.get("hindi_toggle"):
+        return "talk in hindi"
+    if entry.get("instant"):
+        return entry["instant"]
+    # Seeded by the digest so repeated messages replay as identical messages
+    rng = random.Random(entry.get("digest") or entry.get("ts"))
+    words = max(1, entry.get("message_words", 5))
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+def chat_payload(entry):
+    """Request body for a captured chat entry
+
+    The captured Hindi mode is pinned per request, so replayed toggles (and
+    the order requests land in) never change the target server's own mode.
+    """
+    payload = {"message": synthesize_message(entry), "tts": entry.get("tts", False)}
+    if "hindi_mode" in entry:
+        payload["hindi"] = bool(entry["hindi_mode"])
+    return payload
+
+
+def replay_chat(target, entry):
+    started = time.perf_counter()
+    result = {"status": None, "ttft_ms": None, "total_ms": None}
+    with requests.post(f"{target}/api/chat/stream", json=chat_payload(entry),
+                       stream=True, timeout=(5, 300)) as response:
+        result["status"] = response.status_code
+        for chunk in response.iter_content(chunk_size=None):
+            if result["ttft_ms"] is None and chunk:
+                result["ttft_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    result["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+def replay_whisper(target, entry):
+    action = "start" if entry["kind"] == "whisper_start" else "stop"
+    started = time.perf_counter()
+    response = requests.post(f"{target}/api/whisper/{action}", timeout=(5, 300))
+    total_ms = round((time.perf_counter() - started) * 1000, 1)
+    return {"status": response.status_code, "ttft_ms": total_ms, "total_ms": total_ms}
+
+
+REPLAYERS = {"chat": replay_chat, "whisper_start": replay_whisper, "whisper_stop": replay_whisper}
+
+
+def category(entry):
+    """Latency bucket: chat split by path, Whisper calls by action"""
+    if entry["kind"] != "chat":
+        return entry["kind"]
+    if entry.get("hindi_toggle"):
+        return "chat:hindi_toggle"
+    if entry.get("instant"):
+        return "chat:instant"
+    return f"chat:{entry.get('path', 'model')}"
+
+
+def replay(entries, target, speed=1.0, workers=64, label="", output=None, include_whisper=True):
+    """Open-loop replay: each request fires at its captured offset divided by ``speed``"""
+    entries = sorted((e for e in entries if e.get("kind") in REPLAYERS and (include_whisper or e["kind"] == "chat")),
+                     key=lambda e: e["ts"])
+    if not entries:
+        return []
+    origin = entries[0]["ts"]
+    results = []
+    lock = threading.Lock()
+    out = open(output, "a", encoding="utf-8") if output else None
+
+    def fire(entry, scheduled):
+        lag_ms = round((time.perf_counter() - scheduled) * 1000, 1)
+        try:
+            result = REPLAYERS[entry["kind"]](target, entry)
+        except requests.RequestException as e:
+            result = {"status": None, "ttft_ms": None, "total_ms": None, "error": type(e).__name__}
+        record = {"label": label, "category": category(entry), "offset_s": round(entry["ts"] - origin, 3),
+                  "lag_ms": lag_ms, "captured_total_ms": entry.get("total_ms"), **result}
+        with lock:
+            results.append(record)
+            if out:
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for index, entry in enumerate(entries):
+                scheduled = start + (entry["ts"] - origin) / speed
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(fire, entry, scheduled)
+                if (index + 1) % 100 == 0:
+                    print(f"📤 {index + 1}/{len(entries)} requests issued")
+    finally:
+        if out:
+            out.close()
+    return results
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = (len(ordered) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(results, metric="total_ms"):
+    """{category: {"count", "errors", "mean", "p50", "p90", "p99"}} for one run"""
+    grouped = defaultdict(list)
+    errors = defaultdict(int)
+    for record in results:
+        value = record.get(metric)
+        ok = record.get("status") is not None and record["status"] < 500
+        if value is None or not ok:
+            errors[record["category"]] += 1
+        else:
+            grouped[record["category"]].append(value)
+    summary = {}
+    for name in sorted(set(grouped) | set(errors)):
+        values = grouped[name]
+        summary[name] = {
+            "count": len(values),
+            "errors": errors[name],
+            "mean": sum(values) / len(values) if values else None,
+            **{f"p{p}": percentile(values, p) for p in PERCENTILES},
+        }
+    return summary
+
+
+def _fmt(value):
+    return "-" if value is None else f"{value:.1f}"
+
+
+def compare(baseline, candidate, metric="total_ms", threshold=10.0, min_delta_ms=5.0):
+    """Print per-category percentiles side by side; return True if any regressed past
+    ``threshold`` % and by at least ``min_delta_ms`` (so instant replies don't flag on noise)
+    """
+    base, cand = summarize(baseline, metric), summarize(candidate, metric)
+    regressed = False
+    print(f"\n📊 {metric}: baseline vs candidate")
+    print(f"{'category':<22}{'n':>6}{'stat':>6}{'baseline':>11}{'candidate':>11}{'change':>12}")
+    for name in sorted(set(base) | set(cand)):
+        b, c = base.get(name, {}), cand.get(name, {})
+        print(f"{name:<22}{c.get('count', 0):>6}   err{b.get('errors', 0):>11}{c.get('errors', 0):>11}")
+        for stat in ["mean"] + [f"p{p}" for p in PERCENTILES]:
+            old, new = b.get(stat), c.get(stat)
+            change = ""
+            if old and new is not None:
+                pct = 100.0 * (new - old) / old
+                flag = " ❌" if pct > threshold and new - old >= min_delta_ms else ""
+                regressed = regressed or bool(flag)
+                change = f"{pct:+.1f}%{flag}"
+            print(f"{'':<22}{'':>6}{stat:>6}{_fmt(old):>11}{_fmt(new):>11}{change:>12}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured JARVIS traffic and compare builds")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("replay", help="Re-issue captured traffic against a server")
+    run.add_argument("capture", help="Capture JSONL written with JARVIS_CAPTURE")
+    run.add_argument("-o", "--output", required=True, help="Append per-request results to this JSONL")
+    run.add_argument("--target", default="http://localhost:5000")
+    run.add_argument("--speed", type=float, default=1.0, help="Rate multiplier (2 = twice the captured rate)")
+    run.add_argument("--label", default="", help="Build label stored with each result")
+    run.add_argument("--limit", type=int, default=0, help="Replay only the first N requests")
+    run.add_argument("--workers", type=int, default=64, help="Maximum concurrent requests")
+    run.add_argument("--no-whisper", action="store_true", help="Skip Whisper start/stop calls")
+
+    cmp = sub.add_parser("compare", help="Compare latency distributions of two replay runs")
+    cmp.add_argument("baseline")
+    cmp.add_argument("candidate")
+    cmp.add_argument("--metric", choices=["total_ms", "ttft_ms"], default="total_ms")
+    cmp.add_argument("--threshold", type=float, default=10.0, help="Exit 1 if any statistic worsens by more than this %%")
+    cmp.add_argument("--min-delta-ms", type=float, default=5.0, help="Ignore smaller absolute slowdowns")
+
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        regressed = compare(read_jsonl(args.baseline), read_jsonl(args.candidate), args.metric,
+                            args.threshold, args.min_delta_ms)
+        print("\n❌ Regression detected" if regressed else "\n✅ No regression beyond threshold")
+        sys.exit(1 if regressed else 0)
+
+    entries = read_jsonl(args.capture)
+    if args.limit:
+        entries = sorted(entries, key=lambda e: e.get("ts", 0))[:args.limit]
+    print(f"▶️ Replaying {len(entries)} captured requests against {args.target} at {args.speed}x")
+    started = time.perf_counter()
+    results = replay(entries, args.target, args.speed, args.workers, args.label, args.output, not args.no_whisper)
+    print(f"✅ Replayed {len(results)} requests in {time.perf_counter() - started:.1f}s -> {Path(args.output)}")
+    for name, stats in summarize(results).items():
+        print(f"   {name:<22} n={stats['count']:<5} err={stats['errors']:<3} "
+              f"p50={_fmt(stats['p50'])}ms p99={_fmt(stats['p99'])}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+JARVIS Server-Side TTS Streaming
+Sentence-streamed speech synthesis with a content-addressed phrase cache
+"""
+
+import os
+import sys
+import json
+import base64
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from sentence_budget import SentenceCounter
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+try:
+    import pyttsx3
+    TTS_AVAILABLE = True
+    logger.info("✅ pyttsx3 available")
+except ImportError as e:
+    TTS_AVAILABLE = False
+    logger.error(f"❌ pyttsx3 not available: {e}")
+
+class SentenceSplitter:
+    """Accumulate streamed tokens and emit sentences as soon as they complete"""
+
+    def __init__(self):
+        self.counter = SentenceCounter(budget=0)
+        self.emitted = 0
+
+    def feed(self, text):
+        """Add a token and return the list of sentences it completed"""
+        sentences = []
+        for end in self.counter.sentence_ends(text):
+            sentence = self.counter.text[self.emitted:end].strip()
+            self.emitted = end
+            if sentence:
+                sentences.append(sentence)
+        return sentences
+
+    def flush(self):
+        """Return whatever is left in the buffer as a final sentence"""
+        sentence = self.counter.text[self.emitted:].strip()
+        self.emitted = len(self.counter.text)
+        return [sentence] if sentence else []
+
+
+class PhraseAudioCache:
+    """Content-addressed audio cache: bounded LRU in memory and on disk"""
+
+    def __init__(self, cache_dir, memory_limit_bytes=32 * 1024 * 1024, disk_limit_bytes=256 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.memory_limit_bytes = memory_limit_bytes
+        self.disk_limit_bytes = disk_limit_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_evictions = 0
+        self._disk, self._disk_bytes = self._scan_disk()
+
+    def _scan_disk(self):
+        """Index existing entries by last use (mtime), least recent first"""
+        entries = []
+        for path in self.cache_dir.glob("*/*.wav"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+        entries.sort()
+        disk = OrderedDict((key, size) for _, key, size in entries)
+        return disk, sum(disk.values())
+
+    @staticmethod
+    def key_for(text, voice=None, rate=None):
+        """Hash the phrase together with the voice settings that shape its audio"""
+        payload = json.dumps([text, voice, rate], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path_for(self, key):
+        return self.cache_dir / key[:2] / f"{key}.wav"
+
+    def _touch_disk(self, key, size=None):
+        # Caller holds the lock; returns paths to delete outside it
+        if size is None:
+            if key in self._disk:
+                self._disk.move_to_end(key)
+            return []
+        self._disk_bytes += size - self._disk.pop(key, 0)
+        self._disk[key] = size
+        evicted = []
+        while self._disk_bytes > self.disk_limit_bytes and len(self._disk) > 1:
+            old_key, old_size = self._disk.popitem(last=False)
+            self._disk_bytes -= old_size
+            self.disk_evictions += 1
+            evicted.append(self._path_for(old_key))
+        return evicted
+
+    def _remember(self, key, audio):
+        # Caller holds the lock
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        if len(audio) > self.memory_limit_bytes:
+            return
+        self._memory[key] = audio
+        self._memory_bytes += len(audio)
+        while self._memory_bytes > self.memory_limit_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def get(self, key):
+        """Return cached audio bytes or None"""
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return audio
+
+        path = self._path_for(key)
+        try:
+            audio = path.read_bytes()
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self._remember(key, audio)
+            self._touch_disk(key)
+            self.hits += 1
+        try:
+            os.utime(path)  # Keeps LRU order across restarts
+        except OSError:
+            pass
+        return audio
+
+    def put(self, key, audio):
+        """Store audio in memory and atomically on disk, evicting the least recently used files"""
+        path = self._path_for(key)
+        evicted = []
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(audio)
+            os.replace(tmp_path, path)
+            with self._lock:
+                evicted = self._touch_disk(key, len(audio))
+        except OSError as e:
+            logger.warning(f"⚠️ Could not write TTS cache entry {key[:12]}: {e}")
+
+        with self._lock:
+            self._remember(key, audio)
+        for old_path in evicted:
+            try:
+                old_path.unlink()
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+                "disk_evictions": self.disk_evictions,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Per-process pyttsx3 engine used by pool workers
+_worker_engine = None
+
+
+def _init_worker(rate, voice):
+    """Create one pyttsx3 engine per worker process (engines are not thread-safe)"""
+    global _worker_engine
+    _worker_engine = pyttsx3.init()
+    if rate:
+        _worker_engine.setProperty('rate', rate)
+    if voice:
+        _worker_engine.setProperty('voice', voice)
+
+
+def _synthesize_worker(text, out_dir):
+    """Render one phrase to WAV inside a worker process and return the bytes"""
+    fd, wav_path = tempfile.mkstemp(suffix=".wav", dir=out_dir)
+    os.close(fd)
+    try:
+        _worker_engine.save_to_file(text, wav_path)
+        _worker_engine.runAndWait()
+        with open(wav_path, 'rb') as f:
+            return f.read()
+    finally:
+        try:
+            os.remove(wav_path)
+        except OSError:
+            pass
+
+
+class SentenceSynthesizer:
+    """Synthesize sentences in a worker pool, consulting the phrase cache first"""
+
+    def __init__(self, workers=2, rate=None, voice=None, cache_dir=None, memory_limit_bytes=32 * 1024 * 1024,
+                 disk_limit_bytes=256 * 1024 * 1024):
+        self.rate = rate
+        self.voice = voice
+        self.temp_dir = Path(tempfile.gettempdir()) / "jarvis_tts"
+        self.temp_dir.mkdir(exist_ok=True)
+        self.cache = PhraseAudioCache(cache_dir or (self.temp_dir / "cache"), memory_limit_bytes, disk_limit_bytes)
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(rate, voice),
+        )
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+
+    def submit(self, text):
+        """Return a future resolving to WAV bytes for ``text``"""
+        key = PhraseAudioCache.key_for(text, self.voice, self.rate)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return _completed_future(cached)
+
+        # Deduplicate phrases already being synthesized
+        with self._pending_lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            future = self.pool.submit(_synthesize_worker, text, str(self.temp_dir))
+            self._pending[key] = future
+
+        def _store(done_future):
+            with self._pending_lock:
+                self._pending.pop(key, None)
+            if not done_future.cancelled() and done_future.exception() is None:
+                self.cache.put(key, done_future.result())
+
+        future.add_done_callback(_store)
+        return future
+
+    def warm(self, phrases):
+        """Pre-synthesize phrases so they are served from cache later"""
+        futures = [self.submit(text) for text in dict.fromkeys(phrases) if text]
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                logger.warning(f"⚠️ TTS warm-up failed for a phrase: {e}")
+        logger.info(f"✅ Pre-synthesized {len(futures)} phrases")
+
+    def shutdown(self):
+        if sys.version_info >= (3, 9):
+            self.pool.shutdown(wait=False, cancel_futures=True)
+        else:
+            # cancel_futures is 3.9+; queued phrases still run to completion
+            self.pool.shutdown(wait=False)
+
+
+def _completed_future(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+def _audio_event(seq, sentence, audio):
+    payload = {
+        'audio': base64.b64encode(audio).decode('ascii'),
+        'format': 'wav',
+        'seq': seq,
+        'text': sentence,
+        'done': False,
+    }
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+def stream_with_tts(events, synthesizer):
+    """Wrap a chat SSE generator, interleaving audio for each completed sentence
+
+    Text events pass through untouched except that the final ``done`` flag is
+    held back until every sentence's audio has been sent.
+    """
+    splitter = SentenceSplitter()
+    queue = []  # (seq, sentence, future) in speaking order
+    seq = 0
+
+    def ready_audio(block):
+        # Yield audio strictly in order; stop at the first unfinished sentence
+        while queue and (block or queue[0][2].done()):
+            item_seq, sentence, future = queue.pop(0)
+            try:
+                yield _audio_event(item_seq, sentence, future.result())
+            except Exception as e:
+                logger.warning(f"⚠️ TTS synthesis failed: {e}")
+
+    try:
+        for event in events:
+            if not event.startswith("data: "):
+                yield event
+                continue
+            data = json.loads(event[6:])
+            done = data.get('done', False)
+
+            for sentence in splitter.feed(data.get('content', '')):
+                queue.append((seq, sentence, synthesizer.submit(sentence)))
+                seq += 1
+
+            if done:
+                data['done'] = False
+                yield f"data: {json.dumps(data)}\n\n"
+                # Let the generator finish (releasing the model lock and recording
+                # its metrics) before waiting on audio
+                for _ in events:
+                    pass
+                break
+            yield event
+            yield from ready_audio(block=False)
+    finally:
+        # A client that leaves mid-reply stops generation too
+        close = getattr(events, "close", None)
+        if close is not None:
+            close()
+
+    for sentence in splitter.flush():
+        queue.append((seq, sentence, synthesizer.submit(sentence)))
+        seq += 1
+
+    yield from ready_audio(block=True)
+    yield f"data: {json.dumps({'content': '', 'done': True})}\n\n"
+
+
+# Global synthesizer instance
+tts_synthesizer = None
+
+
+def initialize_tts(warm_phrases=()):
+    """Initialize the TTS worker pool and pre-synthesize ``warm_phrases``"""
+    global tts_synthesizer
+
+    if not TTS_AVAILABLE:
+        logger.error("❌ TTS not available - install with: pip install pyttsx3")
+        return False
+
+    try:
+        workers = int(os.environ.get("JARVIS_TTS_WORKERS", "2"))
+        rate = int(os.environ["JARVIS_TTS_RATE"]) if os.environ.get("JARVIS_TTS_RATE") else None
+        voice = os.environ.get("JARVIS_TTS_VOICE") or None
+        cache_dir = os.environ.get("JARVIS_TTS_CACHE_DIR") or None
+        disk_limit_mb = int(os.environ.get("JARVIS_TTS_CACHE_MB", "256"))
+
+        logger.info(f"🔄 Starting TTS pool with {workers} workers...")
+        tts_synthesizer = SentenceSynthesizer(workers=workers, rate=rate, voice=voice, cache_dir=cache_dir,
+                                             disk_limit_bytes=disk_limit_mb * 1024 * 1024)
+        tts_synthesizer.warm(warm_phrases)
+        return True
+
+    except Exception as e:
+        logger.error(f"❌ Failed to initialize TTS: {e}")
+        tts_synthesizer = None
+        return False
+
+
+def tts_stream(events):
+    """Interleave synthesized audio into a chat event stream if TTS is ready"""
+    if not tts_synthesizer:
+        return events
+    return stream_with_tts(events, tts_synthesizer)
+
+
+if __name__ == "__main__":
+    # Test TTS integration
+    print("🤖 Testing TTS Integration")
+    print("=" * 40)
+
+    if initialize_tts(["Hello, sir."]):
+        def fake_stream():
+            for token in ["Systems ", "online. ", "All ", "checks ", "passed", "."]:
+                yield f"data: {json.dumps({'content': token, 'done': False})}\n\n"
+            yield f"data: {json.dumps({'content': '', 'done': True})}\n\n"
+
+        for event in tts_stream(fake_stream()):
+            data = json.loads(event[6:])
+            if 'audio' in data:
+                print(f"🔊 seq={data['seq']} {len(data['audio'])} b64 chars: {data['text']}")
+            else:
+                print(f"💬 {data}")
+        print(f"📊 Cache: {tts_synthesizer.cache.stats()}")
+        tts_synthesizer.shutdown()
+    else:
+        print("❌ TTS initialization failed")
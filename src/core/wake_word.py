@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+JARVIS Wake Word Spotting
+MFCC features and DTW template matching in NumPy - cheap enough to run
+continuously so Whisper only starts after "Jarvis" is heard
+"""
+
+import os
+import sys
+import time
+import wave
+import logging
+import argparse
+from pathlib import Path
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+FRAME_LENGTH = 400          # 25 ms analysis window
+HOP_LENGTH = 160            # 10 ms hop
+N_FFT = 512
+N_MELS = 26
+N_MFCC = 13
+
+# Defaults, overridable from the environment
+WAKE_THRESHOLD = float(os.environ.get("JARVIS_WAKE_THRESHOLD", "0.17"))
+WAKE_TEMPLATES_DIR = Path(os.environ.get(
+    "JARVIS_WAKE_TEMPLATES", Path(__file__).parent.parent.parent / "config" / "wake_word"))
+
+
+def _hz_to_mel(hz):
+    return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+
+def _mel_to_hz(mel):
+    return 700.0 * (10 ** (mel / 2595.0) - 1.0)
+
+
+class MFCC:
+    """Precomputed window, mel filterbank and DCT for fast MFCC extraction"""
+
+    def __init__(self, sample_rate=SAMPLE_RATE):
+        self.window = np.hamming(FRAME_LENGTH).astype(np.float32)
+
+        mel_points = np.linspace(_hz_to_mel(20.0), _hz_to_mel(sample_rate / 2), N_MELS + 2)
+        bins = np.floor((N_FFT + 1) * _mel_to_hz(mel_points) / sample_rate).astype(int)
+        filterbank = np.zeros((N_MELS, N_FFT // 2 + 1), dtype=np.float32)
+        for m in range(1, N_MELS + 1):
+            left, center, right = bins[m - 1], bins[m], bins[m + 1]
+            for k in range(left, center):
+                filterbank[m - 1, k] = (k - left) / max(1, center - left)
+            for k in range(center, right):
+                filterbank[m - 1, k] = (right - k) / max(1, right - center)
+        self.filterbank = filterbank
+
+        n = np.arange(N_MELS)
+        k = np.arange(N_MFCC)[:, None]
+        self.dct = (np.sqrt(2.0 / N_MELS) * np.cos(np.pi * k * (2 * n + 1) / (2 * N_MELS))).astype(np.float32)
+
+    def __call__(self, samples):
+        """Float32 samples in [-1, 1] -> (frames, N_MFCC - 1) features, c0 dropped"""
+        if len(samples) < FRAME_LENGTH:
+            return np.zeros((0, N_MFCC - 1), dtype=np.float32)
+        emphasized = np.append(samples[0], samples[1:] - 0.97 * samples[:-1]).astype(np.float32)
+        n_frames = 1 + (len(emphasized) - FRAME_LENGTH) // HOP_LENGTH
+        strides = (emphasized.strides[0] * HOP_LENGTH, emphasized.strides[0])
+        frames = np.lib.stride_tricks.as_strided(emphasized, shape=(n_frames, FRAME_LENGTH), strides=strides)
+        power = np.abs(np.fft.rfft(frames * self.window, n=N_FFT)) ** 2
+        log_mel = np.log(power @ self.filterbank.T + 1e-10)
+        return (log_mel @ self.dct.T)[:, 1:]
+
+
+def normalize_features(features):
+    """Cepstral mean normalization plus unit-length frames for cosine distances"""
+    features = features - features.mean(axis=0, keepdims=True)
+    norms = np.linalg.norm(features, axis=1, keepdims=True)
+    return features / np.maximum(norms, 1e-8)
+
+
+def dtw_distance(query, template):
+    """Length-normalized DTW cost with slope-constrained steps
+
+    Each query frame advances the template by 0, 1 or 2 frames, so every row
+    depends only on the previous one and is computed as a single vector op.
+    """
+    cost = 1.0 - query @ template.T           # Cosine distance, both unit-normalized
+    n, m = cost.shape
+    previous = np.full(m, np.inf, dtype=np.float64)
+    previous[0] = cost[0, 0]
+    for i in range(1, n):
+        shifted1 = np.concatenate(([np.inf], previous[:-1]))
+        shifted2 = np.concatenate(([np.inf, np.inf], previous[:-2]))
+        previous = cost[i] + np.minimum(previous, np.minimum(shifted1, shifted2))
+    return float(previous[-1] / n)
+
+
+def load_wav(path):
+    """Read a 16-bit PCM WAV as mono float32 at SAMPLE_RATE"""
+    with wave.open(str(path), 'rb') as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV is supported")
+        rate = wav.getframerate()
+        channels = wav.getnchannels()
+        pcm = np.frombuffer(wav.readframes(wav.getnframes()), dtype='<i2')
+    audio = pcm.reshape(-1, channels).mean(axis=1).astype(np.float32) / 32768.0
+    if rate != SAMPLE_RATE and len(audio) > 1:
+        target_len = int(round(len(audio) * SAMPLE_RATE / rate))
+        audio = np.interp(np.linspace(0, len(audio) - 1, target_len), np.arange(len(audio)), audio).astype(np.float32)
+    return audio
+
+
+def trim_silence(audio, energy_threshold=0.01):
+    """Cut leading and trailing low-energy audio from an enrollment clip"""
+    frame_rms = np.array([
+        np.sqrt(np.mean(audio[i:i + HOP_LENGTH] ** 2)) for i in range(0, len(audio), HOP_LENGTH)
+    ])
+    voiced = np.nonzero(frame_rms > energy_threshold)[0]
+    if len(voiced) == 0:
+        return audio
+    return audio[voiced[0] * HOP_LENGTH:(voiced[-1] + 1) * HOP_LENGTH]
+
+
+def load_templates(directory=WAKE_TEMPLATES_DIR, mfcc=None):
+    """MFCC templates from every WAV recording of the wake word in ``directory``"""
+    mfcc = mfcc or MFCC()
+    templates = []
+    for path in sorted(Path(directory).glob("*.wav")):
+        features = mfcc(trim_silence(load_wav(path)))
+        if len(features) >= 10:
+            templates.append(normalize_features(features))
+        else:
+            logger.warning(f"⚠️ Wake word template too short, skipped: {path.name}")
+    return templates
+
+
+class WakeWordDetector:
+    """Sliding-window keyword spotter over a capture ring
+
+    Feed raw audio as it arrives; every ``hop_seconds`` the newest window is
+    scored against each template, but only when the window holds speech-level
+    energy, so silence costs almost nothing.
+    """
+
+    def __init__(self, templates, threshold=WAKE_THRESHOLD, hop_seconds=0.1,
+                 energy_threshold=0.01, refractory_seconds=1.5):
+        if not templates:
+            raise ValueError("No wake word templates")
+        self.templates = templates
+        self.threshold = threshold
+        self.hop = int(hop_seconds * SAMPLE_RATE)
+        self.energy_threshold = energy_threshold
+        self.refractory = int(refractory_seconds * SAMPLE_RATE)
+        self.mfcc = MFCC()
+
+        longest = max(len(t) for t in templates)
+        self.window = (longest + 20) * HOP_LENGTH + FRAME_LENGTH
+        self.ring = np.zeros(self.window, dtype=np.float32)
+        self.filled = 0
+        self.samples_seen = 0
+        self._since_eval = 0
+        self._last_detection = -self.refractory
+
+        # Cost accounting
+        self.cpu_seconds = 0.0
+        self.evaluations = 0
+        self.skipped = 0
+        self.last_distance = None
+        self.last_latency_ms = None     # end of the spoken keyword -> detection
+        self.last_eval_ms = None        # scoring compute for that detection
+        self._keyword_end = None
+
+    def reset(self):
+        self.filled = 0
+        self._since_eval = 0
+
+    def feed(self, samples):
+        """Add audio (int16 or float32); return stream times (s) of any detections"""
+        start_cpu = time.thread_time()
+        if samples.dtype == np.int16:
+            samples = samples.astype(np.float32) / 32768.0
+
+        detections = []
+        offset = 0
+        while offset < len(samples):
+            take = min(len(samples) - offset, self.hop - self._since_eval)
+            chunk = samples[offset:offset + take]
+            self.ring = np.roll(self.ring, -take)
+            self.ring[-take:] = chunk
+            self.filled = min(self.window, self.filled + take)
+            self.samples_seen += take
+            self._since_eval += take
+            offset += take
+
+            if self._since_eval >= self.hop:
+                self._since_eval = 0
+                eval_start = time.perf_counter()
+                if self._evaluate():
+                    self.last_eval_ms = (time.perf_counter() - eval_start) * 1000
+                    # Audio after the keyword had to arrive before this hop was scored
+                    waited_ms = 1000 * (self.samples_seen - self._keyword_end) / SAMPLE_RATE
+                    self.last_latency_ms = waited_ms + self.last_eval_ms
+                    detections.append(self.samples_seen / SAMPLE_RATE)
+
+        self.cpu_seconds += time.thread_time() - start_cpu
+        return detections
+
+    def _evaluate(self):
+        if self.filled < self.window // 2:
+            return False
+        if self.samples_seen - self._last_detection < self.refractory:
+            return False
+
+        audio = self.ring[-self.filled:]
+        # Energy gate: only the speech-bearing tail needs scoring
+        tail = audio[-self.window // 2:]
+        if np.sqrt(np.mean(tail * tail)) < self.energy_threshold:
+            self.skipped += 1
+            return False
+
+        self.evaluations += 1
+        features = self.mfcc(audio)
+        best, best_frames = np.inf, len(features)
+        for template in self.templates:
+            # Window ending now, about as long as the template
+            query = features[-len(template):] if len(features) > len(template) else features
+            distance = dtw_distance(normalize_features(query), template)
+            if distance < best:
+                best, best_frames = distance, len(query)
+        self.last_distance = best
+
+        if best < self.threshold:
+            self._last_detection = self.samples_seen
+            self._keyword_end = self.samples_seen - self._trailing_silence(audio[-best_frames * HOP_LENGTH:])
+            return True
+        return False
+
+    def _trailing_silence(self, matched):
+        """Samples of quiet after the last voiced frame of the matched window"""
+        usable = len(matched) - len(matched) % HOP_LENGTH
+        frames = matched[len(matched) - usable:].reshape(-1, HOP_LENGTH)
+        voiced = np.nonzero(np.sqrt(np.mean(frames * frames, axis=1)) > self.energy_threshold)[0]
+        if len(voiced) == 0:
+            return 0
+        return (len(frames) - 1 - voiced[-1]) * HOP_LENGTH
+
+    def stats(self):
+        audio_seconds = self.samples_seen / SAMPLE_RATE
+        return {
+            "audio_seconds": round(audio_seconds, 2),
+            "cpu_seconds": round(self.cpu_seconds, 3),
+            "cpu_percent_of_one_core": round(100 * self.cpu_seconds / audio_seconds, 2) if audio_seconds else 0.0,
+            "evaluations": self.evaluations,
+            "skipped_silent": self.skipped,
+            "last_distance": None if self.last_distance is None else round(self.last_distance, 3),
+            "hop_ms": round(1000 * self.hop / SAMPLE_RATE, 1),
+            "last_detection_latency_ms": None if self.last_latency_ms is None else round(self.last_latency_ms, 2),
+            "last_eval_ms": None if self.last_eval_ms is None else round(self.last_eval_ms, 2),
+        }
+
+
+def detect_in_wav(path, detector, chunk=1024):
+    """Run a detector over a recorded WAV as if it were streaming from the mic"""
+    audio = load_wav(path)
+    detections = []
+    for i in range(0, len(audio), chunk):
+        detections.extend(detector.feed(audio[i:i + chunk]))
+    return detections
+
+
+def enroll(directory, count=3, seconds=1.5):
+    """Record ``count`` wake word samples from the microphone into ``directory``"""
+    import pyaudio
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    audio = pyaudio.PyAudio()
+    try:
+        for index in range(count):
+            input(f"🎤 Press Enter and say 'Jarvis' ({index + 1}/{count})...")
+            stream = audio.open(format=pyaudio.paInt16, channels=1, rate=SAMPLE_RATE, input=True,
+                                frames_per_buffer=1024)
+            frames = [stream.read(1024, exception_on_overflow=False)
+                      for _ in range(int(SAMPLE_RATE * seconds / 1024))]
+            stream.stop_stream()
+            stream.close()
+            path = directory / f"jarvis_{int(time.time())}_{index}.wav"
+            with wave.open(str(path), 'wb') as wav:
+                wav.setnchannels(1)
+                wav.setsampwidth(2)
+                wav.setframerate(SAMPLE_RATE)
+                wav.writeframes(b''.join(frames))
+            print(f"✅ Saved {path}")
+    finally:
+        audio.terminate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JARVIS wake word tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    test = sub.add_parser("test", help="Run the detector over recorded WAV fixtures")
+    test.add_argument("wavs", nargs="+", help="WAV recordings to scan")
+    test.add_argument("--templates", default=str(WAKE_TEMPLATES_DIR), help="Directory of wake word WAVs")
+    test.add_argument("--threshold", type=float, default=WAKE_THRESHOLD)
+
+    rec = sub.add_parser("enroll", help="Record wake word templates from the microphone")
+    rec.add_argument("--templates", default=str(WAKE_TEMPLATES_DIR), help="Directory to write WAVs into")
+    rec.add_argument("--count", type=int, default=3)
+
+    args = parser.parse_args()
+    if args.command == "enroll":
+        enroll(args.templates, args.count)
+        return
+
+    templates = load_templates(args.templates)
+    if not templates:
+        print(f"❌ No templates in {args.templates}; record some with: wake_word.py enroll")
+        sys.exit(1)
+    for wav_path in args.wavs:
+        detector = WakeWordDetector(templates, threshold=args.threshold)
+        detections = detect_in_wav(wav_path, detector)
+        found = ", ".join(f"{t:.2f}s" for t in detections) or "none"
+        print(f"🎯 {wav_path}: detections at {found}")
+        print(f"   📊 {detector.stats()}")
+
+
+if __name__ == "__main__":
+    main()
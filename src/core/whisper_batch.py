@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+JARVIS Offline Whisper Transcription
+Long-form and bulk WAV transcription across a process pool, streamed as JSONL
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+import importlib.util
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+WHISPER_AVAILABLE = importlib.util.find_spec("whisper") is not None
+if not WHISPER_AVAILABLE:
+    logger.error("❌ Whisper not available for offline transcription")
+
+WHISPER_RATE = 16000        # Whisper expects 16 kHz mono float32
+VAD_FRAME_SECONDS = 0.03    # Energy frame size used to find quiet split points
+SCAN_BLOCK_SECONDS = 10     # How much audio is touched at once while scanning
+
+
+class WavInfo:
+    """Location and format of the PCM payload inside a WAV file"""
+
+    def __init__(self, path, rate, channels, sample_width, data_offset, n_frames):
+        self.path = str(path)
+        self.rate = rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.data_offset = data_offset
+        self.n_frames = n_frames
+
+    @property
+    def duration(self):
+        return self.n_frames / float(self.rate)
+
+
+def read_wav_info(path):
+    """Parse RIFF chunks to find the PCM data without reading it"""
+    with open(path, 'rb') as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+            raise ValueError(f"{path} is not a RIFF/WAVE file")
+
+        fmt = None
+        while True:
+            chunk_header = f.read(8)
+            if len(chunk_header) < 8:
+                raise ValueError(f"{path} has no data chunk")
+            chunk_id = chunk_header[:4]
+            chunk_size = int.from_bytes(chunk_header[4:], 'little')
+
+            if chunk_id == b'fmt ':
+                fmt = f.read(chunk_size)
+                if chunk_size % 2:
+                    f.seek(1, os.SEEK_CUR)
+            elif chunk_id == b'data':
+                if fmt is None:
+                    raise ValueError(f"{path} has data before fmt chunk")
+                audio_format = int.from_bytes(fmt[0:2], 'little')
+                channels = int.from_bytes(fmt[2:4], 'little')
+                rate = int.from_bytes(fmt[4:8], 'little')
+                bits = int.from_bytes(fmt[14:16], 'little')
+                # 0xFFFE is WAVE_FORMAT_EXTENSIBLE, used by many recorders for plain PCM
+                if audio_format not in (1, 0xFFFE) or bits != 16:
+                    raise ValueError(f"{path}: only 16-bit PCM WAV is supported")
+                data_offset = f.tell()
+                # Recorders that were killed mid-write leave a bogus size; trust the file length
+                available = os.path.getsize(path) - data_offset
+                size = chunk_size if 0 < chunk_size <= available else available
+                n_frames = size // (channels * 2)
+                return WavInfo(path, rate, channels, 2, data_offset, n_frames)
+            else:
+                f.seek(chunk_size + (chunk_size % 2), os.SEEK_CUR)
+
+
+def open_wav_memmap(info):
+    """Memory-map the PCM payload as a (frames, channels) int16 array"""
+    return np.memmap(info.path, dtype='<i2', mode='r', offset=info.data_offset,
+                     shape=(info.n_frames, info.channels))
+
+
+def load_segment(info, start_frame, end_frame):
+    """Decode one slice of the file to 16 kHz mono float32"""
+    pcm = open_wav_memmap(info)[start_frame:end_frame]
+    audio = pcm.mean(axis=1, dtype=np.float32) / 32768.0
+
+    if info.rate != WHISPER_RATE and len(audio) > 1:
+        target_len = int(round(len(audio) * WHISPER_RATE / info.rate))
+        positions = np.linspace(0, len(audio) - 1, num=target_len, dtype=np.float64)
+        audio = np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+    return audio
+
+
+def frame_energies(info):
+    """RMS energy per VAD frame, computed block by block over the memmap"""
+    pcm = open_wav_memmap(info)
+    frame_len = max(1, int(info.rate * VAD_FRAME_SECONDS))
+    block_frames = frame_len * max(1, int(SCAN_BLOCK_SECONDS / VAD_FRAME_SECONDS))
+    energies = []
+
+    for start in range(0, info.n_frames, block_frames):
+        block = pcm[start:start + block_frames].mean(axis=1, dtype=np.float32)
+        usable = len(block) - len(block) % frame_len
+        if usable:
+            frames = block[:usable].reshape(-1, frame_len)
+            energies.append(np.sqrt(np.mean(frames * frames, axis=1)))
+    if not energies:
+        return np.zeros(0, dtype=np.float32), frame_len
+    return np.concatenate(energies), frame_len
+
+
+def plan_chunks(info, chunk_seconds=30.0, overlap_seconds=1.0, search_seconds=5.0):
+    """Split a file into chunks whose boundaries fall in the quietest nearby frames
+
+    Returns ``(core_start, core_end, decode_start, decode_end)`` frame tuples.
+    Core regions tile the file exactly; decode regions extend each core by half
+    the overlap on both sides so words cut at a boundary are heard in full.
+    Decode regions never exceed ``chunk_seconds`` (Whisper's 30 s window), so
+    cores are at most ``chunk_seconds - overlap_seconds`` and each cut is the
+    quietest point in the ``search_seconds`` before that limit.
+    """
+    if overlap_seconds >= chunk_seconds:
+        raise ValueError("overlap_seconds must be shorter than chunk_seconds")
+    energies, frame_len = frame_energies(info)
+    pad = int(overlap_seconds * info.rate / 2)
+    max_core = int(chunk_seconds * info.rate) - 2 * pad
+    search = min(int(search_seconds * info.rate), max_core // 2)
+
+    boundaries = [0]
+    while info.n_frames - boundaries[-1] > max_core:
+        limit = boundaries[-1] + max_core
+        lo = (limit - search) // frame_len
+        # Last frame whose midpoint still lies within the limit
+        hi = min(len(energies), (limit - frame_len // 2) // frame_len + 1)
+        if hi > lo:
+            quietest = lo + int(np.argmin(energies[lo:hi]))
+            boundary = quietest * frame_len + frame_len // 2
+        else:
+            boundary = limit
+        boundaries.append(max(boundary, boundaries[-1] + frame_len))
+    boundaries.append(info.n_frames)
+
+    chunks = []
+    for core_start, core_end in zip(boundaries[:-1], boundaries[1:]):
+        chunks.append((core_start, core_end,
+                       max(0, core_start - pad), min(info.n_frames, core_end + pad)))
+    return chunks
+
+
+# Per-process Whisper model used by pool workers
+_worker_model = None
+_worker_options = {}
+
+
+def _init_worker(model_name, threads_per_worker, options):
+    """Load one Whisper model per worker process"""
+    global _worker_model, _worker_options
+    import torch
+    import whisper
+    if threads_per_worker:
+        torch.set_num_threads(threads_per_worker)
+    _worker_model = whisper.load_model(model_name, device="cpu")
+    _worker_options = options
+
+
+def _transcribe_chunk(info, chunk):
+    """Transcribe one chunk and return segments with absolute timestamps"""
+    core_start, core_end, decode_start, decode_end = chunk
+    audio = load_segment(info, decode_start, decode_end)
+    result = _worker_model.transcribe(audio, fp16=False, **_worker_options)
+
+    offset = decode_start / float(info.rate)
+    core_lo = core_start / float(info.rate)
+    core_hi = core_end / float(info.rate)
+    segments = []
+    for seg in result.get("segments", []):
+        start = offset + seg["start"]
+        end = offset + seg["end"]
+        # Each overlapped segment belongs to the chunk whose core holds its midpoint
+        midpoint = (start + end) / 2
+        if core_lo <= midpoint < core_hi or (core_end == info.n_frames and midpoint >= core_hi):
+            text = seg["text"].strip()
+            if text:
+                segments.append({"start": round(start, 3), "end": round(end, 3), "text": text})
+    return segments
+
+
+def iter_wav_inputs(inputs, root=None):
+    """Expand files and directories into a sorted list of WAV paths
+
+    With ``root``, inputs are resolved relative to it and anything outside it
+    (including symlinks pointing out) is skipped.
+    """
+    root = Path(root).expanduser().resolve() if root else None
+
+    def allowed(path):
+        if root is None:
+            return True
+        try:
+            path.resolve().relative_to(root)  # Path.is_relative_to is 3.9+
+            return True
+        except ValueError:
+            return False
+
+    for item in inputs:
+        path = Path(item).expanduser()
+        if root is not None:
+            path = root / path
+        if not allowed(path):
+            logger.warning(f"⚠️ Skipping input outside {root}: {item}")
+        elif path.is_dir():
+            yield from sorted(p for p in path.rglob("*") if p.is_file() and p.suffix.lower() == ".wav" and allowed(p))
+        elif path.is_file():
+            yield path
+        else:
+            logger.warning(f"⚠️ Skipping missing input: {path}")
+
+
+class BatchTranscriber:
+    """Process pool that transcribes WAV chunks in parallel"""
+
+    def __init__(self, model_name="base", workers=None, threads_per_worker=None, language=None,
+                 chunk_seconds=30.0, overlap_seconds=1.0):
+        if not WHISPER_AVAILABLE:
+            raise RuntimeError("Whisper not available - install with: pip install openai-whisper")
+
+        cpus = os.cpu_count() or 1
+        self.workers = workers or max(1, cpus // 2)
+        threads = threads_per_worker or max(1, cpus // self.workers)
+        options = {"language": language} if language else {}
+        self.chunk_seconds = chunk_seconds
+        self.overlap_seconds = overlap_seconds
+
+        logger.info(f"🔄 Starting {self.workers} Whisper {model_name} workers ({threads} threads each)...")
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(model_name, threads, options),
+        )
+
+    def _chunk_jobs(self, paths):
+        """Plan chunks file by file, yielding ``(file, chunk_or_None, error)``"""
+        for path in paths:
+            try:
+                info = read_wav_info(path)
+            except (OSError, ValueError) as e:
+                logger.error(f"❌ Cannot read {path}: {e}")
+                yield str(path), None, str(e)
+                continue
+            for chunk in plan_chunks(info, self.chunk_seconds, self.overlap_seconds):
+                yield info, chunk, None
+
+    def transcribe(self, paths):
+        """Yield one result dict per segment, in file and time order
+
+        Chunks from consecutive files share one bounded submission window, so
+        short files don't leave workers idle and nothing is planned far ahead
+        of what has been written out.
+        """
+        pending = deque()
+        window = self.workers * 2
+
+        for info, chunk, error in self._chunk_jobs(paths):
+            if error is not None:
+                pending.append((info, None, error))
+            else:
+                pending.append((info.path, self.pool.submit(_transcribe_chunk, info, chunk), None))
+            while len(pending) > window:
+                yield from self._results(*pending.popleft())
+
+        while pending:
+            yield from self._results(*pending.popleft())
+
+    @staticmethod
+    def _results(path, future, error):
+        if future is None:
+            yield {"file": path, "error": error}
+            return
+        try:
+            for segment in future.result():
+                yield {"file": path, **segment}
+        except Exception as e:
+            logger.error(f"❌ Chunk failed in {path}: {e}")
+            yield {"file": path, "error": str(e)}
+
+    def transcribe_jsonl(self, paths):
+        """Same as ``transcribe`` but framed as JSON lines"""
+        for result in self.transcribe(paths):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+
+    def shutdown(self):
+        if sys.version_info >= (3, 9):
+            self.pool.shutdown(wait=False, cancel_futures=True)
+        else:
+            self.pool.shutdown(wait=False)
+
+
+# Global transcriber, created on first use by the server
+batch_transcriber = None
+
+
+def get_batch_transcriber():
+    """Return the shared transcriber, starting the pool on first call"""
+    global batch_transcriber
+
+    if batch_transcriber is None:
+        batch_transcriber = BatchTranscriber(
+            model_name=os.environ.get("JARVIS_TRANSCRIBE_MODEL", "base"),
+            workers=int(os.environ.get("JARVIS_TRANSCRIBE_WORKERS", "0")) or None,
+            language=os.environ.get("JARVIS_TRANSCRIBE_LANGUAGE") or None,
+        )
+    return batch_transcriber
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe WAV files or directories to JSONL with Whisper")
+    parser.add_argument("inputs", nargs="+", help="WAV files or directories containing WAV files")
+    parser.add_argument("-o", "--output", help="JSONL output file (default: stdout)")
+    parser.add_argument("--model", default="base", help="Whisper model name (default: base)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: half the cores)")
+    parser.add_argument("--threads-per-worker", type=int, default=None, help="Torch threads per worker")
+    parser.add_argument("--language", default=None, help="Force a language code, e.g. en or hi")
+    parser.add_argument("--chunk-seconds", type=float, default=30.0, help="Target chunk length (default: 30)")
+    parser.add_argument("--overlap-seconds", type=float, default=1.0, help="Overlap between chunks (default: 1)")
+    args = parser.parse_args()
+
+    transcriber = BatchTranscriber(
+        model_name=args.model,
+        workers=args.workers,
+        threads_per_worker=args.threads_per_worker,
+        language=args.language,
+        chunk_seconds=args.chunk_seconds,
+        overlap_seconds=args.overlap_seconds,
+    )
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for line in transcriber.transcribe_jsonl(iter_wav_inputs(args.inputs)):
+            out.write(line)
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        transcriber.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -39,6 +39,10 @@ class StreamingWhisperRecognizer:
         self.is_recording = False
         self.audio_buffer = []
         self._recording_thread = None
+        # (name, start_us, end_us) phases of the last stop_recording call, for tracing
+        self.last_timings = []
+        # One transcription at a time: push-to-talk and the wake word listener share the model
+        self.transcribe_lock = threading.Lock()
         # Temporary directory for audio processing
         self.temp_dir = Path(tempfile.gettempdir()) / "jarvis_whisper"
         self.temp_dir.mkdir(exist_ok=True)
@@ -162,6 +166,13 @@ class StreamingWhisperRecognizer:
         if not self.is_recording:
             return ""
         
+        with self.transcribe_lock:
+            return self._stop_and_transcribe()
+
+    def _stop_and_transcribe(self):
+        self.last_timings = []
+        stop_start = time.perf_counter_ns() // 1000
+        
         # Stop background recording thread
         self.is_recording = False
         if self._recording_thread:
@@ -188,19 +199,25 @@ class StreamingWhisperRecognizer:
             # Convert audio data to numpy array
             audio_data = np.frombuffer(b''.join(self.audio_buffer), dtype=np.int16)
             audio_data = audio_data.astype(np.float32) / 32768.0  # Normalize to [-1, 1]
-            
-            # Process with Whisper
-            logger.info("🔄 Processing audio with Whisper...")
-            result = self.model.transcribe(audio_data, language="en", fp16=False)
-            
-            text = result["text"].strip()
-            logger.info(f"🎯 Transcribed: {text}")
-            
-            return text
-            
+
+            self.last_timings.append(("whisper.stop_stream", stop_start, time.perf_counter_ns() // 1000))
+            return self.transcribe_audio(audio_data)
+
         except Exception as e:
             logger.error(f"❌ Error processing audio: {e}")
             return ""
+
+    def transcribe_audio(self, audio_data, timings=None):
+        """Transcribe float32 16kHz audio with Whisper; the caller holds ``transcribe_lock``"""
+        logger.info("🔄 Processing audio with Whisper...")
+        transcribe_start = time.perf_counter_ns() // 1000
+        result = self.model.transcribe(audio_data, language="en", fp16=False)
+        (self.last_timings if timings is None else timings).append(("whisper.transcribe", transcribe_start, time.perf_counter_ns() // 1000))
+
+        text = result["text"].strip()
+        logger.info(f"🎯 Transcribed: {text}")
+
+        return text
     
     def record_chunk(self):
         """Record a chunk of audio data"""
@@ -241,8 +258,143 @@ class StreamingWhisperRecognizer:
             except:
                 pass
 
+class WakeWordListener:
+    """Always-on wake word mode: a cheap keyword spotter listens on the
+    capture ring and Whisper only runs on the command that follows "Jarvis"
+    """
+
+    def __init__(self, recognizer, detector, max_command_seconds=8.0, silence_seconds=1.0,
+                 on_transcription=None):
+        self.recognizer = recognizer
+        self.detector = detector
+        self.max_command_seconds = max_command_seconds
+        self.silence_seconds = silence_seconds
+        self.on_transcription = on_transcription
+        self.is_listening = False
+        self.state = "stopped"
+        self._thread = None
+        self._stream = None
+
+        # Results, polled by the server
+        self.detections = 0
+        self.last_text = ""
+        self.last_seq = 0
+        self.last_detection_at = None
+        self.last_transcribe_ms = None
+
+    def start(self):
+        """Open the microphone and start spotting in the background"""
+        if self.is_listening:
+            return True
+        if not self.recognizer.audio or not self.recognizer.model:
+            logger.error("❌ Audio or Whisper model not available")
+            return False
+        try:
+            self._stream = self.recognizer.audio.open(
+                format=self.recognizer.FORMAT,
+                channels=self.recognizer.CHANNELS,
+                rate=self.recognizer.RATE,
+                input=True,
+                frames_per_buffer=self.recognizer.CHUNK
+            )
+        except Exception as e:
+            logger.error(f"❌ Failed to open microphone for wake word: {e}")
+            return False
+        self.is_listening = True
+        self.detector.reset()
+        self._thread = threading.Thread(target=self._listen_loop, daemon=True, name="wake-word")
+        self._thread.start()
+        logger.info("👂 Wake word listener started - say 'Jarvis'")
+        return True
+
+    def stop(self):
+        self.is_listening = False
+        if self._thread:
+            self._thread.join(timeout=1.0)
+        if self._stream:
+            try:
+                self._stream.stop_stream()
+                self._stream.close()
+            except Exception:
+                pass
+            self._stream = None
+        self.state = "stopped"
+        logger.info("🔇 Wake word listener stopped")
+
+    def _read(self):
+        data = self._stream.read(self.recognizer.CHUNK, exception_on_overflow=False)
+        return np.frombuffer(data, dtype=np.int16)
+
+    def _listen_loop(self):
+        # The same stream keeps running through the command so no audio is lost
+        # between the wake word and what follows it
+        while self.is_listening:
+            self.state = "listening"
+            try:
+                if not self.detector.feed(self._read()):
+                    continue
+                self.detections += 1
+                self.last_detection_at = time.time()
+                logger.info(f"🎯 Wake word detected (distance {self.detector.last_distance:.3f})")
+                self.state = "recording"
+                command = self._capture_command()
+                self.state = "transcribing"
+                self._transcribe(command)
+                self.detector.reset()
+            except Exception as e:
+                logger.error(f"❌ Error in wake word loop: {e}")
+                time.sleep(0.1)
+
+    def _capture_command(self):
+        """Read until trailing silence or the command length limit"""
+        chunks = []
+        chunk_seconds = self.recognizer.CHUNK / float(self.recognizer.RATE)
+        silent_for = 0.0
+        heard_speech = False
+        elapsed = 0.0
+        while self.is_listening and elapsed < self.max_command_seconds:
+            samples = self._read().astype(np.float32) / 32768.0
+            chunks.append(samples)
+            elapsed += chunk_seconds
+            if np.sqrt(np.mean(samples * samples)) < self.detector.energy_threshold:
+                silent_for += chunk_seconds
+                # Give the speaker a moment to start after the wake word
+                if silent_for >= self.silence_seconds and (heard_speech or elapsed >= 2 * self.silence_seconds):
+                    break
+            else:
+                heard_speech = True
+                silent_for = 0.0
+        return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+
+    def _transcribe(self, audio_data):
+        if len(audio_data) == 0:
+            return
+        with self.recognizer.transcribe_lock:
+            start = time.perf_counter()
+            # Own timings list, so /api/whisper/stop keeps its trace phases
+            text = self.recognizer.transcribe_audio(audio_data, timings=[])
+            self.last_transcribe_ms = round((time.perf_counter() - start) * 1000, 1)
+        if text:
+            self.last_text = text
+            self.last_seq += 1
+            if self.on_transcription:
+                self.on_transcription(text)
+
+    def status(self):
+        return {
+            "listening": self.is_listening,
+            "state": self.state,
+            "detections": self.detections,
+            "last_detection_at": self.last_detection_at,
+            "last_transcription": self.last_text,
+            "seq": self.last_seq,
+            "last_transcribe_ms": self.last_transcribe_ms,
+            "spotter": self.detector.stats(),
+        }
+
 # Global Whisper instance
 whisper_recognizer = None
+wake_listener = None
 
 def initialize_whisper(model_name="base"):
     """Initialize Whisper recognizer"""
@@ -291,6 +443,12 @@ def stop_whisper_recording():
     
     return whisper_recognizer.stop_recording()
 
+def whisper_stop_timings():
+    """Phase timings of the most recent stop/transcribe, for request tracing"""
+    if not whisper_recognizer:
+        return []
+    return list(whisper_recognizer.last_timings)
+
 def record_whisper_chunk():
     """Record a chunk for continuous listening"""
     global whisper_recognizer
@@ -298,6 +456,37 @@ def record_whisper_chunk():
     if whisper_recognizer and whisper_recognizer.is_recording:
         whisper_recognizer.record_chunk()
 
+def start_wake_word(on_transcription=None, templates_dir=None):
+    """Start always-on wake word mode; Whisper runs only after "Jarvis" is heard"""
+    global wake_listener
+
+    if not whisper_recognizer:
+        return False
+    if wake_listener and wake_listener.is_listening:
+        return True
+
+    from wake_word import WakeWordDetector, load_templates, WAKE_TEMPLATES_DIR
+
+    templates = load_templates(templates_dir or WAKE_TEMPLATES_DIR)
+    if not templates:
+        logger.error(f"❌ No wake word templates in {templates_dir or WAKE_TEMPLATES_DIR} - "
+                     "record some with: python src/core/wake_word.py enroll")
+        return False
+    wake_listener = WakeWordListener(whisper_recognizer, WakeWordDetector(templates),
+                                     on_transcription=on_transcription)
+    return wake_listener.start()
+
+def stop_wake_word():
+    """Stop wake word mode"""
+    if wake_listener:
+        wake_listener.stop()
+
+def wake_word_status():
+    """Listener state, last transcription and spotter cost figures"""
+    if not wake_listener:
+        return {"listening": False, "state": "stopped"}
+    return wake_listener.status()
+
 if __name__ == "__main__":
     # Test Whisper integration
     print("🤖 Testing Whisper Integration")
@@ -1,14 +1,24 @@
 #!/usr/bin/env python3
 """
 JARVIS Smart Model Downloader - Auto-selects optimal model for your system
-RTX 3050 Ti + 16GB RAM = Qwen2.5-7B Q3_K_M (Best Balance)
+Probes RAM, cores, SIMD and VRAM, then picks the best model/quant from the catalog
 """
 
 import os
 import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import logging
+from model_selector import (
+    MODEL_CATALOG, DEFAULT_TARGET_TOKENS_PER_SECOND, probe_hardware, select_model,
+    benchmark_model, record_decision,
+)
 
 # Configure logging
 logging.basicConfig(
@@ -17,46 +27,269 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def download_file(url, destination):
-    """Download a file with progress tracking"""
+DEFAULT_BASE_URL = "https://huggingface.co"
+DEFAULT_CONNECTIONS = 4
+DEFAULT_BUFFER_SIZE = 1024 * 1024           # 1 MB reads/writes instead of 8 KB
+SEGMENT_SIZE = 64 * 1024 * 1024             # Unit of work and of resume bookkeeping
+CHECKPOINT_INTERVAL = 1.0                   # Seconds between sidecar checkpoints
+MAX_RETRIES = 5
+
+
+def model_url(repo, filename, base_url=None):
+    """Build a download URL, honouring a configured mirror/base URL"""
+    base = (base_url or os.environ.get("JARVIS_MODEL_MIRROR") or DEFAULT_BASE_URL).rstrip("/")
+    return f"{base}/{repo}/resolve/main/{filename}"
+
+
+def _probe(session, url):
+    """Return (size, accepts_ranges, etag, sha256) for ``url``"""
+    response = session.head(url, allow_redirects=True, timeout=30)
+    response.raise_for_status()
+    size = int(response.headers.get('content-length', 0))
+    accepts_ranges = response.headers.get('accept-ranges', '').lower() == 'bytes'
+    etag = response.headers.get('etag')
+
+    # Hugging Face reports the LFS object's SHA-256 as the linked etag on the
+    # resolve/ redirect, not on the CDN response it points to
+    sha256 = None
+    for hop in [*response.history, response]:
+        linked = (hop.headers.get('x-linked-etag') or '').strip('"').lower()
+        if len(linked) == 64 and all(c in '0123456789abcdef' for c in linked):
+            sha256 = linked
+            break
+    return size, accepts_ranges, etag, sha256
+
+
+def _write_checkpoint(sidecar_path, state):
+    tmp_path = sidecar_path.with_suffix(sidecar_path.suffix + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, sidecar_path)
+
+
+def _load_checkpoint(sidecar_path, url, size, etag):
+    """Return saved segments if the sidecar matches this exact remote file"""
     try:
-        print(f"🔽 Starting download from: {url}")
-        response = requests.get(url, stream=True)
+        with open(sidecar_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # The mirror may differ between runs; the file name, size and etag identify the object
+    if (state.get("name") != url.rsplit("/", 1)[-1] or state.get("size") != size
+            or state.get("etag") != etag):
+        return None
+    return state.get("segments")
+
+
+def sha256_file(path, buffer_size=DEFAULT_BUFFER_SIZE):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(buffer_size)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _download_segment(url, part_path, segment, progress, lock, buffer_size, stop):
+    """Fetch one byte range, retrying from the last written offset"""
+    start, end = segment["start"], segment["end"]
+    session = requests.Session()
+    attempt = 0
+
+    while segment["done"] < end - start + 1 and not stop.is_set():
+        offset = start + segment["done"]
+        try:
+            headers = {"Range": f"bytes={offset}-{end}"}
+            with session.get(url, headers=headers, stream=True, timeout=60) as response:
+                if response.status_code != 206:
+                    raise IOError(f"server ignored range request (HTTP {response.status_code})")
+                with open(part_path, 'r+b') as f:
+                    f.seek(offset)
+                    for chunk in response.iter_content(chunk_size=buffer_size):
+                        if stop.is_set():
+                            return
+                        if chunk:
+                            f.write(chunk)
+                            f.flush()
+                            with lock:
+                                segment["done"] += len(chunk)
+                                progress[0] += len(chunk)
+            attempt = 0
+        except Exception as e:
+            attempt += 1
+            if attempt > MAX_RETRIES:
+                raise
+            logger.warning(f"⚠️ Segment {start}-{end} failed ({e}), retry {attempt}/{MAX_RETRIES}")
+            time.sleep(min(30, 2 ** attempt))
+
+
+def _download_single(session, url, part_path, buffer_size, total_size):
+    """Plain streaming download for servers without range support"""
+    downloaded = 0
+    with session.get(url, stream=True, timeout=60) as response:
         response.raise_for_status()
-        
-        total_size = int(response.headers.get('content-length', 0))
-        downloaded = 0
-        
-        with open(destination, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
+        with open(part_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=buffer_size):
                 if chunk:
                     f.write(chunk)
                     downloaded += len(chunk)
-                    
-                    if total_size > 0:
-                        percent = (downloaded / total_size) * 100
-                        mb_downloaded = downloaded / (1024 * 1024)
-                        mb_total = total_size / (1024 * 1024)
-                        print(f"\r🔽 Progress: {percent:.1f}% ({mb_downloaded:.1f}/{mb_total:.1f} MB)", end='', flush=True)
-        
-        print(f"\n✅ Downloaded: {destination}")
+                    _print_progress(downloaded, total_size)
+
+
+def _print_progress(downloaded, total_size, rate=None):
+    mb_downloaded = downloaded / (1024 * 1024)
+    speed = f" @ {rate / (1024 * 1024):.1f} MB/s" if rate else ""
+    if total_size > 0:
+        percent = (downloaded / total_size) * 100
+        mb_total = total_size / (1024 * 1024)
+        print(f"\r🔽 Progress: {percent:.1f}% ({mb_downloaded:.1f}/{mb_total:.1f} MB){speed}   ", end='', flush=True)
+    else:
+        print(f"\r🔽 Downloaded: {mb_downloaded:.1f} MB{speed}   ", end='', flush=True)
+
+
+def download_file(url, destination, connections=DEFAULT_CONNECTIONS, buffer_size=DEFAULT_BUFFER_SIZE,
+                  expected_sha256=None, require_sha256=True):
+    """Download a file with parallel range requests, resume and verification
+
+    Data goes to ``<destination>.part`` with progress checkpointed in
+    ``<destination>.part.json``; an interrupted run picks up where it left off.
+    The file is only renamed to ``destination`` after its SHA-256 checks out.
+    Without a known SHA-256 the download is refused unless ``require_sha256``
+    is False.
+    """
+    destination = Path(destination)
+    part_path = destination.with_name(destination.name + ".part")
+    sidecar_path = destination.with_name(destination.name + ".part.json")
+
+    try:
+        print(f"🔽 Starting download from: {url}")
+        session = requests.Session()
+        total_size, accepts_ranges, etag, remote_sha256 = _probe(session, url)
+        expected_sha256 = (expected_sha256 or remote_sha256 or "").lower() or None
+        if expected_sha256 is None and require_sha256:
+            logger.error("❌ The server published no SHA-256 for this file; pass --sha256, "
+                         "or --no-verify to download it unverified")
+            return False
+
+        if not accepts_ranges or total_size <= 0:
+            logger.info("ℹ️ Server does not support range requests; downloading in one stream (no resume)")
+            _download_single(session, url, part_path, buffer_size, total_size)
+        else:
+            segments = _load_checkpoint(sidecar_path, url, total_size, etag) if part_path.exists() else None
+            if segments:
+                resumed = sum(seg["done"] for seg in segments)
+                print(f"⏯️ Resuming: {resumed / (1024 * 1024):.1f} MB already downloaded")
+            else:
+                segments = [
+                    {"start": start, "end": min(start + SEGMENT_SIZE, total_size) - 1, "done": 0}
+                    for start in range(0, total_size, SEGMENT_SIZE)
+                ]
+                with open(part_path, 'wb') as f:
+                    f.truncate(total_size)
+
+            state = {"name": url.rsplit("/", 1)[-1], "size": total_size, "etag": etag, "segments": segments}
+            lock = threading.Lock()
+            stop = threading.Event()
+            progress = [sum(seg["done"] for seg in segments)]
+            todo = [seg for seg in segments if seg["done"] < seg["end"] - seg["start"] + 1]
+
+            with open(part_path, 'r+b') as sync_handle, \
+                    ThreadPoolExecutor(max_workers=max(1, connections)) as pool:
+                futures = [
+                    pool.submit(_download_segment, url, part_path, seg, progress, lock, buffer_size, stop)
+                    for seg in todo
+                ]
+                last_bytes, last_time = progress[0], time.time()
+                try:
+                    while not all(f.done() for f in futures):
+                        time.sleep(CHECKPOINT_INTERVAL)
+                        # Counted bytes were written before their count; syncing under the
+                        # lock makes every byte the checkpoint claims durable
+                        with lock:
+                            os.fsync(sync_handle.fileno())
+                            _write_checkpoint(sidecar_path, state)
+                            downloaded = progress[0]
+                        now = time.time()
+                        _print_progress(downloaded, total_size, (downloaded - last_bytes) / (now - last_time))
+                        last_bytes, last_time = downloaded, now
+                    for f in futures:
+                        f.result()
+                finally:
+                    stop.set()
+                    with lock:
+                        os.fsync(sync_handle.fileno())
+                        _write_checkpoint(sidecar_path, state)
+            _print_progress(progress[0], total_size)
+
+        print()
+        if expected_sha256:
+            print("🔍 Verifying SHA-256...")
+            actual = sha256_file(part_path, buffer_size)
+            if actual != expected_sha256:
+                logger.error(f"❌ Checksum mismatch: expected {expected_sha256}, got {actual}")
+                part_path.unlink(missing_ok=True)
+                sidecar_path.unlink(missing_ok=True)
+                return False
+            print("✅ Checksum verified")
+        else:
+            logger.warning("⚠️ Verification disabled (--no-verify); file not checked")
+
+        os.replace(part_path, destination)
+        sidecar_path.unlink(missing_ok=True)
+        print(f"✅ Downloaded: {destination}")
         return True
         
     except Exception as e:
+        print()
         logger.error(f"❌ Download failed: {e}")
+        if part_path.exists() and sidecar_path.exists():
+            logger.info("💡 Progress saved; run the downloader again to resume")
         return False
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Download the JARVIS GGUF model")
+    parser.add_argument("--mirror", default=None,
+                        help=f"Base URL of a model mirror (default: $JARVIS_MODEL_MIRROR or {DEFAULT_BASE_URL})")
+    parser.add_argument("--connections", type=int, default=DEFAULT_CONNECTIONS,
+                        help=f"Parallel HTTP range connections (default: {DEFAULT_CONNECTIONS})")
+    parser.add_argument("--buffer-mb", type=float, default=DEFAULT_BUFFER_SIZE / (1024 * 1024),
+                        help="Read/write buffer size in MB (default: 1)")
+    parser.add_argument("--sha256", default=None,
+                        help="Expected SHA-256 (default: taken from the server when available)")
+    parser.add_argument("--no-verify", action="store_true",
+                        help="Allow downloading when no SHA-256 is known (e.g. a mirror without checksums)")
+    parser.add_argument("--target-tps", type=float, default=DEFAULT_TARGET_TOKENS_PER_SECOND,
+                        help=f"Minimum decode speed in tokens/s (default: {DEFAULT_TARGET_TOKENS_PER_SECOND})")
+    parser.add_argument("--model", default=None,
+                        help="Skip auto-selection and download this catalog key")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="Run a short local generation after download to confirm the choice")
+    return parser.parse_args()
+
+def print_selection(hardware, model, estimates, target):
+    print("🎯 System Analysis:")
+    gpu = f"{hardware['gpu']} ({hardware['gpu_free_gb']:.1f}GB free VRAM)" if hardware["gpu"] else "None detected"
+    print(f"   • GPU: {gpu}")
+    print(f"   • RAM: {hardware['ram_available_gb']:.1f} GB available of {hardware['ram_total_gb']:.1f} GB")
+    print(f"   • CPU: {hardware['cores']} cores, SIMD {hardware['simd'].upper()}, "
+          f"~{hardware['memory_bandwidth_gbs']:.1f} GB/s memory bandwidth")
+    print(f"   • Latency target: {target:.1f} tokens/s")
+    print()
+    print("📋 Candidates:")
+    for row in estimates:
+        marker = "👉" if model and row["key"] == model["key"] else "  "
+        fit = "fits" if row["fits"] else "too big"
+        print(f"   {marker} {row['key']:<22} {row['memory_gb']:>5.1f} GB  "
+              f"~{row['tokens_per_second']:>5.1f} tok/s  {row['device']:<3}  {fit}")
+    print()
+
 def main():
-    """Smart download for RTX 3050 Ti system"""
+    """Smart download: probe this machine and fetch the best model for it"""
+    args = parse_args()
     print("🤖 JARVIS Smart Model Downloader")
     print("=" * 50)
-    print("🎯 System Analysis:")
-    print("   • GPU: RTX 3050 Ti Laptop (4GB VRAM)")
-    print("   • RAM: 16 GB")
-    print("   • Optimal Model: Qwen2.5-7B Q3_K_M")
-    print("   • Size: 3.81 GB")
-    print("   • Performance: Excellent balance for your GPU")
-    print()
     
     # Create models directory at project root
     # (__file__ is src/utils/download_model.py, so go up three levels to workspace root)
@@ -64,46 +297,82 @@ def main():
     models_dir = project_root / "models"
     models_dir.mkdir(exist_ok=True)
     
-    # Optimal model for RTX 3050 Ti
-    model = {
-        "name": "Qwen2.5-7B Q3_K_M (RTX 3050 Ti Optimized)",
-        "file": "qwen2.5-7b-instruct-q3_k_m.gguf",
-        "url": "https://huggingface.co/Qwen/Qwen2.5-7B-Instruct-GGUF/resolve/main/qwen2.5-7b-instruct-q3_k_m.gguf",
-        "size": "3.81 GB"
-    }
+    # Pick the model for this hardware
+    hardware = probe_hardware()
+    if args.model:
+        model = next((m for m in MODEL_CATALOG if m["key"] == args.model), None)
+        if model is None:
+            print(f"❌ Unknown model '{args.model}'. Choose from: {', '.join(m['key'] for m in MODEL_CATALOG)}")
+            return
+        _, estimates = select_model(hardware, args.target_tps)
+    else:
+        model, estimates = select_model(hardware, args.target_tps)
+    print_selection(hardware, model, estimates, args.target_tps)
+    
+    if model is None:
+        print("❌ No catalog model fits in available memory. Close other applications or use --model.")
+        return
+    
+    chosen = next(row for row in estimates if row["key"] == model["key"])
+    print(f"🎯 Optimal Model: {model['name']} (~{model['size_gb']:.2f} GB, "
+          f"~{chosen['tokens_per_second']:.1f} tok/s on {chosen['device'].upper()})")
+    print()
     
     model_path = models_dir / model["file"]
+    decision = {
+        "model": model["key"],
+        "file": model["file"],
+        "selected_by": "user" if args.model else "auto",
+        "target_tokens_per_second": args.target_tps,
+        "hardware": hardware,
+        "estimates": estimates,
+        "timestamp": time.time(),
+    }
     
     # Check if model already exists
     if model_path.exists():
         print(f"✅ Model already exists: {model_path}")
         print(f"📊 File size: {model_path.stat().st_size / (1024*1024*1024):.2f} GB")
-        print("\n🚀 Model ready! Start your JARVIS server:")
-        print("   run_jarvis_llamacpp.bat")
-        return
-    
-    print("🔽 Downloading optimal model for your system...")
-    print(f"📁 Destination: {model_path}")
-    print("⏳ This will take 5-10 minutes depending on your internet speed...")
-    print()
-    
-    # Download the optimal model
-    if download_file(model["url"], model_path):
+    else:
+        print("🔽 Downloading optimal model for your system...")
+        print(f"📁 Destination: {model_path}")
+        print("⏳ This will take 5-10 minutes depending on your internet speed...")
+        print()
+        
+        url = model_url(model["repo"], model["file"], args.mirror)
+        if not download_file(url, model_path, connections=args.connections,
+                             buffer_size=int(args.buffer_mb * 1024 * 1024), expected_sha256=args.sha256,
+                             require_sha256=not args.no_verify):
+            print("❌ Download failed. Please check your internet connection and try again.")
+            print("💡 Re-running the downloader resumes from the last checkpoint.")
+            return
+        
         print(f"\n🎉 SUCCESS! Optimal model downloaded!")
         print(f"📁 Location: {model_path}")
         print(f"📊 Size: {model_path.stat().st_size / (1024*1024*1024):.2f} GB")
+    
+    # Optionally confirm the estimate with a real generation
+    if args.benchmark:
         print()
-        print("🚀 Next Steps:")
-        print("   1. Start server: run_jarvis_llamacpp.bat")
-        print("   2. Open browser: http://localhost:5000/")
-        print("   3. Enjoy ultra-fast AI responses!")
-        print()
-        print("⚡ Expected Performance:")
-        print("   • Response time: 0.5-2 seconds")
-        print("   • Quality: Excellent (Qwen2.5 latest)")
-        print("   • GPU utilization: Optimal for RTX 3050 Ti")
-    else:
-        print("❌ Download failed. Please check your internet connection and try again.")
+        print("⏱️ Running micro-benchmark...")
+        try:
+            result = benchmark_model(model_path, use_gpu=chosen["device"] == "gpu")
+            decision["benchmark"] = result
+            print(f"   • Load: {result['load_seconds']:.1f}s, first token: {result['first_token_seconds']:.2f}s")
+            print(f"   • Decode: {result['tokens_per_second']:.1f} tok/s (estimated {chosen['tokens_per_second']:.1f})")
+            if result["tokens_per_second"] < args.target_tps:
+                print("⚠️ Below the latency target; consider a smaller model with --model or a lower --target-tps")
+        except Exception as e:
+            decision["benchmark"] = {"error": str(e)}
+            logger.error(f"❌ Benchmark failed: {e}")
+    
+    path = record_decision(model_path, decision)
+    print(f"📝 Selection recorded: {path}")
+    print()
+    print("🚀 Next Steps:")
+    print("   1. Start server: scripts\\start.bat")
+    print("   2. Open browser: http://localhost:5000/")
+    print("   3. Enjoy ultra-fast AI responses!")
 
 if __name__ == "__main__":
     main()
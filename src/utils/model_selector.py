@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+JARVIS Model Selector - Probes this machine and picks the best GGUF model/quant
+Estimates memory and decode speed per catalog entry against a latency target
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+from pathlib import Path
+
+GB = 1024 ** 3
+
+# Decode is memory-bandwidth bound: every generated token streams the whole
+# weight file once. Efficiency factors turn raw bandwidth into what
+# llama.cpp actually achieves with each instruction set.
+SIMD_EFFICIENCY = {"avx512": 0.75, "avx2": 0.65, "neon": 0.6, "avx": 0.4, "none": 0.2}
+GPU_EFFECTIVE_BANDWIDTH = 120 * GB     # Conservative for laptop-class NVIDIA GPUs
+RAM_HEADROOM = 0.8                     # Leave room for the OS, Whisper and the browser
+VRAM_HEADROOM = 0.9
+RUNTIME_OVERHEAD = 0.35 * GB           # llama.cpp scratch buffers and Python process
+DEFAULT_CONTEXT = 2048                 # Matches n_ctx in server.py
+DEFAULT_TARGET_TOKENS_PER_SECOND = 8.0
+
+# Model catalog: file sizes in GB, architecture for KV-cache sizing,
+# quality as a rough relative score used to rank models that meet the target
+MODEL_CATALOG = [
+    {
+        "key": "qwen2.5-7b-q4_k_m",
+        "name": "Qwen2.5-7B Q4_K_M",
+        "repo": "bartowski/Qwen2.5-7B-Instruct-GGUF",
+        "file": "Qwen2.5-7B-Instruct-Q4_K_M.gguf",
+        "size_gb": 4.68, "layers": 28, "kv_heads": 4, "head_dim": 128, "quality": 7.0 * 0.95,
+    },
+    {
+        "key": "qwen2.5-7b-q3_k_m",
+        "name": "Qwen2.5-7B Q3_K_M",
+        "repo": "Qwen/Qwen2.5-7B-Instruct-GGUF",
+        "file": "qwen2.5-7b-instruct-q3_k_m.gguf",
+        "size_gb": 3.81, "layers": 28, "kv_heads": 4, "head_dim": 128, "quality": 7.0 * 0.88,
+    },
+    {
+        "key": "qwen2.5-3b-q8_0",
+        "name": "Qwen2.5-3B Q8_0",
+        "repo": "Qwen/Qwen2.5-3B-Instruct-GGUF",
+        "file": "qwen2.5-3b-instruct-q8_0.gguf",
+        "size_gb": 3.62, "layers": 36, "kv_heads": 2, "head_dim": 128, "quality": 3.0 * 1.0,
+    },
+    {
+        "key": "qwen2.5-3b-q4_k_m",
+        "name": "Qwen2.5-3B Q4_K_M",
+        "repo": "Qwen/Qwen2.5-3B-Instruct-GGUF",
+        "file": "qwen2.5-3b-instruct-q4_k_m.gguf",
+        "size_gb": 2.10, "layers": 36, "kv_heads": 2, "head_dim": 128, "quality": 3.0 * 0.95,
+    },
+    {
+        "key": "qwen2.5-1.5b-q4_k_m",
+        "name": "Qwen2.5-1.5B Q4_K_M",
+        "repo": "Qwen/Qwen2.5-1.5B-Instruct-GGUF",
+        "file": "qwen2.5-1.5b-instruct-q4_k_m.gguf",
+        "size_gb": 1.12, "layers": 28, "kv_heads": 2, "head_dim": 128, "quality": 1.5 * 0.95,
+    },
+    {
+        "key": "qwen2.5-0.5b-q4_k_m",
+        "name": "Qwen2.5-0.5B Q4_K_M",
+        "repo": "Qwen/Qwen2.5-0.5B-Instruct-GGUF",
+        "file": "qwen2.5-0.5b-instruct-q4_k_m.gguf",
+        "size_gb": 0.49, "layers": 24, "kv_heads": 2, "head_dim": 64, "quality": 0.5 * 0.95,
+    },
+]
+
+
+def _available_ram_bytes():
+    """Return (total, available) physical memory in bytes"""
+    if sys.platform.startswith("linux"):
+        info = {}
+        with open("/proc/meminfo") as f:
+            for line in f:
+                key, value = line.split(":", 1)
+                info[key] = int(value.split()[0]) * 1024
+        return info.get("MemTotal", 0), info.get("MemAvailable", info.get("MemFree", 0))
+
+    if sys.platform == "win32":
+        import ctypes
+
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [
+                ("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+            ]
+
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+        ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status))
+        return status.ullTotalPhys, status.ullAvailPhys
+
+    # macOS and other POSIX systems
+    page = os.sysconf("SC_PAGE_SIZE")
+    total = os.sysconf("SC_PHYS_PAGES") * page
+    try:
+        available = os.sysconf("SC_AVPHYS_PAGES") * page
+    except (ValueError, OSError):
+        available = total // 2
+    return total, available
+
+
+def _simd_level():
+    """Best SIMD extension llama.cpp can use on this CPU"""
+    machine = platform.machine().lower()
+    if machine in ("arm64", "aarch64"):
+        return "neon"
+
+    flags = set()
+    if sys.platform.startswith("linux"):
+        try:
+            with open("/proc/cpuinfo") as f:
+                for line in f:
+                    if line.startswith("flags"):
+                        flags.update(line.split(":", 1)[1].split())
+                        break
+        except OSError:
+            pass
+    elif sys.platform == "win32":
+        import ctypes
+        is_present = ctypes.windll.kernel32.IsProcessorFeaturePresent
+        # PF_AVX_INSTRUCTIONS_AVAILABLE=39, PF_AVX2=40, PF_AVX512F=41
+        for feature, flag in ((39, "avx"), (40, "avx2"), (41, "avx512f")):
+            if is_present(feature):
+                flags.add(flag)
+    elif sys.platform == "darwin":
+        try:
+            output = subprocess.run(["sysctl", "-n", "machdep.cpu.features", "machdep.cpu.leaf7_features"],
+                                    capture_output=True, text=True, timeout=5).stdout.lower()
+            flags.update(output.replace("avx2.0", "avx2").replace("avx1.0", "avx").split())
+        except (OSError, subprocess.SubprocessError):
+            pass
+
+    if "avx512f" in flags:
+        return "avx512"
+    if "avx2" in flags:
+        return "avx2"
+    if "avx" in flags:
+        return "avx"
+    return "none"
+
+
+def _gpu_memory_bytes():
+    """Free VRAM of the first NVIDIA GPU via nvidia-smi (no torch import)"""
+    try:
+        output = subprocess.run(
+            ["nvidia-smi", "--query-gpu=name,memory.free", "--format=csv,noheader,nounits"],
+            capture_output=True, text=True, timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None, 0
+    if output.returncode != 0 or not output.stdout.strip():
+        return None, 0
+    name, free_mb = output.stdout.strip().splitlines()[0].rsplit(",", 1)
+    return name.strip(), int(float(free_mb)) * 1024 * 1024
+
+
+def _memory_bandwidth(sample_bytes=64 * 1024 * 1024, repeats=3):
+    """Single-threaded memcpy bandwidth in bytes/s (best of a few copies)"""
+    # Both buffers are written up front so page faults aren't timed as bandwidth
+    source = bytearray(b"\x5a") * sample_bytes
+    target = bytearray(b"\x00") * sample_bytes
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        target[:] = source
+        best = min(best, time.perf_counter() - start)
+    return sample_bytes / best if best > 0 else 0
+
+
+def probe_hardware():
+    """Collect the facts the selector needs about this machine"""
+    total_ram, available_ram = _available_ram_bytes()
+    gpu_name, gpu_free = _gpu_memory_bytes()
+    cores = os.cpu_count() or 1
+    single_core_bandwidth = _memory_bandwidth()
+
+    # A few cores saturate the memory bus; more than that adds little for decode
+    cpu_bandwidth = single_core_bandwidth * min(cores, 4)
+
+    return {
+        "platform": platform.platform(),
+        "cpu": platform.processor() or platform.machine(),
+        "cores": cores,
+        "simd": _simd_level(),
+        "ram_total_gb": round(total_ram / GB, 2),
+        "ram_available_gb": round(available_ram / GB, 2),
+        "memory_bandwidth_gbs": round(cpu_bandwidth / GB, 2),
+        "gpu": gpu_name,
+        "gpu_free_gb": round(gpu_free / GB, 2),
+    }
+
+
+def estimate(model, hardware, n_ctx=DEFAULT_CONTEXT):
+    """Estimate resident memory and decode tokens/s for one catalog entry"""
+    weights = model["size_gb"] * GB
+    kv_cache = 2 * model["layers"] * model["kv_heads"] * model["head_dim"] * n_ctx * 2
+    memory = weights + kv_cache + RUNTIME_OVERHEAD
+
+    on_gpu = hardware["gpu_free_gb"] * GB * VRAM_HEADROOM >= weights + kv_cache
+    if on_gpu:
+        bandwidth = GPU_EFFECTIVE_BANDWIDTH
+        fits = hardware["ram_available_gb"] * GB * RAM_HEADROOM >= RUNTIME_OVERHEAD
+    else:
+        bandwidth = hardware["memory_bandwidth_gbs"] * GB * SIMD_EFFICIENCY[hardware["simd"]]
+        fits = hardware["ram_available_gb"] * GB * RAM_HEADROOM >= memory
+
+    return {
+        "key": model["key"],
+        "memory_gb": round(memory / GB, 2),
+        "device": "gpu" if on_gpu else "cpu",
+        "fits": fits,
+        "tokens_per_second": round(bandwidth / weights, 1),
+    }
+
+
+def select_model(hardware, target_tokens_per_second=DEFAULT_TARGET_TOKENS_PER_SECOND, catalog=MODEL_CATALOG):
+    """Pick the highest-quality model that fits memory and meets the speed target
+
+    Falls back to the fastest model that fits when nothing meets the target.
+    Returns ``(model, estimates)``; ``model`` is None if nothing fits at all.
+    """
+    estimates = [estimate(model, hardware) for model in catalog]
+    by_key = {model["key"]: model for model in catalog}
+
+    fitting = [e for e in estimates if e["fits"]]
+    if not fitting:
+        return None, estimates
+
+    meeting = [e for e in fitting if e["tokens_per_second"] >= target_tokens_per_second]
+    if meeting:
+        best = max(meeting, key=lambda e: by_key[e["key"]]["quality"])
+    else:
+        best = max(fitting, key=lambda e: e["tokens_per_second"])
+    return by_key[best["key"]], estimates
+
+
+def benchmark_model(model_path, n_tokens=32, use_gpu=False):
+    """Load the model with llama-cpp and time a short generation"""
+    from llama_cpp import Llama
+
+    start = time.perf_counter()
+    llm = Llama(model_path=str(model_path), n_ctx=512, n_gpu_layers=-1 if use_gpu else 0, verbose=False)
+    load_seconds = time.perf_counter() - start
+
+    first_token = None
+    generated = 0
+    start = time.perf_counter()
+    for token in llm("Describe the weather on Mars.", max_tokens=n_tokens, temperature=0.0, stream=True):
+        if first_token is None:
+            first_token = time.perf_counter() - start
+        generated += 1
+    total = time.perf_counter() - start
+
+    decode_seconds = total - (first_token or 0)
+    return {
+        "load_seconds": round(load_seconds, 2),
+        "first_token_seconds": round(first_token or 0, 3),
+        "tokens": generated,
+        "tokens_per_second": round((generated - 1) / decode_seconds, 1) if generated > 1 and decode_seconds > 0 else 0.0,
+    }
+
+
+def decision_path(model_path):
+    """Where the selection record for a model file lives"""
+    model_path = Path(model_path)
+    return model_path.with_name(model_path.name + ".selection.json")
+
+
+def record_decision(model_path, record):
+    path = decision_path(model_path)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+if __name__ == "__main__":
+    # Print what would be chosen on this machine
+    hw = probe_hardware()
+    print(json.dumps(hw, indent=2))
+    chosen, rows = select_model(hw)
+    for row in rows:
+        print(f"   {row['key']:<22} {row['memory_gb']:>5.1f} GB  {row['tokens_per_second']:>6.1f} tok/s  "
+              f"{row['device']}  {'fits' if row['fits'] else 'too big'}")
+    print(f"🎯 Selected: {chosen['name'] if chosen else 'nothing fits'}")
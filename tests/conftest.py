@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Modules import their siblings by bare name, as they do when run as scripts
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src" / "core"))
+sys.path.insert(0, str(ROOT / "src" / "utils"))
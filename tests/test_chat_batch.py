@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from chat_batch import completed_ids, completed_results, read_batch, run_batch
+
+
+class RecordingModel:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, prompt, max_tokens, stop, echo, stream):
+        self.calls.append((prompt, max_tokens))
+        return {"choices": [{"text": " ok", "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 3, "completion_tokens": 1}}
+
+
+def build_prompt(message, system_prompt="sys", hindi=False):
+    return f"{system_prompt}|{'hi' if hindi else 'en'}|{message}", []
+
+
+def test_item_max_tokens_only_lowers_the_limit(tmp_path):
+    items = read_batch([json.dumps({"id": "a", "message": "one", "max_tokens": 100000}),
+                        json.dumps({"id": "b", "message": "two", "max_tokens": 20})])
+    model = RecordingModel()
+    list(run_batch(model, items, build_prompt, tmp_path / "out.jsonl", {"max_tokens": 150}))
+    assert sorted(tokens for _, tokens in model.calls) == [20, 150]
+
+
+def test_hindi_is_fixed_per_batch_and_resume_skips_done(tmp_path):
+    output = tmp_path / "out.jsonl"
+    items = read_batch(['"first"', '"second"'])
+    model = RecordingModel()
+    list(run_batch(model, items[:1], build_prompt, output, {"max_tokens": 10}, hindi=True))
+    list(run_batch(model, items, build_prompt, output, {"max_tokens": 10}, hindi=True))
+    assert [prompt for prompt, _ in model.calls] == ["sys|hi|first", "sys|hi|second"]
+    assert completed_ids(output) == {"0", "1"}
+
+
+@pytest.mark.parametrize("line", ["[1, 2]", "5", "null"])
+def test_non_object_lines_are_rejected(line):
+    with pytest.raises(ValueError, match="line 2"):
+        read_batch(['"ok"', line])
+
+
+def test_replay_keeps_results_that_mention_error(tmp_path):
+    output = tmp_path / "out.jsonl"
+    output.write_text(
+        json.dumps({"id": "0", "message": 'say "error"', "response": "error"}) + "\n"
+        + json.dumps({"id": "1", "message": "x", "error": "boom"}) + "\n"
+        + '{"id": "2", "resp', encoding="utf-8")
+    assert [json.loads(line)["id"] for line in completed_results(output)] == ["0"]
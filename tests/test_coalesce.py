@@ -0,0 +1,85 @@
+import threading
+import time
+
+from coalesce import SingleFlight, coalesce_key
+
+
+class SlowProducer:
+    """Yields ``count`` events while holding ``lock``, like a generation holding MODEL_LOCK"""
+
+    def __init__(self, count=50, delay=0.01):
+        self.count = count
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.produced = 0
+        self.closed = threading.Event()
+
+    def __call__(self):
+        with self.lock:
+            try:
+                for index in range(self.count):
+                    time.sleep(self.delay)
+                    self.produced += 1
+                    yield f"event {index}"
+            finally:
+                self.closed.set()
+
+
+def test_identical_requests_share_one_generation():
+    flights = SingleFlight()
+    producer = SlowProducer(count=5)
+    key = coalesce_key("Hello  there", hindi=False)
+    first = flights.stream(key, producer)
+    second = flights.stream(coalesce_key("hello there", hindi=False), producer)
+    assert list(first) == list(second) == [f"event {i}" for i in range(5)]
+    assert flights.stats()["generations_started"] == 1
+    assert flights.stats()["requests_coalesced"] == 1
+
+
+def test_last_subscriber_leaving_stops_generation():
+    flights = SingleFlight()
+    producer = SlowProducer()
+    events = flights.stream("key", producer)
+    assert next(events) == "event 0"
+    events.close()
+
+    assert producer.closed.wait(1.0)
+    assert producer.produced < producer.count
+    assert producer.lock.acquire(timeout=1.0)
+    assert flights.stats()["generations_cancelled"] == 1
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_generation_continues_while_anyone_listens():
+    flights = SingleFlight()
+    producer = SlowProducer(count=10)
+    leaving = flights.stream("key", producer)
+    staying = flights.stream("key", producer)
+    next(leaving)
+    leaving.close()
+
+    assert list(staying) == [f"event {i}" for i in range(10)]
+    assert flights.stats()["generations_cancelled"] == 0
+
+
+def test_request_after_cancel_starts_fresh():
+    flights = SingleFlight()
+    first = SlowProducer()
+    events = flights.stream("key", first)
+    next(events)
+    events.close()
+
+    second = SlowProducer(count=3)
+    assert list(flights.stream("key", second)) == ["event 0", "event 1", "event 2"]
+    assert flights.stats()["generations_started"] == 2
+
+
+def test_join_only_attaches_to_a_running_generation():
+    flights = SingleFlight()
+    assert flights.join("key") is None
+    producer = SlowProducer(count=5)
+    leader = flights.stream("key", producer)
+    follower = flights.join("key")
+    assert list(follower) == list(leader) == [f"event {i}" for i in range(5)]
+    assert flights.stats()["generations_started"] == 1
+    assert flights.join("key") is None
@@ -0,0 +1,94 @@
+import pytest
+
+import degradation
+from degradation import FALLBACK_MODEL, INSTANT_ONLY, NORMAL, REJECT, SHORT_ANSWERS, DegradationPolicy
+
+
+class FakeLoad:
+    def __init__(self):
+        self.in_flight = 0
+        self.queued = 0
+        self.ttft_ms = None
+
+    def ttft_percentile(self, fraction, max_age=None):
+        return self.ttft_ms
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(degradation.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def load():
+    return FakeLoad()
+
+
+@pytest.fixture
+def policy(load, clock):
+    return DegradationPolicy(load, enabled=True, in_flight_thresholds=[4, 8, 16, 32],
+                             ttft_thresholds_ms=[2000, 4000, 8000, 15000],
+                             recovery_ratio=0.5, recovery_seconds=10)
+
+
+def test_escalates_straight_to_the_level_load_calls_for(policy, load):
+    load.in_flight = 9
+    assert policy.update() == FALLBACK_MODEL
+    load.in_flight = 40
+    assert policy.update() == REJECT
+
+
+def test_recovers_one_level_per_calm_period(policy, load, clock):
+    load.in_flight = 16
+    assert policy.update() == INSTANT_ONLY
+    load.in_flight = 1
+    assert policy.update() == INSTANT_ONLY
+    clock[0] += 9.9
+    assert policy.update() == INSTANT_ONLY
+    clock[0] += 0.1
+    assert policy.update() == FALLBACK_MODEL
+    clock[0] += 10
+    assert policy.update() == SHORT_ANSWERS
+    clock[0] += 10
+    assert policy.update() == NORMAL
+
+
+def test_load_between_recovery_and_entry_holds_the_level(policy, load, clock):
+    load.in_flight = 8
+    assert policy.update() == FALLBACK_MODEL
+    # Below the entry threshold (8) but not under half of it: no flapping back down
+    load.in_flight = 5
+    for _ in range(5):
+        clock[0] += 10
+        assert policy.update() == FALLBACK_MODEL
+    # A spike during the calm period restarts it
+    load.in_flight = 3
+    policy.update()
+    clock[0] += 6
+    load.in_flight = 5
+    policy.update()
+    load.in_flight = 3
+    clock[0] += 6
+    assert policy.update() == FALLBACK_MODEL
+    clock[0] += 10
+    assert policy.update() == SHORT_ANSWERS
+
+
+def test_ttft_counts_only_while_busy(policy, load, clock):
+    load.ttft_ms = 5000
+    assert policy.update() == NORMAL
+    load.queued = 1
+    assert policy.update() == FALLBACK_MODEL
+    # The burst has drained; its slow samples are still in the window
+    load.queued = 0
+    clock[0] += 10
+    policy.update()
+    clock[0] += 10
+    assert policy.update() == SHORT_ANSWERS
+
+
+def test_disabled_policy_stays_normal(load):
+    load.in_flight = 100
+    assert DegradationPolicy(load, enabled=False).update() == NORMAL
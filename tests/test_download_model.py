@@ -0,0 +1,108 @@
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import download_model
+from download_model import download_file
+
+BLOB = bytes(range(256)) * 4096            # 1 MiB
+BLOB_SHA256 = hashlib.sha256(BLOB).hexdigest()
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Hugging Face layout: resolve/ redirects (with the linked etag) to a CDN path"""
+
+    linked_etag = BLOB_SHA256
+    ranges = []
+
+    def log_message(self, *args):
+        pass
+
+    def _redirect(self):
+        self.send_response(302)
+        self.send_header("Location", "/cdn/model.gguf")
+        if self.linked_etag:
+            self.send_header("X-Linked-Etag", f'"{self.linked_etag}"')
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _headers(self, status, length, extra=()):
+        self.send_response(status)
+        self.send_header("Content-Length", str(length))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", '"cdn-etag"')
+        for name, value in extra:
+            self.send_header(name, value)
+        self.end_headers()
+
+    def do_HEAD(self):
+        if self.path.startswith("/resolve/"):
+            return self._redirect()
+        self._headers(200, len(BLOB))
+
+    def do_GET(self):
+        if self.path.startswith("/resolve/"):
+            return self._redirect()
+        start, end = self.headers["Range"].split("=")[1].split("-")
+        start, end = int(start), int(end)
+        type(self).ranges.append((start, end))
+        self._headers(206, end - start + 1, [("Content-Range", f"bytes {start}-{end}/{len(BLOB)}")])
+        self.wfile.write(BLOB[start:end + 1])
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(download_model, "SEGMENT_SIZE", 256 * 1024)
+    monkeypatch.setattr(download_model, "CHECKPOINT_INTERVAL", 0.05)
+    Handler.linked_etag = BLOB_SHA256
+    Handler.ranges = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}/resolve/model.gguf"
+    httpd.shutdown()
+
+
+def test_checksum_comes_from_redirect(server, tmp_path):
+    destination = tmp_path / "model.gguf"
+    assert download_file(server, destination, connections=2)
+    assert destination.read_bytes() == BLOB
+    assert not (tmp_path / "model.gguf.part.json").exists()
+
+
+def test_mismatched_checksum_fails(server, tmp_path):
+    destination = tmp_path / "model.gguf"
+    assert not download_file(server, destination, expected_sha256="0" * 64)
+    assert not destination.exists()
+    assert not (tmp_path / "model.gguf.part").exists()
+
+
+def test_missing_checksum_refused_unless_opted_out(server, tmp_path):
+    Handler.linked_etag = None
+    destination = tmp_path / "model.gguf"
+    assert not download_file(server, destination)
+    assert Handler.ranges == []
+    assert download_file(server, destination, require_sha256=False)
+    assert destination.read_bytes() == BLOB
+
+
+def test_resume_fetches_only_missing_bytes(server, tmp_path):
+    destination = tmp_path / "model.gguf"
+    part = tmp_path / "model.gguf.part"
+    segment = download_model.SEGMENT_SIZE
+    # First segment complete, second half done, the rest untouched
+    data = bytearray(len(BLOB))
+    data[:segment + segment // 2] = BLOB[:segment + segment // 2]
+    part.write_bytes(bytes(data))
+    segments = [{"start": s, "end": min(s + segment, len(BLOB)) - 1, "done": 0}
+                for s in range(0, len(BLOB), segment)]
+    segments[0]["done"] = segment
+    segments[1]["done"] = segment // 2
+    (tmp_path / "model.gguf.part.json").write_text(json.dumps(
+        {"name": "model.gguf", "size": len(BLOB), "etag": '"cdn-etag"', "segments": segments}))
+
+    assert download_file(server, destination, connections=2)
+    assert destination.read_bytes() == BLOB
+    assert min(start for start, _ in Handler.ranges) == segment + segment // 2
@@ -0,0 +1,33 @@
+import numpy as np
+
+from memory_store import SKETCH_MIN_SIZE, HashingEmbedder, MemoryStore
+
+
+def unit_rows(rng, rows, dim):
+    vectors = rng.standard_normal((rows, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_sketch_path_finds_near_duplicates(tmp_path):
+    rng = np.random.default_rng(0)
+    size = SKETCH_MIN_SIZE * 2
+    store = MemoryStore(tmp_path, HashingEmbedder(256), capacity=size)
+    vectors = unit_rows(rng, size, 256)
+    store.append_many(vectors, [f"memory {i}" for i in range(size)])
+
+    for target in rng.integers(0, size, 20):
+        probe = vectors[target] + rng.standard_normal(256).astype(np.float32) * 0.75 / 16
+        probe /= np.linalg.norm(probe)
+        assert store.search(probe, 3, min_score=-1.0)[0][1] == f"memory {target}"
+
+
+def test_ring_overwrites_oldest(tmp_path):
+    rng = np.random.default_rng(1)
+    store = MemoryStore(tmp_path, HashingEmbedder(64), capacity=4)
+    vectors = unit_rows(rng, 6, 64)
+    store.append_many(vectors, [f"memory {i}" for i in range(6)])
+    assert len(store) == 4 and store.stats()["evicted"] == 2
+    assert store.search(vectors[5], 1, min_score=-1.0)[0][1] == "memory 5"
+    assert all(text != "memory 0" for _, text in store.search(vectors[0], 4, min_score=-1.0))
+    # Reopening reads the count back from meta.json
+    assert len(MemoryStore(tmp_path, HashingEmbedder(64))) == 4
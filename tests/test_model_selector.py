@@ -0,0 +1,76 @@
+import time
+
+import pytest
+
+import server
+from model_selector import GB, MODEL_CATALOG, RUNTIME_OVERHEAD, estimate, record_decision, select_model
+
+CATALOG = {model["key"]: model for model in MODEL_CATALOG}
+
+
+def fake_probe(**overrides):
+    """What probe_hardware reports for an 8 GB AVX2 laptop with no GPU"""
+    hardware = {
+        "platform": "test", "cpu": "test", "cores": 4, "simd": "avx2",
+        "ram_total_gb": 16.0, "ram_available_gb": 8.0, "memory_bandwidth_gbs": 20.0,
+        "gpu": None, "gpu_free_gb": 0.0,
+    }
+    hardware.update(overrides)
+    return hardware
+
+
+def test_estimate_on_cpu_is_bandwidth_over_weights():
+    model = CATALOG["qwen2.5-7b-q4_k_m"]
+    row = estimate(model, fake_probe(), n_ctx=2048)
+    kv_cache = 2 * 28 * 4 * 128 * 2048 * 2
+    assert row["device"] == "cpu"
+    assert row["memory_gb"] == pytest.approx((4.68 * GB + kv_cache + RUNTIME_OVERHEAD) / GB, abs=0.01)
+    assert row["tokens_per_second"] == pytest.approx(20 * 0.65 / 4.68, abs=0.1)
+    assert row["fits"]
+    assert not estimate(model, fake_probe(ram_available_gb=4.0))["fits"]
+    # A longer context only costs KV-cache memory
+    assert estimate(model, fake_probe(), n_ctx=8192)["memory_gb"] > row["memory_gb"]
+
+
+def test_estimate_uses_gpu_when_weights_fit_in_vram():
+    row = estimate(CATALOG["qwen2.5-7b-q4_k_m"], fake_probe(gpu="RTX", gpu_free_gb=6.0, ram_available_gb=1.0))
+    assert row["device"] == "gpu"
+    assert row["fits"]
+    assert row["tokens_per_second"] == pytest.approx(120 / 4.68, abs=0.1)
+
+
+@pytest.mark.parametrize("hardware, target, expected", [
+    (fake_probe(), 8.0, "qwen2.5-1.5b-q4_k_m"),       # Best quality that is fast enough
+    (fake_probe(), 2.0, "qwen2.5-7b-q4_k_m"),
+    (fake_probe(ram_available_gb=2.0), 100.0, "qwen2.5-0.5b-q4_k_m"),   # Nothing fast enough: fastest that fits
+    (fake_probe(gpu="RTX", gpu_free_gb=6.0), 8.0, "qwen2.5-7b-q4_k_m"),
+])
+def test_select_model(hardware, target, expected):
+    model, estimates = select_model(hardware, target_tokens_per_second=target)
+    assert model["key"] == expected
+    assert [row["key"] for row in estimates] == list(CATALOG)
+
+
+def test_select_model_returns_none_when_nothing_fits():
+    model, estimates = select_model(fake_probe(ram_available_gb=0.5))
+    assert model is None
+    assert not any(row["fits"] for row in estimates)
+
+
+def test_server_prefers_the_selected_model(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    models = tmp_path / "models"
+    models.mkdir()
+    for key in ("qwen2.5-0.5b-q4_k_m", "qwen2.5-3b-q4_k_m", "qwen2.5-7b-q4_k_m"):
+        (models / CATALOG[key]["file"]).write_bytes(b"GGUF")
+    chosen = models / CATALOG["qwen2.5-3b-q4_k_m"]["file"]
+    record_decision(chosen, {"model": "qwen2.5-3b-q4_k_m", "file": chosen.name, "timestamp": time.time()})
+    # An older decision, and one whose model was deleted, lose to it
+    older = models / CATALOG["qwen2.5-7b-q4_k_m"]["file"]
+    record_decision(older, {"model": "qwen2.5-7b-q4_k_m", "file": older.name, "timestamp": time.time() - 60})
+    record_decision(models / "gone.gguf", {"model": "gone", "file": "gone.gguf", "timestamp": time.time() + 60})
+
+    assert server.find_model_file() == str(chosen.relative_to(tmp_path))
+
+    chosen.unlink()
+    assert server.find_model_file() == str(older.relative_to(tmp_path))
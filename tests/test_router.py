@@ -0,0 +1,115 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import router
+from router import EJECT_AFTER_FAILURES, EJECT_SECONDS, SESSION_COOKIE, BackendPool
+
+
+def ready_pool(*loads, policy="least_loaded"):
+    pool = BackendPool([f"http://backend{i}" for i in range(len(loads))], policy=policy)
+    for backend, load in zip(pool.backends, loads):
+        backend.healthy = backend.ready = True
+        backend.remote_in_flight = load
+    return pool
+
+
+def test_choose_prefers_least_loaded():
+    pool = ready_pool(3, 1, 2)
+    assert pool.choose() is pool.backends[1]
+    assert pool.choose(exclude=[pool.backends[1]]) is pool.backends[2]
+    # Streams the router opened itself count before the next poll sees them
+    pool.backends[1].local_in_flight = 5
+    assert pool.choose() is pool.backends[2]
+
+
+def test_choose_keeps_sessions_on_their_backend():
+    pool = ready_pool(0, 0, 0, 0)
+    homes = {key: pool.choose(key) for key in map(str, range(40))}
+    evicted = homes["0"]
+    evicted.ejected_until = time.time() + 60
+    for key, home in homes.items():
+        moved = pool.choose(key)
+        assert moved is not evicted
+        if home is not evicted:
+            assert moved is home
+
+
+def test_backend_ejected_only_after_repeated_failures():
+    pool = ready_pool(0)
+    backend = pool.backends[0]
+    for _ in range(EJECT_AFTER_FAILURES - 1):
+        pool.mark_failure(backend, "timeout")
+        assert backend.available()
+    pool.mark_failure(backend, "timeout")
+    assert not backend.available()
+    assert backend.ejections == 1
+    assert backend.ejected_until == pytest.approx(time.time() + EJECT_SECONDS, abs=1)
+    assert pool.choose() is None
+
+
+def test_repeat_ejection_backs_off():
+    pool = ready_pool(0)
+    backend = pool.backends[0]
+    for ejection in range(1, 4):
+        backend.ejected_until = 0.0
+        for _ in range(EJECT_AFTER_FAILURES):
+            pool.mark_failure(backend, "refused")
+        assert backend.ejected_until - time.time() == pytest.approx(EJECT_SECONDS * 2 ** (ejection - 1), abs=1)
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Answers status polls and echoes which backend served a request"""
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/api/status":
+            return self._reply({"ready": True, "load": {"in_flight": 0, "queued": 0}})
+        self._reply({"port": self.server.server_port})
+
+    def do_POST(self):
+        received = len(self.rfile.read(int(self.headers["Content-Length"])))
+        self._reply({"port": self.server.server_port, "received": received})
+
+
+@pytest.fixture
+def client(monkeypatch):
+    servers = [ThreadingHTTPServer(("127.0.0.1", 0), Handler) for _ in range(4)]
+    for httpd in servers:
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    pool = BackendPool([f"http://127.0.0.1:{httpd.server_port}" for httpd in servers])
+    pool.poll_once()
+    monkeypatch.setattr(router, "pool", pool)
+    yield router.app.test_client()
+    for httpd in servers:
+        httpd.shutdown()
+
+
+def test_new_session_starts_and_stops_on_one_backend(client):
+    for _ in range(20):
+        client.delete_cookie(SESSION_COOKIE)
+        start = client.post("/api/whisper/start", data=b"{}")
+        cookie = client.get_cookie(SESSION_COOKIE)
+        assert cookie is not None
+        stop = client.post("/api/whisper/stop", data=b"{}")
+        assert stop.json["port"] == start.json["port"]
+        assert client.get_cookie(SESSION_COOKIE).value == cookie.value
+
+
+def test_large_body_streams_through(client):
+    body = b"x" * (router.BUFFER_BODY_LIMIT * 3)
+    response = client.post("/api/transcribe", data=body, content_type="application/octet-stream")
+    assert response.json["received"] == len(body)
@@ -0,0 +1,38 @@
+import pytest
+
+from sentence_budget import SentenceCounter
+
+
+def count(text, chunk=None):
+    counter = SentenceCounter(budget=0)
+    pieces = [text] if chunk is None else [text[i:i + chunk] for i in range(0, len(text), chunk)]
+    for piece in pieces:
+        counter.sentence_ends(piece)
+    return counter.count
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("No. I can't do that. Sorry", 2),
+    ("The answer is no. Really. Ok", 2),
+    ("See item No. 5 on the list. Next", 1),
+    ("Mr. Stark is here. Pi is 3.14 today. Visit example.com now. Ok", 3),
+    ("J. R. R. Tolkien wrote it. Then", 1),
+    ("1. First step is simple. Then", 1),
+    ("Wait... What happened? Nothing!! Ok", 3),
+    ("नमस्ते।मैं ठीक हूँ।और", 2),
+    ("नमस्ते। मैं ठीक हूँ॥ और", 2),
+])
+def test_sentence_boundaries(text, expected):
+    assert count(text) == expected
+
+
+def test_streamed_tokens_match_whole_text():
+    text = "No. I can't do that. The answer is no. Really. नमस्ते।मैं ठीक हूँ।और"
+    assert all(count(text, chunk) == count(text) == 6 for chunk in (1, 2, 3, 7))
+
+
+def test_budget_cuts_at_sentence_end():
+    counter = SentenceCounter(budget=2)
+    assert counter.feed("One. Two") is None
+    cut = counter.feed(". Three.")
+    assert cut == 1
@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+import server
+from stub_model import StubLlama
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.setattr(server, "MODEL_INSTANCE", StubLlama(name="test", prefill_ms=1, token_ms=0))
+    monkeypatch.setattr(server, "BATCH_DIR", tmp_path)
+    return server.app.test_client()
+
+
+BODY = "\n".join(json.dumps({"id": str(i), "message": f"question {i}"}) for i in range(3))
+
+
+def test_non_object_line_is_a_bad_request(client):
+    response = client.post("/api/chat/batch", data='"ok"\n[1, 2]')
+    assert response.status_code == 400
+    assert "line 2" in response.json["error"]
+
+
+def test_resume_after_client_drops_before_first_chunk(client):
+    # The server closes the response without ever advancing its body
+    with server.app.test_request_context("/api/chat/batch?batch_id=b1", method="POST", data=BODY):
+        dropped = server.api_chat_batch()
+    assert dropped.status_code == 200
+    dropped.close()
+
+    resumed = client.post("/api/chat/batch?batch_id=b1", data=BODY)
+    assert resumed.status_code == 200
+    assert sorted(json.loads(line)["id"] for line in resumed.get_data(as_text=True).splitlines()) == ["0", "1", "2"]
+    resumed.close()
+    assert "b1" not in server.ACTIVE_BATCHES
+
+
+def test_running_batch_is_locked(client):
+    running = client.post("/api/chat/batch?batch_id=b2", data=BODY, buffered=False)
+    assert client.post("/api/chat/batch?batch_id=b2", data=BODY).status_code == 409
+    running.close()
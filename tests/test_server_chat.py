@@ -0,0 +1,21 @@
+import json
+
+import server
+from stub_model import StubLlama
+
+
+def test_pinned_hindi_toggle_leaves_server_mode_alone(monkeypatch):
+    monkeypatch.setattr(server, "MODEL_INSTANCE", StubLlama(name="test", prefill_ms=1, token_ms=0))
+    monkeypatch.setattr(server, "speak_hindi", False)
+    prompts = []
+    real_build_prompt = server.build_prompt
+    monkeypatch.setattr(server, "build_prompt", lambda *a, **k: prompts.append(k.get("hindi")) or real_build_prompt(*a, **k))
+    client = server.app.test_client()
+
+    toggle = client.post("/api/chat/stream", json={"message": "talk in hindi", "hindi": False})
+    assert json.loads(toggle.get_data(as_text=True)[len("data: "):])["content"] == server.HINDI_MODE_RESPONSE
+    assert server.speak_hindi is False
+
+    client.post("/api/chat/stream", json={"message": "explain jet engines", "hindi": True}).get_data()
+    assert prompts == [True]
+    assert server.speak_hindi is False
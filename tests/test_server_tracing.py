@@ -0,0 +1,41 @@
+import threading
+
+import pytest
+
+import server
+from stub_model import StubLlama
+from tracing import trace_recorder
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(server, "MODEL_INSTANCE", StubLlama(name="test", prefill_ms=50, token_ms=5))
+    monkeypatch.setattr(trace_recorder, "sample_rate", 1.0)
+    trace_recorder.clear()
+    yield server.app.test_client()
+    trace_recorder.clear()
+
+
+def root_spans(name):
+    return [e for e in trace_recorder.export()["traceEvents"] if e.get("ph") == "X" and e["name"] == name]
+
+
+def test_coalesced_generation_spans_stay_in_the_request_trace(client):
+    responses = []
+    threads = [threading.Thread(target=lambda: responses.append(
+        client.post("/api/chat/stream", json={"message": "explain jet engines"}).get_data()))
+        for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(responses)) == 1
+
+    requests = root_spans("api_chat_stream")
+    assert len(requests) == 4
+    assert len({span["args"]["flight"] for span in requests}) == 1
+    leaders = [span for span in requests if span["args"].get("flight_leader")]
+    assert len(leaders) == 1
+    assert len(leaders) + sum(1 for span in requests if span["args"].get("coalesced")) == 4
+    assert {span["tid"] for span in root_spans("prefill")} == {span["tid"] for span in leaders}
+    assert root_spans("coalesced_generation") == []
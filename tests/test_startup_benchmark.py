@@ -0,0 +1,63 @@
+import pytest
+
+from startup_benchmark import check_startup, parse_importtime, summarize
+
+# Captured from `python -X importtime -c "import server"` on a server.py that
+# imports a local helpers module and json; site's early imports trimmed
+IMPORTTIME_STDERR = """\
+import time: self [us] | cumulative | imported package
+import time:       478 |        478 |   _distutils_hack
+import time:       110 |        110 |   sitecustomize
+import time:        83 |         83 |   usercustomize
+import time:      2088 |      52377 | site
+import time:       899 |        899 |         numbers
+import time:      1325 |       2223 |       _decimal
+import time:       237 |       2460 |     decimal
+import time:      1801 |       1801 |     fractions
+import time:       242 |       4502 |   helpers
+import time:       370 |        370 |         _json
+import time:       763 |       1133 |       json.scanner
+import time:       821 |       1954 |     json.decoder
+import time:       881 |        881 |     json.encoder
+import time:       441 |       3275 |   json
+import time:       379 |       8156 | server
+"""
+
+
+def test_parse_importtime_reads_depth_and_times():
+    entries = parse_importtime("Warning: something unrelated\n" + IMPORTTIME_STDERR)
+    assert len(entries) == 15
+    assert entries[3] == (0, "site", 2088, 52377)
+    assert entries[4] == (4, "numbers", 899, 899)
+    assert entries[-1] == (0, "server", 379, 8156)
+
+
+def test_self_times_add_up_to_the_cumulative_total():
+    entries = parse_importtime(IMPORTTIME_STDERR)
+    server_tree = entries[4:]
+    # importtime rounds every line to whole microseconds, so sums drift slightly
+    assert sum(self_us for _, _, self_us, _ in server_tree) == pytest.approx(server_tree[-1][3], abs=len(server_tree))
+    # Each package's cumulative time is its own plus its direct children's
+    for index, (depth, name, self_us, cumulative_us) in enumerate(server_tree):
+        children, start = [], index - 1
+        while start >= 0 and server_tree[start][0] > depth:
+            if server_tree[start][0] == depth + 1:
+                children.append(server_tree[start][3])
+            start -= 1
+        assert cumulative_us == pytest.approx(self_us + sum(children), abs=len(children) + 1), name
+
+
+def test_summarize_reports_median_total_and_direct_imports():
+    fast = parse_importtime(IMPORTTIME_STDERR)
+    slow = [(depth, name, self_us, cumulative_us * 2) for depth, name, self_us, cumulative_us in fast]
+    total_ms, per_import, loaded = summarize([fast, slow, fast])
+    assert total_ms == pytest.approx(8.156)
+    assert per_import == {"helpers": pytest.approx(4.502), "json": pytest.approx(3.275)}
+    assert {"decimal", "json.scanner", "site"} <= loaded
+
+
+def test_budget_and_deferred_modules():
+    _, _, loaded = summarize([parse_importtime(IMPORTTIME_STDERR)])
+    assert check_startup(8.156, loaded, budget_ms=10) == (False, [])
+    assert check_startup(8.156, loaded, budget_ms=8) == (True, [])
+    assert check_startup(8.156, loaded | {"numpy", "torch"}, budget_ms=10) == (False, ["numpy", "torch"])
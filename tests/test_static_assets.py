@@ -0,0 +1,98 @@
+import gzip
+
+import pytest
+from flask import Flask
+
+from static_assets import StaticAsset, StaticAssetStore, minify_html, parse_accept_encoding
+
+PAGE = """<!DOCTYPE html>
+<html>
+    <!-- a comment -->
+    <body>
+        <script>
+            const banner = `
+    keep   this
+`;
+        </script>
+    </body>
+</html>
+"""
+
+
+@pytest.fixture
+def asset(tmp_path):
+    path = tmp_path / "index.html"
+    path.write_text(PAGE, encoding="utf-8")
+    asset = StaticAsset(path)
+    # brotli is optional; give every test the same three representations
+    body, etag = asset.representations[None]
+    asset.representations["br"] = (b"br-bytes", etag[:-1] + '-br"')
+    asset.etags = {etag for _, etag in asset.representations.values()}
+    return asset
+
+
+@pytest.fixture
+def serve(asset):
+    app = Flask(__name__)
+    store = StaticAssetStore(dev_mode=False)
+    store._assets["index.html"] = asset
+
+    def serve(**headers):
+        with app.test_request_context("/", headers=headers):
+            return store.serve("index.html")
+    return serve
+
+
+def test_minify_keeps_template_literals():
+    minified = minify_html(PAGE)
+    assert "<!-- a comment -->" not in minified
+    assert "<body>\n<script>" in minified
+    assert "\n    keep   this\n" in minified
+
+
+def test_each_encoding_has_its_own_etag(asset):
+    assert len(asset.etags) == 3
+    assert gzip.decompress(asset.representations["gzip"][0]) == asset.representations[None][0]
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("", None),
+    ("gzip", "gzip"),
+    ("gzip, deflate, br", "br"),
+    ("br;q=0.5, gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("br;q=0, gzip;q=0", None),
+    ("*", "br"),
+    ("*;q=0.2, identity", None),
+    ("*;q=0, gzip;q=0.1", "gzip"),
+    ("identity;q=0, gzip;q=0", None),   # Nothing acceptable: serve the page plain rather than fail
+    ("gzip;q=abc, br;q=2", None),       # Malformed q-values drop the coding
+])
+def test_encoding_follows_q_values(asset, header, expected):
+    assert asset.pick(header)[0] == expected
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("GZip;Q=0.5 , br") == {"gzip": 0.5, "br": 1.0}
+
+
+def test_response_headers_and_conditional_get(serve, asset):
+    response = serve(**{"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.headers["ETag"] == asset.representations["gzip"][1]
+
+    plain = serve()
+    assert "Content-Encoding" not in plain.headers
+    assert plain.headers["ETag"] == asset.representations[None][1]
+    assert plain.headers["Vary"] == "Accept-Encoding"
+
+    etag = response.headers["ETag"]
+    cached = serve(**{"Accept-Encoding": "gzip", "If-None-Match": f'"stale", W/{etag}'})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+    assert cached.headers["Vary"] == "Accept-Encoding"
+    assert cached.get_data() == b""
+
+    assert serve(**{"If-None-Match": '"stale"'}).status_code == 200
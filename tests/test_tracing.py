@@ -0,0 +1,99 @@
+import threading
+import time
+
+import pytest
+
+import tracing
+from tracing import NULL_TRACE, SamplingProfiler, TraceRecorder, traced_stream
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    recorder = TraceRecorder(sample_rate=1.0, ring_size=3)
+    # Trace.finish hands traces to the module's recorder
+    monkeypatch.setattr(tracing, "trace_recorder", recorder)
+    return recorder
+
+
+def test_sampling_rate_decides_live_or_null(monkeypatch):
+    assert TraceRecorder(sample_rate=0).start("req") is NULL_TRACE
+    monkeypatch.setattr(tracing.random, "random", lambda: 0.3)
+    assert TraceRecorder(sample_rate=0.25).start("req") is NULL_TRACE
+    assert TraceRecorder(sample_rate=0.5).start("req").sampled
+
+
+def test_ring_keeps_only_the_newest_traces(recorder):
+    for index in range(5):
+        recorder.start("req", index=index).finish()
+    roots = [e for e in recorder.export()["traceEvents"] if e["ph"] == "X"]
+    assert [e["args"]["index"] for e in roots] == [2, 3, 4]
+
+
+def test_export_is_chrome_trace_json(recorder):
+    trace = recorder.start("api_chat_stream", message_chars=5)
+    with trace.span("build_prompt") as args:
+        args["tokens"] = 12
+    trace.finish(status=200)
+    trace.finish(status=500)   # Second finish is ignored
+
+    export = recorder.export()
+    assert export["displayTimeUnit"] == "ms"
+    meta = [e for e in export["traceEvents"] if e["ph"] == "M"]
+    assert {e["name"] for e in meta} == {"process_name", "thread_name"}
+    assert any(e["args"]["name"] == f"api_chat_stream #{trace.trace_id}" for e in meta)
+    spans = {e["name"]: e for e in export["traceEvents"] if e["ph"] == "X"}
+    assert spans["build_prompt"]["args"] == {"tokens": 12}
+    root = spans["api_chat_stream"]
+    assert root["args"] == {"message_chars": 5, "status": 200}
+    assert root["tid"] == spans["build_prompt"]["tid"] == trace.trace_id
+    assert root["ts"] <= spans["build_prompt"]["ts"]
+    assert root["dur"] >= spans["build_prompt"]["dur"] >= 0
+
+
+def test_null_trace_records_nothing(recorder):
+    with NULL_TRACE.span("anything") as args:
+        args["ignored"] = True
+    NULL_TRACE.add_span("x", 0, 1)
+    NULL_TRACE.annotate(a=1)
+    NULL_TRACE.finish()
+    assert list(traced_stream(NULL_TRACE, iter("abc"))) == ["a", "b", "c"]
+    assert [e for e in recorder.export()["traceEvents"] if e["ph"] == "X"] == []
+
+
+def test_traced_stream_finishes_the_trace(recorder):
+    trace = recorder.start("req")
+    assert list(traced_stream(trace, iter(["a", "b"]))) == ["a", "b"]
+    spans = {e["name"]: e for e in recorder.export()["traceEvents"] if e["ph"] == "X"}
+    assert set(spans) == {"req", "wsgi_dispatch", "stream"}
+    assert spans["stream"]["args"]["chunks"] == 2
+
+
+def test_profiler_folds_other_threads_stacks():
+    stop = threading.Event()
+
+    def busy_wait_for_profiler():
+        while not stop.is_set():
+            time.sleep(0.001)
+
+    worker = threading.Thread(target=busy_wait_for_profiler, name="busy-worker")
+    worker.start()
+    profiler = SamplingProfiler()
+    try:
+        folded = profiler.profile(seconds=0.1, interval=0.005)
+    finally:
+        stop.set()
+        worker.join()
+    lines = [line.rsplit(" ", 1) for line in folded.splitlines()]
+    worker_stacks = [(stack, int(count)) for stack, count in lines if stack.startswith("busy-worker;")]
+    assert worker_stacks and all(count > 0 for _, count in worker_stacks)
+    assert any("busy_wait_for_profiler (test_tracing.py:" in stack for stack, _ in worker_stacks)
+
+
+def test_profiler_runs_one_profile_at_a_time():
+    profiler = SamplingProfiler()
+    profiler._lock.acquire()
+    try:
+        with pytest.raises(RuntimeError):
+            profiler.profile(seconds=0.01)
+    finally:
+        profiler._lock.release()
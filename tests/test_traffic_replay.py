@@ -0,0 +1,70 @@
+import time
+
+import pytest
+
+import traffic_replay
+from traffic_capture import TrafficRecorder, describe_message
+from traffic_replay import VOCABULARY, category, chat_payload, read_jsonl, replay, synthesize_message
+
+INSTANT_KEYS = ("hello", "what time", "help")
+
+
+def test_capture_round_trip(tmp_path):
+    recorder = TrafficRecorder(tmp_path / "capture.jsonl")
+    capture = recorder.start("chat", **describe_message("Explain jet  engines please", INSTANT_KEYS),
+                             hindi_mode=True, tts=False)
+    events = ['data: {"content": "Jet ", "done": false}\n\n', 'data: {"content": "engines.", "done": true}\n\n']
+    assert list(capture.stream(iter(events))) == events
+    recorder.start("whisper_stop").finish(success=True)
+    (tmp_path / "capture.jsonl").open("a").write('{"kind": "chat", "ts"')   # Torn live write
+
+    chat, whisper = read_jsonl(tmp_path / "capture.jsonl")
+    assert chat["kind"] == "chat" and whisper["kind"] == "whisper_stop"
+    assert chat["message_words"] == 4 and chat["instant"] is None and chat["hindi_mode"] is True
+    assert chat["events"] == 2 and chat["response_chars"] == len("Jet engines.") and chat["completed"]
+    assert chat["ttft_ms"] <= chat["total_ms"]
+    # No text is stored, only its shape and a digest
+    assert "jet" not in (tmp_path / "capture.jsonl").read_text().lower()
+
+
+def test_synthesized_messages_keep_the_captured_shape():
+    model = describe_message("how do black holes form", INSTANT_KEYS)
+    message = synthesize_message(model)
+    assert len(message.split()) == 5
+    assert all(word in VOCABULARY for word in message.split())
+    assert not any(key in message for key in INSTANT_KEYS)
+    # Repeats of one message replay as one message; different ones differ
+    assert synthesize_message(dict(model)) == message
+    assert synthesize_message(describe_message("why is the sky blue today", INSTANT_KEYS)) != message
+
+    assert synthesize_message(describe_message("Hello there", INSTANT_KEYS)) == "hello"
+    toggle = describe_message("talk in hindi please", INSTANT_KEYS)
+    assert synthesize_message(toggle) == "talk in hindi"
+    assert category({"kind": "chat", **toggle}) == "chat:hindi_toggle"
+
+
+def test_payload_pins_the_captured_hindi_mode():
+    entry = {"kind": "chat", "message_words": 3, "digest": "abc", "hindi_mode": True}
+    assert chat_payload(entry)["hindi"] is True
+    assert chat_payload(dict(entry, hindi_mode=False))["hindi"] is False
+    # Captures from before the mode was recorded leave the server's mode alone
+    assert "hindi" not in chat_payload({"kind": "chat", "message_words": 3, "digest": "abc"})
+
+
+def test_replay_keeps_captured_offsets_scaled_by_speed(monkeypatch):
+    fired = []
+
+    def fake_chat(target, entry):
+        fired.append((entry["ts"], time.perf_counter()))
+        return {"status": 200, "ttft_ms": 1.0, "total_ms": 2.0}
+
+    monkeypatch.setitem(traffic_replay.REPLAYERS, "chat", fake_chat)
+    entries = [{"kind": "chat", "ts": 100.0 + offset, "message_words": 1} for offset in (1.0, 0.0, 2.0)]
+    entries.append({"kind": "whisper_start", "ts": 100.5})
+    results = replay(entries, "http://unused", speed=10.0, include_whisper=False)
+
+    assert [r["offset_s"] for r in sorted(results, key=lambda r: r["offset_s"])] == [0.0, 1.0, 2.0]
+    assert all(r["lag_ms"] < 50 for r in results)
+    fired.sort()
+    start = fired[0][1]
+    assert [t - start for _, t in fired] == pytest.approx([0.0, 0.1, 0.2], abs=0.03)
@@ -0,0 +1,135 @@
+import json
+import os
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+from tts_stream import PhraseAudioCache, SentenceSplitter, stream_with_tts
+
+
+def test_memory_cache_evicts_least_recently_used(tmp_path):
+    cache = PhraseAudioCache(tmp_path, memory_limit_bytes=10)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bbbb")
+    assert cache.get("a") == b"aaaa"
+    cache.put("c", b"cccc")
+    assert list(cache._memory) == ["a", "c"]
+    assert cache.stats()["memory_bytes"] == 8
+    # Still on disk, so the evicted phrase is a hit and comes back into memory
+    assert cache.get("b") == b"bbbb"
+    assert list(cache._memory) == ["c", "b"]
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = PhraseAudioCache(tmp_path, memory_limit_bytes=0, disk_limit_bytes=10)
+    cache.put("a1", b"aaaa")
+    cache.put("b1", b"bbbb")
+    assert cache.get("a1") == b"aaaa"
+    cache.put("c1", b"cccc")
+    assert not cache._path_for("b1").exists()
+    assert cache.get("b1") is None
+    assert cache.get("a1") == b"aaaa"
+    stats = cache.stats()
+    assert (stats["disk_entries"], stats["disk_bytes"], stats["disk_evictions"]) == (2, 8, 1)
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+
+
+def test_disk_lru_order_survives_reopen(tmp_path):
+    cache = PhraseAudioCache(tmp_path, memory_limit_bytes=0)
+    for key, used_at in [("a1", 100), ("b1", 300), ("c1", 200)]:
+        cache.put(key, b"xxxx")
+        os.utime(cache._path_for(key), (used_at, used_at))
+
+    reopened = PhraseAudioCache(tmp_path, memory_limit_bytes=0, disk_limit_bytes=12)
+    assert reopened.stats()["disk_bytes"] == 12
+    reopened.put("d1", b"dddd")
+    reopened.put("e1", b"eeee")
+    assert [key for key in ("a1", "b1", "c1") if reopened._path_for(key).exists()] == ["b1"]
+
+
+def test_key_depends_on_voice_settings():
+    key = PhraseAudioCache.key_for("Hello, sir.")
+    assert key == PhraseAudioCache.key_for("Hello, sir.")
+    assert key != PhraseAudioCache.key_for("Hello, sir.", voice="en")
+    assert key != PhraseAudioCache.key_for("Hello, sir.", rate=180)
+
+
+def test_splitter_emits_sentences_once_confirmed():
+    splitter = SentenceSplitter()
+    tokens = ["Mr. ", "Stark is here", ". Pi", " is 3", ".14 today. ", "Visit example", ".com now", ". Ok"]
+    assert [splitter.feed(token) for token in tokens] == [
+        [], [], ["Mr. Stark is here."], [], ["Pi is 3.14 today."], [], [], ["Visit example.com now."],
+    ]
+    assert splitter.flush() == ["Ok"]
+    assert splitter.flush() == []
+
+
+class FakeSynthesizer:
+    """Audio is the sentence's bytes; listed sentences resolve late from a timer"""
+
+    def __init__(self, slow=()):
+        self.slow = set(slow)
+        self.submitted = []
+
+    def submit(self, text):
+        self.submitted.append(text)
+        future = Future()
+        if text in self.slow:
+            threading.Timer(0.05, future.set_result, [text.encode()]).start()
+        else:
+            future.set_result(text.encode())
+        return future
+
+
+def chat_events(tokens):
+    for token in tokens:
+        yield f"data: {json.dumps({'content': token, 'done': False})}\n\n"
+    yield f"data: {json.dumps({'content': '', 'done': True})}\n\n"
+
+
+def parse(events):
+    return [json.loads(event[6:]) for event in events]
+
+
+def test_audio_follows_the_text_that_completed_it():
+    events = parse(stream_with_tts(chat_events(["Hello there. ", "How are you? ", "Fine"]), FakeSynthesizer()))
+    kinds = [("audio", e["seq"]) if "audio" in e else ("text", e["content"]) for e in events]
+    assert kinds == [
+        ("text", "Hello there. "),
+        ("audio", 0),
+        ("text", "How are you? "),
+        ("audio", 1),
+        ("text", "Fine"),
+        ("text", ""),
+        ("audio", 2),
+        ("text", ""),
+    ]
+    assert [e["text"] for e in events if "audio" in e] == ["Hello there.", "How are you?", "Fine"]
+    assert [e["done"] for e in events] == [False] * 7 + [True]
+
+
+def test_audio_keeps_sentence_order_when_synthesis_finishes_out_of_order():
+    synthesizer = FakeSynthesizer(slow={"One."})
+    events = parse(stream_with_tts(chat_events(["One. ", "Two. ", "Three."]), synthesizer))
+    audio = [e for e in events if "audio" in e]
+    assert [e["seq"] for e in audio] == [0, 1, 2]
+    assert [e["text"] for e in audio] == ["One.", "Two.", "Three."]
+    first_audio = events.index(audio[0])
+    assert all("audio" not in e for e in events[:first_audio])
+    assert events[-1] == {"content": "", "done": True}
+
+
+def test_leaving_mid_reply_closes_the_upstream_stream():
+    closed = []
+
+    def upstream():
+        try:
+            yield from chat_events(["One. ", "Two. ", "Three."])
+        finally:
+            closed.append(True)
+
+    stream = stream_with_tts(upstream(), FakeSynthesizer())
+    next(stream)
+    stream.close()
+    assert closed == [True]
@@ -0,0 +1,97 @@
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from wake_word import MFCC, SAMPLE_RATE, WakeWordDetector, detect_in_wav, load_templates, normalize_features, trim_silence
+from whisper_stream import WakeWordListener
+
+rng = np.random.default_rng(1)
+
+
+def keyword():
+    """A rising then falling 0.6 s chirp stands in for a spoken "Jarvis\""""
+    t = np.arange(int(0.6 * SAMPLE_RATE)) / SAMPLE_RATE
+    freq = np.where(t < 0.3, 300 + 1500 * t / 0.3, 1800 - 1200 * (t - 0.3) / 0.3)
+    phase = 2 * np.pi * np.cumsum(freq) / SAMPLE_RATE
+    return (0.3 * np.sin(phase)).astype(np.float32)
+
+
+def quiet(seconds):
+    return (rng.standard_normal(int(seconds * SAMPLE_RATE)) * 0.001).astype(np.float32)
+
+
+def run(detector, audio, chunk=1024):
+    detections = []
+    for i in range(0, len(audio), chunk):
+        detections.extend(detector.feed(audio[i:i + chunk]))
+    return detections
+
+
+@pytest.fixture
+def detector():
+    template = normalize_features(MFCC()(trim_silence(keyword())))
+    return WakeWordDetector([template], threshold=0.05)
+
+
+def test_latency_counts_from_end_of_keyword(detector):
+    # Keyword ends at 1.58 s; the spotter scores every 100 ms, so it fires at 1.6 s
+    detections = run(detector, np.concatenate([quiet(0.98), keyword(), quiet(1.0)]))
+    assert detections == [pytest.approx(1.6)]
+    waited_ms = detector.last_latency_ms - detector.last_eval_ms
+    assert waited_ms == pytest.approx(20, abs=10)
+    assert detector.stats()["last_eval_ms"] is not None
+
+
+def test_silence_is_never_scored(detector):
+    assert run(detector, quiet(3.0)) == []
+    assert detector.evaluations == 0
+    assert detector.stats()["last_detection_latency_ms"] is None
+
+
+# Speech clips rendered with espeak-ng in several voices and rates; the two
+# templates are enrolled with voices different from every test clip's
+FIXTURES = Path(__file__).parent / "fixtures" / "wake_word"
+
+
+@pytest.fixture(scope="module")
+def spoken_templates():
+    return load_templates(FIXTURES / "templates")
+
+
+@pytest.mark.parametrize("clip", sorted((FIXTURES / "keyword").glob("*.wav")), ids=lambda p: p.stem)
+def test_spoken_keyword_is_detected_once(spoken_templates, clip):
+    detections = detect_in_wav(clip, WakeWordDetector(spoken_templates))
+    assert len(detections) == 1
+
+
+@pytest.mark.parametrize("clip", sorted((FIXTURES / "other").glob("*.wav")), ids=lambda p: p.stem)
+def test_other_speech_is_rejected(spoken_templates, clip):
+    detector = WakeWordDetector(spoken_templates)
+    assert detect_in_wav(clip, detector) == []
+    assert detector.evaluations > 0
+
+
+class FakeRecognizer:
+    def __init__(self):
+        self.transcribe_lock = threading.Lock()
+        self.last_timings = [("whisper.transcribe", 1, 2)]
+        self.lock_held = None
+
+    def transcribe_audio(self, audio_data, timings=None):
+        self.lock_held = self.transcribe_lock.locked()
+        (self.last_timings if timings is None else timings).append(("whisper.transcribe", 3, 4))
+        return "what time is it"
+
+
+def test_listener_transcribes_under_shared_lock():
+    recognizer = FakeRecognizer()
+    heard = []
+    listener = WakeWordListener(recognizer, detector=None, on_transcription=heard.append)
+    listener._transcribe(np.ones(160, dtype=np.float32))
+    assert recognizer.lock_held
+    # Push-to-talk timings are left for /api/whisper/stop to read
+    assert recognizer.last_timings == [("whisper.transcribe", 1, 2)]
+    assert heard == ["what time is it"]
+    assert listener.last_seq == 1
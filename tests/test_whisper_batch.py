@@ -0,0 +1,65 @@
+import wave
+
+import numpy as np
+import pytest
+
+from whisper_batch import WHISPER_RATE, iter_wav_inputs, plan_chunks, read_wav_info
+
+
+def write_wav(path, seconds, quiet_at=(), rate=WHISPER_RATE):
+    """Noise with 0.3 s silent gaps centred on ``quiet_at`` seconds"""
+    rng = np.random.default_rng(0)
+    audio = (rng.standard_normal(int(seconds * rate)) * 3000).astype(np.int16)
+    for at in quiet_at:
+        audio[int((at - 0.15) * rate):int((at + 0.15) * rate)] = 0
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(audio.tobytes())
+    return read_wav_info(path)
+
+
+def test_decode_regions_fit_whisper_window(tmp_path):
+    info = write_wav(tmp_path / "long.wav", 125)
+    chunks = plan_chunks(info)
+    assert len(chunks) == 5
+    for core_start, core_end, decode_start, decode_end in chunks:
+        assert decode_end - decode_start <= 30 * info.rate
+        assert decode_start <= core_start < core_end <= decode_end
+    # Cores tile the file exactly
+    assert chunks[0][0] == 0 and chunks[-1][1] == info.n_frames
+    assert all(a[1] == b[0] for a, b in zip(chunks, chunks[1:]))
+
+
+def test_cuts_land_in_quiet_gaps(tmp_path):
+    info = write_wav(tmp_path / "gaps.wav", 70, quiet_at=(26.5, 53.0))
+    chunks = plan_chunks(info)
+    cuts = [core_end / info.rate for _, core_end, _, _ in chunks[:-1]]
+    assert cuts == pytest.approx([26.5, 53.0], abs=0.2)
+
+
+def test_short_file_is_one_chunk(tmp_path):
+    info = write_wav(tmp_path / "short.wav", 12)
+    assert plan_chunks(info) == [(0, info.n_frames, 0, info.n_frames)]
+
+
+def test_overlap_must_be_shorter_than_chunk(tmp_path):
+    info = write_wav(tmp_path / "short.wav", 2)
+    with pytest.raises(ValueError):
+        plan_chunks(info, chunk_seconds=1.0, overlap_seconds=1.0)
+
+
+def test_inputs_stay_inside_root(tmp_path):
+    root = tmp_path / "shared"
+    (root / "calls").mkdir(parents=True)
+    write_wav(root / "calls" / "a.wav", 1)
+    write_wav(tmp_path / "secret.wav", 1)
+    (root / "calls" / "escape.wav").symlink_to(tmp_path / "secret.wav")
+    # A sibling that merely shares the root's name as a prefix is outside it too
+    (tmp_path / "shared-old").mkdir()
+    write_wav(tmp_path / "shared-old" / "b.wav", 1)
+
+    inputs = ["calls", "../secret.wav", str(tmp_path / "secret.wav"), "../shared-old/b.wav"]
+    found = list(iter_wav_inputs(inputs, root=root))
+    assert [p.name for p in found] == ["a.wav"]